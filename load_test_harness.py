@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do pipeline real (ProcessFileUseCase + ParallelProcessingService) contra o emulador local
+
+Gera uma pasta sintética de NFe, monta a mesma pilha de serviços da aplicação (sem Qt)
+apontada para o emulador da ValidaGuarda e relata vazão, percentis de latência e o
+comportamento diante de erros (retries, 409, circuito, pausas Retry-After).
+
+Uso:
+    python load_test_harness.py --files 2000 --workers 10 --latency lognormal:80,0.5 --error 503:0.05
+    python load_test_harness.py --files 5000 --async-uploads --max-in-flight 200 --batch-size 50
+    python load_test_harness.py --url http://127.0.0.1:8080   (emulador já em execução)
+
+Os XMLs sintéticos não são assinados nem completos para os XSD, então a validação local
+fica desligada por padrão e o teste mede o caminho de sucesso; --validate-schema e
+--verify-signature medem essas etapas (os documentos saem inválidos).
+"""
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(str(Path(__file__).parent / 'monitor_nfe'))
+
+from application.interfaces.repositories import IConfigurationRepository, ILogRepository
+from application.use_cases.process_file_use_case import ProcessFileUseCase
+from application.use_cases.validate_nfe_use_case import ValidateNFeUseCase
+from domain.entities.configuration import Configuration
+from domain.entities.validation_result import ValidationResult
+from domain.services.nfe_validation_service import NFEValidationService
+from infrastructure.data_access.sqlite_nfe_key_ledger import SQLiteNFEKeyLedger
+from infrastructure.data_access.sqlite_submission_outbox import SQLiteSubmissionOutbox
+from infrastructure.external_services.async_validanfe_api_service import AsyncValidaNFeAPIService
+from infrastructure.external_services.circuit_breaker_api_service import CircuitBreakerAPIService
+from infrastructure.external_services.micro_batching_api_service import MicroBatchingAPIService
+from infrastructure.external_services.validanfe_api_service import ValidaNFeAPIService
+from infrastructure.external_services.process_pool_schema_service import ProcessPoolXMLSchemaService
+from infrastructure.external_services.xml_schema_service import XMLSchemaService
+from infrastructure.external_services.xml_signature_service import XMLSignatureService
+from infrastructure.file_system.archive_extractor_service import ArchiveExtractorService
+from infrastructure.file_system.file_organizer_service import FileOrganizerService
+from infrastructure.services.circuit_breaker import CircuitBreaker
+from infrastructure.services.parallel_processing_service import ParallelProcessingService
+from infrastructure.services.token_bucket_rate_limiter import TokenBucketRateLimiter
+from infrastructure.services.validation_result_cache import LRUValidationResultCache
+from validaguarda_emulator import ValidaGuardaEmulator, add_emulator_arguments, settings_from_arguments
+
+SCHEMAS_FOLDER = Path(__file__).parent / 'monitor_nfe' / 'schemas'
+
+
+class MemoryConfigRepository(IConfigurationRepository):
+    """Configuração em memória para o teste de carga"""
+    
+    def __init__(self, config: Configuration):
+        self._config = config
+        self._values = {}
+    
+    def load_configuration(self) -> Configuration:
+        return self._config
+    
+    def save_configuration(self, config: Configuration) -> bool:
+        self._config = config
+        return True
+    
+    def get_value(self, key: str, default=None):
+        return self._values.get(key, default)
+    
+    def set_value(self, key: str, value) -> bool:
+        self._values[key] = value
+        return True
+
+
+class CountingLogRepository(ILogRepository):
+    """Log silencioso que só conta avisos e erros"""
+    
+    def __init__(self, verbose: bool = False):
+        self.counts = Counter()
+        self._verbose = verbose
+        self._lock = threading.Lock()
+    
+    def log_info(self, message: str):
+        self._log('info', message)
+    
+    def log_warning(self, message: str):
+        self._log('warning', message)
+    
+    def log_error(self, message: str, exception: Optional[Exception] = None):
+        self._log('error', f"{message} {exception or ''}")
+    
+    def log_debug(self, message: str):
+        pass
+    
+    def _log(self, level: str, message: str):
+        with self._lock:
+            self.counts[level] += 1
+        if self._verbose:
+            print(f"[{level.upper()}] {message}")
+
+
+def nfe_key(sequence: int, cnpj: str = '14200166000187') -> str:
+    """Chave de NFe sintética com dígito verificador módulo 11 válido"""
+    base = f"35{time.strftime('%y%m')}{cnpj}55001{sequence:09d}1{sequence % 10 ** 8:08d}"
+    total = sum(int(digit) * (2 + index % 8) for index, digit in enumerate(reversed(base)))
+    check_digit = 11 - total % 11
+    return base + str(0 if check_digit >= 10 else check_digit)
+
+
+def generate_nfe_folder(folder: Path, count: int, duplicate_ratio: float, padding: int) -> List[Path]:
+    """Criar ``count`` XMLs procNFe; uma fração reenvia chaves anteriores (reexportações)"""
+    folder.mkdir(parents=True, exist_ok=True)
+    duplicates = int(count * duplicate_ratio)
+    files = []
+    for index in range(count):
+        # Reexportação: mesma chave, bytes diferentes (outro nome e espaçamento)
+        sequence = index - count + duplicates + 1 if index >= count - duplicates else index + 1
+        key = nfe_key(sequence)
+        spacing = ' ' * (index % 7)
+        content = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe" versao="4.00">'
+            f'<NFe><infNFe Id="NFe{key}" versao="4.00"><ide><nNF>{sequence}</nNF></ide>'
+            f'<infAdic><infCpl>{"x" * padding}</infCpl></infAdic></infNFe></NFe>{spacing}'
+            f'<protNFe versao="4.00"><infProt><chNFe>{key}</chNFe><cStat>100</cStat></infProt></protNFe>'
+            '</nfeProc>'
+        )
+        path = folder / f"NFe{key}-{index:06d}.xml"
+        path.write_text(content, encoding='utf-8')
+        files.append(path)
+    return files
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentil pelo método nearest-rank"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def build_pipeline(args, config_repository, log_repository, base_url: str, data_folder: Path) -> Dict:
+    """Montar a mesma pilha do DependencyContainer, sem dependências de Qt"""
+    config = config_repository.load_configuration()
+    rate_limiter = TokenBucketRateLimiter(rate_per_second=config.api_rate_limit, burst=config.api_burst)
+    circuit_breaker = CircuitBreaker(
+        failure_threshold=config.circuit_failure_threshold,
+        reset_timeout_seconds=config.circuit_reset_seconds
+    )
+    
+    upload_options = dict(
+        base_url=base_url,
+        pool_size=config.max_workers,
+        rate_limiter=rate_limiter,
+        circuit_breaker=circuit_breaker,
+        upload_compression=config.upload_compression,
+        upload_deadline_seconds=config.upload_deadline_seconds,
+        hedge_uploads=config.hedge_uploads
+    )
+    if config.async_uploads:
+        upload_service = AsyncValidaNFeAPIService(max_in_flight=config.max_in_flight, **upload_options)
+    else:
+        upload_service = ValidaNFeAPIService(**upload_options)
+    if config.upload_batch_size > 1:
+        upload_service = MicroBatchingAPIService(
+            upload_service, max_documents=config.upload_batch_size, window_ms=config.upload_batch_window_ms
+        )
+    api_service = CircuitBreakerAPIService(upload_service, circuit_breaker)
+    
+    schema_options = dict(
+        single_pass=config.single_pass_schema_validation,
+        max_errors=config.schema_max_errors,
+        fail_fast=config.schema_fail_fast
+    )
+    if config.schema_validation_processes > 0:
+        schema_service = ProcessPoolXMLSchemaService(
+            SCHEMAS_FOLDER, processes=config.schema_validation_processes, **schema_options
+        )
+    else:
+        schema_service = XMLSchemaService(SCHEMAS_FOLDER, **schema_options)
+    if args.validate_schema:
+        schema_service.load_schemas()
+    
+    outbox = SQLiteSubmissionOutbox(data_folder / 'outbox.db') if args.outbox else None
+    
+    signature_service = None
+    if config.verify_signatures:
+        try:
+            signature_service = XMLSignatureService()
+        except ImportError as e:
+            print(f"⚠️  {e}")
+    
+    validate_use_case = ValidateNFeUseCase(
+        validation_service=NFEValidationService(),
+        schema_service=schema_service,
+        api_service=api_service,
+        config_repository=config_repository,
+        log_repository=log_repository,
+        outbox=outbox,
+        key_ledger=SQLiteNFEKeyLedger(data_folder / 'nfe_keys.db') if args.ledger else None,
+        result_cache=LRUValidationResultCache() if args.cache else None,
+        signature_service=signature_service
+    )
+    process_use_case = ProcessFileUseCase(
+        validate_nfe_use_case=validate_use_case,
+        archive_service=ArchiveExtractorService(),
+        file_organizer_service=FileOrganizerService(),
+        config_repository=config_repository,
+        log_repository=log_repository,
+        outbox=outbox
+    )
+    
+    # Mesmo dimensionamento de lote por worker usado pelo MainViewModel
+    max_in_flight = getattr(api_service, 'max_in_flight', 0)
+    parallel_service = ParallelProcessingService(
+        process_file_use_case=process_use_case,
+        log_repository=log_repository,
+        max_threads=config.max_workers,
+        batch_size=-(-max_in_flight // config.max_workers) if max_in_flight else 1
+    )
+    return {
+        'api_service': api_service,
+        'parallel_service': parallel_service,
+        'schema_service': schema_service,
+        'circuit_breaker': circuit_breaker,
+        'rate_limiter': rate_limiter
+    }
+
+
+def run_load_test(args) -> Dict:
+    """Processar a pasta sintética e coletar métricas"""
+    work_folder = Path(args.folder) if args.folder else Path(tempfile.mkdtemp(prefix='nfe-load-'))
+    files = generate_nfe_folder(work_folder / 'monitor', args.files, args.duplicates, args.padding)
+    
+    config = Configuration(
+        monitor_folder=str(work_folder / 'monitor'),
+        output_folder=str(work_folder / 'output'),
+        token=args.token,
+        max_workers=args.workers,
+        async_uploads=args.async_uploads,
+        max_in_flight=args.max_in_flight,
+        api_rate_limit=args.rate_limit,
+        api_burst=args.burst,
+        circuit_failure_threshold=args.circuit_threshold,
+        circuit_reset_seconds=args.circuit_reset,
+        upload_compression=args.compression,
+        upload_batch_size=args.batch_size,
+        upload_batch_window_ms=args.batch_window,
+        upload_deadline_seconds=args.deadline,
+        hedge_uploads=args.hedge,
+        schema_validation_processes=args.schema_processes,
+        single_pass_schema_validation=args.single_pass,
+        schema_max_errors=args.max_errors,
+        schema_fail_fast=args.fail_fast,
+        verify_signatures=args.verify_signature
+    )
+    config_repository = MemoryConfigRepository(config)
+    log_repository = CountingLogRepository(verbose=args.verbose)
+    
+    emulator = None if args.url else ValidaGuardaEmulator(settings_from_arguments(args)).start()
+    base_url = args.url or emulator.url
+    
+    results: List[ValidationResult] = []
+    results_lock = threading.Lock()
+    finished = threading.Event()
+    events = Counter()
+    
+    def on_result(result: ValidationResult, thread_id: str):
+        with results_lock:
+            results.append(result)
+            if len(results) >= len(files):
+                finished.set()
+    
+    output = sys.stdout if args.verbose else io.StringIO()
+    with contextlib.redirect_stdout(output):
+        pipeline = build_pipeline(args, config_repository, log_repository, base_url, work_folder / 'data')
+        pipeline['circuit_breaker'].add_listener(lambda state, reason: events.update([f"circuito {state.value}"]))
+        pipeline['rate_limiter'].add_pause_listener(lambda seconds, reason: events.update(["pausa Retry-After"]))
+        parallel_service = pipeline['parallel_service']
+        parallel_service.set_result_callback(on_result)
+        
+        start = time.perf_counter()
+        parallel_service.start_parallel_processing(
+            files,
+            process_archives=False,
+            validate_schema=args.validate_schema,
+            send_to_api=True,
+            organize_output=False
+        )
+        completed = finished.wait(args.max_seconds)
+        elapsed = time.perf_counter() - start
+        
+        parallel_service.stop_all_processing()
+        concurrency = pipeline['api_service'].concurrency_limiter.snapshot()
+        retry_budget = pipeline['api_service'].retry_budget.stats()
+        timeouts = pipeline['api_service'].timeouts.snapshot()
+        pipeline['api_service'].close()
+        pipeline['schema_service'].close()
+    
+    emulator_stats = emulator.stats() if emulator else {}
+    if emulator:
+        emulator.stop()
+    
+    return {
+        'files': len(files),
+        'completed': completed,
+        'elapsed': elapsed,
+        'results': results,
+        'events': events,
+        'log_counts': log_repository.counts,
+        'concurrency': concurrency,
+        'retry_budget': retry_budget,
+        'timeouts': timeouts,
+        'emulator': emulator_stats,
+        'folder': work_folder
+    }
+
+
+def print_report(report: Dict):
+    results = report['results']
+    elapsed = report['elapsed']
+    api_times = [r.api_response.response_time_ms for r in results
+                 if r.api_response and r.api_response.response_time_ms is not None]
+    total_times = [r.processing_time_ms for r in results if r.processing_time_ms is not None]
+    outcomes = Counter(
+        f"HTTP {r.api_response.status_code}" if r.api_response and r.api_response.status_code
+        else (r.api_response.message if r.api_response else r.status.value)
+        for r in results
+    )
+    valid = sum(1 for r in results if r.is_valid)
+    pending = sum(1 for r in results if r.is_pending)
+    
+    print("=" * 70)
+    print("📊 RESULTADO DO TESTE DE CARGA")
+    print("=" * 70)
+    status = "✅" if report['completed'] else "⏰ tempo esgotado -"
+    print(f"{status} {len(results)}/{report['files']} documento(s) em {elapsed:.2f}s")
+    print(f"🚀 Vazão: {len(results) / elapsed if elapsed else 0:.1f} documentos/s")
+    for label, values in [("Envio (API)", api_times), ("Total por documento", total_times)]:
+        print(f"⏱️  {label}: p50 {percentile(values, 0.50):.0f}ms  p90 {percentile(values, 0.90):.0f}ms  "
+              f"p95 {percentile(values, 0.95):.0f}ms  p99 {percentile(values, 0.99):.0f}ms  "
+              f"máx {max(values, default=0):.0f}ms")
+    print(f"📬 Resultados: {dict(outcomes.most_common())}")
+    print(f"🧾 Validação local: {valid} válido(s), {len(results) - valid - pending} inválido(s), "
+          f"{pending} pendente(s) no outbox")
+    
+    emulator = report['emulator']
+    if emulator:
+        print(f"🧪 Emulador: {emulator['requests']} requisição(ões), {emulator['documents']} documento(s), "
+              f"pico de {emulator['max_in_flight']} simultânea(s)")
+        print(f"   Status enviados: {emulator['status_counts']}")
+        print(f"   Falhas injetadas: {emulator['injected'] or 'nenhuma'}")
+        # > 1 indica retries, < 1 indica lotes ou envios evitados (registro local, cache)
+        print(f"   Requisições por documento: {emulator['requests'] / max(1, len(results)):.2f}")
+    
+    concurrency = report['concurrency']
+    print(f"⚙️  Envios simultâneos ao final: {concurrency['limit']} ({concurrency['reason']})")
+    retry_budget = report['retry_budget']
+    print(f"🪫 Orçamento de retries: {retry_budget['granted']} concedido(s), {retry_budget['denied']} negado(s)")
+    timeouts = report['timeouts']
+    print(f"⏳ Timeouts aprendidos: conexão {timeouts['connect_timeout']:.1f}s, leitura {timeouts['read_timeout']:.1f}s "
+          f"({timeouts['samples']} amostra(s))")
+    print(f"🔁 Eventos: {dict(report['events']) or 'nenhum'}")
+    print(f"📝 Log: {dict(report['log_counts'])}")
+    print(f"📁 Pasta de teste: {report['folder']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do pipeline contra o emulador ValidaGuarda")
+    parser.add_argument('--files', type=int, default=500, help="Quantidade de XMLs sintéticos")
+    parser.add_argument('--duplicates', type=float, default=0.05, help="Fração de reexportações (chave repetida)")
+    parser.add_argument('--padding', type=int, default=4000, help="Bytes de conteúdo extra por XML")
+    parser.add_argument('--folder', help="Pasta de trabalho (padrão: temporária)")
+    parser.add_argument('--url', help="Usar um emulador/servidor já em execução em vez de iniciar um")
+    parser.add_argument('--token', default='TOKEN_DE_TESTE_CARGA')
+    parser.add_argument('--workers', type=int, default=10)
+    parser.add_argument('--async-uploads', action='store_true')
+    parser.add_argument('--max-in-flight', type=int, default=200)
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="req/s (0 = sem limite)")
+    parser.add_argument('--burst', type=int, default=10)
+    parser.add_argument('--circuit-threshold', type=int, default=5)
+    parser.add_argument('--circuit-reset', type=int, default=5)
+    parser.add_argument('--compression', default='none', choices=['none', 'gzip', 'deflate'])
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--batch-window', type=int, default=50)
+    parser.add_argument('--deadline', type=int, default=60, help="Prazo de envio por documento (s)")
+    parser.add_argument('--hedge', action='store_true', help="Enviar cópia de requisições mais lentas que o p99")
+    parser.add_argument('--schema-processes', type=int, default=0, help="Validar XSD em N processos (0 = nas threads)")
+    parser.add_argument('--single-pass', action='store_true', help="Validar XSD durante o parsing")
+    parser.add_argument('--max-errors', type=int, default=100, help="Erros de schema detalhados por documento (0 = todos)")
+    parser.add_argument('--fail-fast', action='store_true', help="Detalhar só o primeiro erro de schema")
+    parser.add_argument('--validate-schema', action='store_true', help="Validar contra os XSD")
+    parser.add_argument('--verify-signature', action='store_true',
+                        help="Verificar a assinatura digital (implica --validate-schema)")
+    parser.add_argument('--outbox', action='store_true', help="Registrar envios no outbox SQLite")
+    parser.add_argument('--ledger', action='store_true', help="Usar o registro local de chaves aceitas")
+    parser.add_argument('--cache', action='store_true', help="Usar o cache de resultados por conteúdo")
+    parser.add_argument('--max-seconds', type=float, default=600, help="Tempo máximo de execução")
+    parser.add_argument('--verbose', action='store_true', help="Mostrar a saída dos serviços")
+    add_emulator_arguments(parser)
+    
+    args = parser.parse_args()
+    # A assinatura só é verificada junto com a validação de schema
+    args.validate_schema = args.validate_schema or args.verify_signature
+    print_report(run_load_test(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -40,7 +40,7 @@ class FileProcessingResponse:
     
     @property
     def has_errors(self) -> bool:
-        return not self.success or any(not result.is_valid for result in self.results)
+        return not self.success or any(not (result.is_valid or result.is_pending) for result in self.results)
     
     @property
     def total_files_processed(self) -> int:
@@ -52,7 +52,11 @@ class FileProcessingResponse:
     
     @property
     def failed_validations(self) -> List[ValidationResult]:
-        return [r for r in self.results if not r.is_valid]
+        return [r for r in self.results if not r.is_valid and not r.is_pending]
+    
+    @property
+    def pending_validations(self) -> List[ValidationResult]:
+        return [r for r in self.results if r.is_pending]
 
 
 @dataclass
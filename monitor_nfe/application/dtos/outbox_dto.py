@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass
+class OutboxEntry:
+    """DTO for one API submission recorded in the outbox"""
+    idempotency_key: str
+    content_hash: str
+    file_path: str
+    enqueued_at: datetime
+    nfe_key: Optional[str] = None
+    
+    @property
+    def path(self) -> Path:
+        return Path(self.file_path)
+    
+    @property
+    def filename(self) -> str:
+        return self.path.name
@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import List, Optional
 
+from application.dtos.outbox_dto import OutboxEntry
 from domain.entities.configuration import Configuration
+from domain.entities.validation_result import APIResponse
 
 
 class IConfigurationRepository(ABC):
@@ -49,4 +51,52 @@ class ILogRepository(ABC):
     @abstractmethod
     def log_debug(self, message: str):
         """Log debug message"""
+        pass
+
+
+class ISubmissionOutbox(ABC):
+    """Interface for the durable queue of API submissions"""
+    
+    @abstractmethod
+    def enqueue(self, content_hash: str, file_path: str, nfe_key: Optional[str] = None) -> OutboxEntry:
+        """Record a submission, returning the pending entry for the same content if there is one"""
+        pass
+    
+    @abstractmethod
+    def acknowledge(self, idempotency_key: str, response: APIResponse):
+        """Record the API's definitive answer for a submission"""
+        pass
+    
+    @abstractmethod
+    def pending(self) -> List[OutboxEntry]:
+        """Get submissions not acknowledged yet, oldest first"""
+        pass
+    
+    @abstractmethod
+    def relocate(self, old_path: str, new_path: str) -> int:
+        """Point pending submissions of a moved file at its new path, return how many were updated"""
+        pass
+    
+    @abstractmethod
+    def close(self):
+        """Close the underlying storage"""
+        pass
+
+
+class INFEKeyLedger(ABC):
+    """Interface for the persistent set of NFe keys already accepted by the API"""
+    
+    @abstractmethod
+    def contains(self, nfe_key: str) -> bool:
+        """Check if the API already accepted this NFe key"""
+        pass
+    
+    @abstractmethod
+    def record(self, nfe_key: str, status_code: int):
+        """Remember an NFe key the API accepted (200) or reported as existing (409)"""
+        pass
+    
+    @abstractmethod
+    def close(self):
+        """Close the underlying storage"""
         pass
\ No newline at end of file
@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Callable
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Callable
 from pathlib import Path
 
+from domain.entities.document_context import DocumentContext
 from domain.entities.nfe_document import NFEDocument
 from domain.entities.validation_result import ValidationResult, APIResponse
 from domain.value_objects.api_token import APIToken
@@ -44,7 +46,8 @@ class IAPIService(ABC):
     """Interface for external API communication"""
     
     @abstractmethod
-    def validate_nfe(self, document: NFEDocument, token: APIToken) -> APIResponse:
+    def validate_nfe(self, document: NFEDocument, token: APIToken,
+                     idempotency_key: Optional[str] = None) -> APIResponse:
         """Send NFe document to external API for validation"""
         pass
     
@@ -53,14 +56,43 @@ class IAPIService(ABC):
         """Test API connectivity and token validity"""
         pass
 
+    def submit(self, document: NFEDocument, token: APIToken,
+               idempotency_key: Optional[str] = None) -> Future:
+        """Send NFe document and return a future for the APIResponse (runs inline by default)"""
+        future = Future()
+        try:
+            future.set_result(self.validate_nfe(document, token, idempotency_key))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    def validate_batch(self, documents: List[NFEDocument], token: APIToken,
+                       idempotency_keys: Optional[List[Optional[str]]] = None) -> List[APIResponse]:
+        """Send several NFe documents, returning one APIResponse per document in input order
+        
+        The default pipelines single uploads through ``submit``; services whose API accepts
+        several documents in one request override it.
+        """
+        keys = idempotency_keys or [None] * len(documents)
+        futures = [self.submit(document, token, key) for document, key in zip(documents, keys)]
+        return [future.result() for future in futures]
+    
+    def warm_up(self, connections: Optional[int] = None) -> int:
+        """Open connections ahead of the first request, return how many were opened"""
+        return 0
+
+    def close(self):
+        """Release any pooled connections held by the service"""
+        pass
+
 
 class IFileOrganizerService(ABC):
     """Interface for file organization operations"""
     
     @abstractmethod
     def organize_processed_file(self, file_path: Path, validation_result: ValidationResult, 
-                              output_folder: Path) -> bool:
-        """Move processed file to appropriate folder based on validation result"""
+                              output_folder: Path) -> Optional[Path]:
+        """Move processed file to appropriate folder based on validation result, return its new path"""
         pass
     
     @abstractmethod
@@ -82,10 +114,38 @@ class IXMLSchemaService(ABC):
         """Validate XML document against loaded schemas"""
         pass
     
+    @abstractmethod
+    def parse_document(self, context: DocumentContext) -> Optional[Any]:
+        """Parse the context's bytes once, keeping the tree (or the error) in the context"""
+        pass
+    
     @abstractmethod
     def has_schemas_loaded(self) -> bool:
         """Check if schemas are loaded and ready"""
         pass
+    
+    @abstractmethod
+    def schema_fingerprint(self) -> str:
+        """Get a digest identifying the loaded schema set"""
+        pass
+    
+    def close(self):
+        """Release worker processes or other resources held by the service"""
+        pass
+
+
+class IXMLSignatureService(ABC):
+    """Interface for XML digital signature verification"""
+    
+    @abstractmethod
+    def verify_signature(self, document: NFEDocument) -> ValidationResult:
+        """Verify the document's XML-DSig signatures"""
+        pass
+    
+    @abstractmethod
+    def certificate_cache_stats(self) -> Dict:
+        """Get certificate cache statistics (hits, misses, size, max_entries, hit_ratio)"""
+        pass
 
 
 class IParallelProcessingService(ABC):
@@ -96,4 +156,23 @@ class IParallelProcessingService(ABC):
                                  processor_func: Callable[[NFEDocument], ValidationResult],
                                  max_workers: Optional[int] = None) -> List[ValidationResult]:
         """Process multiple files in parallel"""
+        pass
+
+
+class IValidationResultCache(ABC):
+    """Interface for the content-addressed cache of validation results"""
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[ValidationResult]:
+        """Get the result cached for a key, or None"""
+        pass
+    
+    @abstractmethod
+    def put(self, key: str, result: ValidationResult):
+        """Cache a final validation result"""
+        pass
+    
+    @abstractmethod
+    def stats(self) -> Dict:
+        """Get cache statistics (hits, misses, size, max_entries, hit_ratio)"""
         pass
\ No newline at end of file
@@ -0,0 +1,159 @@
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+import hashlib
+
+from ..dtos.outbox_dto import OutboxEntry
+from ..interfaces.repositories import IConfigurationRepository, ILogRepository, INFEKeyLedger, ISubmissionOutbox
+from ..interfaces.services import IAPIService
+from .process_file_use_case import ProcessFileUseCase
+from domain.entities.nfe_document import NFEDocument
+from domain.entities.validation_result import APIResponse, ValidationResult
+from domain.value_objects.api_token import APIToken
+
+
+@dataclass
+class DrainOutboxUseCaseResponse:
+    """Response from outbox drain use case"""
+    pending: int = 0
+    acknowledged: int = 0
+    missing: int = 0
+    still_pending: int = 0
+    # Held documents finished (result reported and file organized) after their answer came
+    completed: int = 0
+
+
+class DrainOutboxUseCase:
+    """Use case for resending submissions left pending in the outbox (at-least-once)
+    
+    Documents held while the API was down are finished once their answer comes: the
+    result goes to the result callback and the file leaves the pending folder.
+    """
+    
+    def __init__(
+        self,
+        outbox: ISubmissionOutbox,
+        api_service: IAPIService,
+        config_repository: IConfigurationRepository,
+        log_repository: ILogRepository,
+        key_ledger: Optional[INFEKeyLedger] = None,
+        process_file_use_case: Optional[ProcessFileUseCase] = None
+    ):
+        self._outbox = outbox
+        self._api_service = api_service
+        self._config_repository = config_repository
+        self._log_repository = log_repository
+        self._key_ledger = key_ledger
+        self._process_file_use_case = process_file_use_case
+        self._result_callback: Optional[Callable[[ValidationResult], None]] = None
+    
+    def set_result_callback(self, callback: Callable[[ValidationResult], None]):
+        """Set callback function called with the final result of each held document"""
+        self._result_callback = callback
+    
+    def execute(self) -> DrainOutboxUseCaseResponse:
+        """Send every pending submission again with its original idempotency key"""
+        entries = self._outbox.pending()
+        response = DrainOutboxUseCaseResponse(pending=len(entries))
+        if not entries:
+            return response
+        
+        config = self._config_repository.load_configuration()
+        api_token = APIToken.from_string(config.token)
+        if not api_token:
+            self._log_repository.log_warning("Token da API não configurado - envios pendentes mantidos no outbox")
+            response.still_pending = len(entries)
+            return response
+        
+        self._log_repository.log_info(f"Reenviando {len(entries)} envio(s) pendente(s) do outbox")
+        
+        # The pool only runs first attempts; retries wait in the API service's scheduler
+        with ThreadPoolExecutor(max_workers=max(1, config.max_workers), thread_name_prefix="NFE-Outbox") as executor:
+            outcome_futures = dict(zip(executor.map(lambda entry: self._submit(entry, api_token), entries), entries))
+        
+        # Held documents are finished here, on the drain thread, as their answers come in
+        for outcome_future in as_completed(outcome_futures):
+            outcome, api_response = outcome_future.result()
+            if outcome == 'acknowledged':
+                response.acknowledged += 1
+                if self._complete_held_document(outcome_futures[outcome_future], api_response):
+                    response.completed += 1
+            elif outcome == 'missing':
+                response.missing += 1
+                response.still_pending += 1
+            else:
+                response.still_pending += 1
+        
+        self._log_repository.log_info(
+            f"Outbox: {response.acknowledged} enviado(s), {response.still_pending} ainda pendente(s)"
+        )
+        if response.missing:
+            self._log_repository.log_warning(
+                f"Outbox: {response.missing} envio(s) pendente(s) sem arquivo correspondente - mantido(s) no outbox"
+            )
+        return response
+    
+    def _submit(self, entry: OutboxEntry, api_token: APIToken) -> Future:
+        """Resend one submission, return a future for ('acknowledged', 'missing' or 'pending', APIResponse or None)"""
+        outcome = Future()
+        try:
+            # Without the queued bytes there is nothing to send; the entry stays pending
+            # (never acknowledged) so the submission is not lost silently
+            if self._content_hash(entry) != entry.content_hash:
+                self._log_repository.log_warning(
+                    f"Envio pendente sem arquivo correspondente (removido ou alterado): {entry.file_path}"
+                )
+                outcome.set_result(('missing', None))
+                return outcome
+            
+            document = NFEDocument(file_path=entry.path, nfe_key=entry.nfe_key)
+            self._api_service.submit(document, api_token, entry.idempotency_key).add_done_callback(
+                lambda response_future: outcome.set_result(self._settle(entry, response_future))
+            )
+        
+        except Exception as e:
+            self._log_repository.log_error(f"Erro ao reenviar {entry.filename} do outbox", e)
+            outcome.set_result(('pending', None))
+        
+        return outcome
+    
+    def _settle(self, entry: OutboxEntry, response_future: Future) -> Tuple[str, Optional[APIResponse]]:
+        """Acknowledge a definitive answer, return ('acknowledged' or 'pending', the answer)"""
+        try:
+            api_response = response_future.result()
+            if not api_response.is_definitive:
+                return 'pending', api_response
+            
+            self._outbox.acknowledge(entry.idempotency_key, api_response)
+            if self._key_ledger is not None and entry.nfe_key and api_response.status_code in (200, 409):
+                self._key_ledger.record(entry.nfe_key, api_response.status_code)
+            return 'acknowledged', api_response
+        
+        except Exception as e:
+            self._log_repository.log_error(f"Erro ao reenviar {entry.filename} do outbox", e)
+            return 'pending', None
+    
+    def _complete_held_document(self, entry: OutboxEntry, api_response: APIResponse) -> bool:
+        """Finish a document held in the pending folder, return True when it was one"""
+        if self._process_file_use_case is None:
+            return False
+        
+        try:
+            result = self._process_file_use_case.complete_pending_submission(entry.path, api_response)
+            if result is None:
+                return False
+            
+            if self._result_callback:
+                self._result_callback(result)
+            return True
+        
+        except Exception as e:
+            self._log_repository.log_error(f"Erro ao concluir envio pendente: {entry.filename}", e)
+            return False
+    
+    def _content_hash(self, entry: OutboxEntry) -> Optional[str]:
+        """SHA-256 of the file bytes, None when the file is gone"""
+        try:
+            return hashlib.sha256(entry.path.read_bytes()).hexdigest()
+        except OSError:
+            return None
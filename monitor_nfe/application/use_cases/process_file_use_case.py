@@ -1,15 +1,17 @@
-from dataclasses import dataclass
+from concurrent.futures import Future, as_completed
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 import time
 import threading
 
-from ..interfaces.repositories import IConfigurationRepository, ILogRepository
+from ..interfaces.repositories import IConfigurationRepository, ILogRepository, ISubmissionOutbox
 from ..interfaces.services import IArchiveService, IFileOrganizerService
 from ..dtos.file_processing_dto import FileProcessingRequest, FileProcessingResponse
 from domain.entities.nfe_document import NFEDocument
-from domain.entities.validation_result import ValidationResult
+from domain.entities.validation_result import APIResponse, ValidationResult
+from domain.value_objects.file_snapshot import FileSnapshot
 from .validate_nfe_use_case import ValidateNFeUseCase, ValidateNFeUseCaseRequest
 
 
@@ -23,6 +25,19 @@ class ProcessFileUseCaseRequest:
     organize_output: bool = True
 
 
+@dataclass
+class _ProcessingJob:
+    """Bookkeeping for one request while its XML validations are in flight"""
+    request: ProcessFileUseCaseRequest
+    processing_request: FileProcessingRequest
+    start_time: float
+    xml_files: List[Path] = field(default_factory=list)
+    # Metadata taken while finding the files, reused by their documents instead of a new stat
+    snapshots: Dict[Path, FileSnapshot] = field(default_factory=dict)
+    results: Dict[int, ValidationResult] = field(default_factory=dict)
+    error: Optional[Exception] = None
+
+
 class ProcessFileUseCase:
     """Use case for processing files (XML or archives containing XML)"""
     
@@ -32,13 +47,15 @@ class ProcessFileUseCase:
         archive_service: IArchiveService,
         file_organizer_service: IFileOrganizerService,
         config_repository: IConfigurationRepository,
-        log_repository: ILogRepository
+        log_repository: ILogRepository,
+        outbox: Optional[ISubmissionOutbox] = None
     ):
         self._validate_nfe_use_case = validate_nfe_use_case
         self._archive_service = archive_service
         self._file_organizer_service = file_organizer_service
         self._config_repository = config_repository
         self._log_repository = log_repository
+        self._outbox = outbox
         self._result_callback = None
         self._active_processing_files = set()  # Track files currently being processed
         self._temp_files_lock = threading.RLock()  # Lock para proteger _temp_xml_files
@@ -65,27 +82,150 @@ class ProcessFileUseCase:
     
     def execute(self, request: ProcessFileUseCaseRequest) -> FileProcessingResponse:
         """Execute file processing"""
-        start_time = time.time()
+        return self.execute_many([request])[0]
+    
+    def execute_many(self, requests: List[ProcessFileUseCaseRequest]) -> List[FileProcessingResponse]:
+        """Process several files, overlapping their API uploads
+        
+        Every XML is validated locally and submitted before waiting on any upload, so an
+        asynchronous API service keeps many uploads in flight from a single caller thread.
+        """
+        jobs = []
+        pending: Dict[Future, Tuple[_ProcessingJob, int, Path]] = {}
+        
+        for request in requests:
+            job = _ProcessingJob(
+                request=request,
+                processing_request=FileProcessingRequest(
+                    file_path=request.file_path,
+                    process_archives=request.process_archives,
+                    validate_schema=request.validate_schema,
+                    send_to_api=request.send_to_api,
+                    organize_output=request.organize_output
+                ),
+                start_time=time.time()
+            )
+            jobs.append(job)
+            
+            try:
+                self._log_repository.log_info(f"Iniciando processamento: {request.file_path.name}")
+                
+                # Get list of XML files to process
+                job.xml_files = self._get_xml_files_to_process(job.processing_request, job.snapshots)
+                
+                # Submit each XML file - synchronous services complete right away
+                for index, xml_file in enumerate(job.xml_files):
+                    future = self._submit_validation(xml_file, request, job.snapshots.get(xml_file))
+                    if future is None:
+                        continue
+                    
+                    if future.done():
+                        self._complete_validation(job, index, xml_file, future)
+                    else:
+                        pending[future] = (job, index, xml_file)
+                        
+            except Exception as e:
+                job.error = e
+        
+        # Handle uploads still in flight as they complete
+        for future in as_completed(pending):
+            job, index, xml_file = pending[future]
+            try:
+                self._complete_validation(job, index, xml_file, future)
+            except Exception as e:
+                job.error = e
+        
+        return [self._finish_job(job) for job in jobs]
+    
+    def complete_pending_submission(self, file_path: Path, api_response: APIResponse) -> Optional[ValidationResult]:
+        """Finish a document held while the API was down, once the outbox drain got its answer
         
-        # Create processing request DTO
-        processing_request = FileProcessingRequest(
-            file_path=request.file_path,
-            process_archives=request.process_archives,
-            validate_schema=request.validate_schema,
-            send_to_api=request.send_to_api,
-            organize_output=request.organize_output
-        )
+        Only files in the output's pending folder are finished: the final result is built
+        and the file organized like any other. Returns None for files that were not held.
+        """
+        config = self._config_repository.load_configuration()
+        if not config.output_path or file_path.parent != Path(config.output_path) / "pending":
+            return None
         
+        validate_request = ValidateNFeUseCaseRequest(document=NFEDocument(file_path=file_path))
+        response = self._validate_nfe_use_case.complete_pending(validate_request, api_response)
+        validation_result = response.validation_result
+        self._organize_processed_file(file_path, validation_result)
+        return validation_result
+    
+    def _submit_validation(self, xml_file: Path, request: ProcessFileUseCaseRequest,
+                           snapshot: Optional[FileSnapshot] = None) -> Optional[Future]:
+        """Start validation of one XML file, returning None if the file vanished"""
+        # Mark file as actively being processed
+        self._active_processing_files.add(str(xml_file))
+        
+        try:
+            # One stat for the whole pipeline - every stage reads the document's snapshot
+            nfe_document = NFEDocument(file_path=xml_file, snapshot=snapshot)
+            
+            # Debug: Check if file exists before processing
+            if not nfe_document.exists():
+                self._log_repository.log_error(f"❌ Arquivo não existe no momento da validação: {xml_file}")
+                self._log_repository.log_error(f"   Caminho: {xml_file.absolute()}")
+                # Log additional debugging info
+                parent_dir = xml_file.parent
+                if parent_dir.exists():
+                    remaining_files = list(parent_dir.glob("*.xml"))
+                    self._log_repository.log_error(f"   Arquivos XML restantes no diretório: {[f.name for f in remaining_files]}")
+                else:
+                    self._log_repository.log_error(f"   Diretório pai não existe: {parent_dir}")
+                self._active_processing_files.discard(str(xml_file))
+                return None
+            
+            self._log_repository.log_debug(f"✓ Iniciando validação: {xml_file.name} (tamanho: {nfe_document.file_size} bytes)")
+            
+            validate_request = ValidateNFeUseCaseRequest(
+                document=nfe_document,
+                validate_schema=request.validate_schema,
+                send_to_api=request.send_to_api
+            )
+            
+            return self._validate_nfe_use_case.submit(validate_request)
+            
+        except Exception:
+            self._active_processing_files.discard(str(xml_file))
+            raise
+    
+    def _complete_validation(self, job: '_ProcessingJob', index: int, xml_file: Path, future: Future):
+        """Record a finished validation, notify the callback and organize the file"""
         try:
-            self._log_repository.log_info(f"Iniciando processamento: {request.file_path.name}")
+            validation_result = future.result().validation_result
+            job.results[index] = validation_result
+            
+            # Call callback immediately if available (for real-time UI updates)
+            if self._result_callback:
+                self._result_callback(validation_result)
             
-            # Get list of XML files to process
-            xml_files = self._get_xml_files_to_process(processing_request)
+            # Held uploads are resent by the outbox drain - archive members must outlive the cleanup
+            if validation_result.is_pending:
+                self._remove_from_temp_list(xml_file)
+            
+            # Organize file if requested (held uploads wait in the pending folder)
+            if job.request.organize_output:
+                self._organize_processed_file(xml_file, validation_result)
+                
+        finally:
+            # Mark file as no longer being processed
+            self._active_processing_files.discard(str(xml_file))
+    
+    def _finish_job(self, job: '_ProcessingJob') -> FileProcessingResponse:
+        """Organize archives, clean up and build the response for one request"""
+        request = job.request
+        processing_request = job.processing_request
+        
+        try:
+            if job.error is not None:
+                raise job.error
             
-            if not xml_files:
+            if not job.xml_files:
                 # No XML files found
                 end_time = time.time()
-                processing_time_ms = (end_time - start_time) * 1000
+                processing_time_ms = (end_time - job.start_time) * 1000
                 
                 self._log_repository.log_warning(f"Nenhum arquivo XML encontrado para processar: {request.file_path.name}")
                 
@@ -106,58 +246,11 @@ class ProcessFileUseCase:
                     error_message="Nenhum arquivo XML encontrado"
                 )
             
-            # Process each XML file
-            validation_results = []
-            
-            for xml_file in xml_files:
-                try:
-                    # Mark file as actively being processed
-                    self._active_processing_files.add(str(xml_file))
-                    
-                    # Debug: Check if file exists before processing
-                    if not xml_file.exists():
-                        self._log_repository.log_error(f"❌ Arquivo não existe no momento da validação: {xml_file}")
-                        self._log_repository.log_error(f"   Caminho: {xml_file.absolute()}")
-                        # Log additional debugging info
-                        parent_dir = xml_file.parent
-                        if parent_dir.exists():
-                            remaining_files = list(parent_dir.glob("*.xml"))
-                            self._log_repository.log_error(f"   Arquivos XML restantes no diretório: {[f.name for f in remaining_files]}")
-                        else:
-                            self._log_repository.log_error(f"   Diretório pai não existe: {parent_dir}")
-                        continue
-                    
-                    self._log_repository.log_debug(f"✓ Iniciando validação: {xml_file.name} (tamanho: {xml_file.stat().st_size} bytes)")
-                    
-                    nfe_document = NFEDocument(file_path=xml_file)
-                    
-                    validate_request = ValidateNFeUseCaseRequest(
-                        document=nfe_document,
-                        validate_schema=request.validate_schema,
-                        send_to_api=request.send_to_api
-                    )
-                    
-                    validate_response = self._validate_nfe_use_case.execute(validate_request)
-                    validation_results.append(validate_response.validation_result)
-                    
-                    # Call callback immediately if available (for real-time UI updates)
-                    if self._result_callback:
-                        self._result_callback(validate_response.validation_result)
-                    
-                    # Organize file if requested
-                    if request.organize_output:
-                        self._organize_processed_file(xml_file, validate_response.validation_result)
-                        
-                finally:
-                    # Mark file as no longer being processed
-                    self._active_processing_files.discard(str(xml_file))
+            validation_results = [job.results[index] for index in sorted(job.results)]
             
             # Calculate total processing time
             end_time = time.time()
-            processing_time_ms = (end_time - start_time) * 1000
-            
-            # Check overall success
-            success = all(result.is_valid for result in validation_results)
+            processing_time_ms = (end_time - job.start_time) * 1000
             
             self._log_repository.log_info(
                 f"Processamento concluído: {request.file_path.name} - "
@@ -187,7 +280,7 @@ class ProcessFileUseCase:
             
         except Exception as e:
             end_time = time.time()
-            processing_time_ms = (end_time - start_time) * 1000
+            processing_time_ms = (end_time - job.start_time) * 1000
             
             self._log_repository.log_error(f"Erro durante processamento: {request.file_path.name}", e)
             
@@ -203,15 +296,19 @@ class ProcessFileUseCase:
                 error_message=str(e)
             )
     
-    def _get_xml_files_to_process(self, request: FileProcessingRequest) -> List[Path]:
-        """Get list of XML files to process from file or archive"""
+    def _get_xml_files_to_process(self, request: FileProcessingRequest,
+                                  snapshots: Optional[Dict[Path, FileSnapshot]] = None) -> List[Path]:
+        """Get list of XML files to process from file or archive (single files' snapshots go to ``snapshots``)"""
         xml_files = []
         
         try:
             if request.is_xml:
                 # Single XML file
-                if request.file_path.exists():
+                snapshot = FileSnapshot.capture(request.file_path)
+                if snapshot.exists:
                     xml_files.append(request.file_path)
+                    if snapshots is not None:
+                        snapshots[request.file_path] = snapshot
                     self._log_repository.log_debug(f"Arquivo XML encontrado: {request.filename}")
                 
             elif request.is_archive and request.process_archives:
@@ -300,12 +397,13 @@ class ProcessFileUseCase:
             config = self._config_repository.load_configuration()
             
             if config.output_path and config.auto_organize:
-                success = self._file_organizer_service.organize_processed_file(
+                target_path = self._file_organizer_service.organize_processed_file(
                     file_path, validation_result, config.output_path
                 )
                 
-                if success:
+                if target_path:
                     self._log_repository.log_debug(f"Arquivo organizado: {file_path.name}")
+                    self._relocate_pending_submission(file_path, target_path)
                     
                     # IMPORTANTE: Remover arquivo da lista de temporários após movimentação bem-sucedida
                     self._remove_from_temp_list(file_path)
@@ -315,6 +413,16 @@ class ProcessFileUseCase:
         except Exception as e:
             self._log_repository.log_error(f"Erro ao organizar arquivo: {file_path.name}", e)
     
+    def _relocate_pending_submission(self, file_path: Path, target_path: Path):
+        """Point a pending outbox submission at the organized file so the drain can still send it"""
+        if self._outbox is None:
+            return
+        
+        try:
+            self._outbox.relocate(str(file_path), str(target_path))
+        except Exception as e:
+            self._log_repository.log_warning(f"Falha ao atualizar caminho no outbox: {file_path.name} ({e})")
+    
     def _remove_from_temp_list(self, file_path: Path):
         """Remove arquivo da lista de arquivos temporários após ser movido"""
         try:
@@ -409,10 +517,11 @@ class ProcessFileUseCase:
             
             total_files = len(validation_results)
             successful_files = len([r for r in validation_results if r.is_valid])
+            pending_files = len([r for r in validation_results if r.is_pending])
             
             self._log_repository.log_info(
                 f"📦 ZIP processado: {archive_path.name} → processed/ "
-                f"(✅ {successful_files}/{total_files} XMLs sucessos)"
+                f"(✅ {successful_files}/{total_files} XMLs sucessos, ⏸️ {pending_files} pendente(s))"
             )
             
             return True
@@ -460,7 +569,8 @@ class ProcessFileUseCase:
             # Simple summary content
             from datetime import datetime
             successful = len([r for r in validation_results if r.is_valid])
-            failed = len(validation_results) - successful
+            pending = len([r for r in validation_results if r.is_pending])
+            failed = len(validation_results) - successful - pending
             
             lines = [
                 f"RESUMO DE PROCESSAMENTO - {archive_path.name}",
@@ -472,10 +582,12 @@ class ProcessFileUseCase:
                 f"- Total XMLs: {len(validation_results)}",
                 f"- Sucessos: {successful}",
                 f"- Falhas: {failed}",
+                f"- Pendentes (API indisponível): {pending}",
                 "",
                 f"OBSERVAÇÃO:",
                 f"- XMLs com sucesso foram organizados em suas respectivas pastas",
                 f"- XMLs com erro foram movidos para pasta de erros",
+                f"- XMLs pendentes aguardam em 'pending/' e são organizados quando a API responder",
                 f"- ZIP sempre é movido para 'processed/' independente dos resultados",
                 "",
                 f"DETALHES POR ARQUIVO:",
@@ -485,7 +597,7 @@ class ProcessFileUseCase:
             # Add simple file list
             for i, result in enumerate(validation_results, 1):
                 filename = result.document_path.split('/')[-1] if '/' in result.document_path else result.document_path
-                status = "✅ SUCESSO" if result.is_valid else "❌ FALHA"
+                status = "✅ SUCESSO" if result.is_valid else "⏸️ PENDENTE" if result.is_pending else "❌ FALHA"
                 lines.append(f"{i:2d}. {status} - {filename}")
             
             # Write summary
@@ -1,12 +1,16 @@
+from concurrent.futures import Future
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
+import hashlib
 import time
 
-from ..interfaces.repositories import IConfigurationRepository, ILogRepository
-from ..interfaces.services import IAPIService, IXMLSchemaService
+from ..dtos.outbox_dto import OutboxEntry
+from ..interfaces.repositories import IConfigurationRepository, ILogRepository, INFEKeyLedger, ISubmissionOutbox
+from ..interfaces.services import IAPIService, IValidationResultCache, IXMLSchemaService, IXMLSignatureService
+from domain.entities.document_context import DocumentContext
 from domain.entities.nfe_document import NFEDocument
-from domain.entities.validation_result import ValidationResult, ValidationStatus, ValidationType
+from domain.entities.validation_result import ValidationResult, ValidationStatus, ValidationType, APIResponse
 from domain.services.nfe_validation_service import INFEValidationService
 from domain.value_objects.api_token import APIToken
 
@@ -36,117 +40,345 @@ class ValidateNFeUseCase:
         schema_service: IXMLSchemaService,
         api_service: IAPIService,
         config_repository: IConfigurationRepository,
-        log_repository: ILogRepository
+        log_repository: ILogRepository,
+        outbox: Optional[ISubmissionOutbox] = None,
+        key_ledger: Optional[INFEKeyLedger] = None,
+        result_cache: Optional[IValidationResultCache] = None,
+        signature_service: Optional[IXMLSignatureService] = None
     ):
         self._validation_service = validation_service
         self._schema_service = schema_service
         self._api_service = api_service
         self._config_repository = config_repository
         self._log_repository = log_repository
+        self._outbox = outbox
+        self._key_ledger = key_ledger
+        self._result_cache = result_cache
+        self._signature_service = signature_service
     
     def execute(self, request: ValidateNFeUseCaseRequest) -> ValidateNFeUseCaseResponse:
         """Execute NFe validation"""
+        return self.submit(request).result()
+    
+    def submit(self, request: ValidateNFeUseCaseRequest) -> Future:
+        """Run local validation on the calling thread and return a future for the response
+        
+        The future completes once the API answers, so callers can keep validating other
+        documents while uploads are in flight on an asynchronous API service.
+        """
         start_time = time.time()
+        future = Future()
         
         try:
-            # Create initial validation result
-            result = ValidationResult(
-                document_path=str(request.document.file_path),
-                status=ValidationStatus.SUCCESS
-            )
+            # Read once: hashing, every validation step and the upload share these bytes
+            self._load_context(request.document)
+            content_hash = self._content_hash(request.document)
+            cache_key = self._cache_key(request, content_hash)
             
-            self._log_repository.log_info(f"Iniciando validação: {request.document.filename}")
+            # Identical bytes already went through the pipeline: reuse the outcome
+            cached_result = self._get_cached_result(request, cache_key)
+            if cached_result is not None:
+                future.set_result(self._finish(request, cached_result, start_time))
+                return future
             
-            # Step 1: Basic structure validation
-            structure_result = self._validation_service.validate_structure(request.document)
-            result.errors.extend(structure_result.errors)
-            result.nfe_key = structure_result.nfe_key
+            result = self._validate_locally(request)
+            request.document.context.release_tree()
+            api_token = self._get_api_token(request, result)
             
-            if structure_result.has_errors:
-                result.status = ValidationStatus.FAILED
-                self._log_repository.log_warning(f"Falha na validação estrutural: {request.document.filename}")
+            if api_token is None:
+                # A skipped upload (e.g. no token configured) is only final when none was requested
+                final_key = None if request.send_to_api else cache_key
+                future.set_result(self._finish(request, result, start_time, final_key))
+                return future
             
-            # Step 2: Detect document type
-            document_type = self._validation_service.detect_document_type(request.document)
-            request.document.document_type = document_type
+            # Keys the API already accepted are answered locally, without an upload
+            if self._is_already_accepted(result):
+                self._log_repository.log_info(f"NFe já enviada anteriormente (registro local): {request.document.filename}")
+                self._apply_api_response(result, self._duplicate_response())
+                future.set_result(self._finish(request, result, start_time, cache_key))
+                return future
             
-            # Step 3: Schema validation (if requested and structure is valid)
-            if request.validate_schema and not structure_result.has_errors:
-                if self._schema_service.has_schemas_loaded():
-                    schema_result = self._schema_service.validate_against_schema(request.document)
-                    result.errors.extend(schema_result.errors)
-                    result.schema_valid = schema_result.status == ValidationStatus.SUCCESS
-                    
-                    if schema_result.has_errors:
-                        result.status = ValidationStatus.FAILED
-                        self._log_repository.log_warning(f"Falha na validação de schema: {request.document.filename}")
-                else:
-                    self._log_repository.log_warning("Schemas XSD não carregados - pulando validação de schema")
+            # Record the upload before sending so a crash leaves it pending in the outbox
+            entry = self._enqueue_submission(request.document, result, content_hash)
             
-            # Step 4: API validation (if requested and no critical errors)
-            if request.send_to_api and result.status != ValidationStatus.ERROR:
-                config = self._config_repository.load_configuration()
-                
-                if config.token:
-                    try:
-                        api_token = APIToken.from_string(config.token)
-                        if api_token:
-                            api_response = self._api_service.validate_nfe(request.document, api_token)
-                            
-                            result.add_api_response(
-                                success=api_response.success,
-                                message=api_response.message,
-                                data=api_response.data,
-                                status_code=api_response.status_code,
-                                response_time_ms=api_response.response_time_ms
-                            )
-                            
-                            if api_response.is_error:
-                                self._log_repository.log_error(f"Erro na API: {api_response.message}")
-                        else:
-                            self._log_repository.log_error("Token de API inválido")
-                    except ValueError as e:
-                        self._log_repository.log_error(f"Erro no token da API: {e}")
-                else:
-                    self._log_repository.log_warning("Token da API não configurado")
+            def on_api_response(api_future: Future):
+                try:
+                    api_response = api_future.result()
+                    self._acknowledge_submission(entry, api_response)
+                    self._record_accepted_key(result.nfe_key, api_response)
+                    self._apply_api_response(result, api_response)
+                    future.set_result(self._finish(request, result, start_time, cache_key))
+                except Exception as e:
+                    future.set_result(self._error_response(request, e, start_time))
             
-            # Calculate processing time
-            end_time = time.time()
-            processing_time_ms = (end_time - start_time) * 1000
-            result.processing_time_ms = processing_time_ms
-            
-            # Log final result
-            if result.is_valid:
-                self._log_repository.log_info(f"Validação concluída com sucesso: {request.document.filename}")
-            else:
-                self._log_repository.log_warning(f"Validação falhou: {request.document.filename} - {result.error_count} erro(s)")
-            
-            return ValidateNFeUseCaseResponse(
-                validation_result=result,
-                processing_time_ms=processing_time_ms,
-                success=True
-            )
+            self._api_service.submit(
+                request.document, api_token, entry.idempotency_key if entry else None
+            ).add_done_callback(on_api_response)
             
         except Exception as e:
-            # Handle unexpected errors
-            end_time = time.time()
-            processing_time_ms = (end_time - start_time) * 1000
+            future.set_result(self._error_response(request, e, start_time))
+        
+        return future
+    
+    def complete_pending(self, request: ValidateNFeUseCaseRequest,
+                         api_response: APIResponse) -> ValidateNFeUseCaseResponse:
+        """Build the final response of a held upload once the outbox drain got the API's answer
+        
+        Local validation runs again on the held file; the drain already acknowledged the
+        submission and recorded the key, so only the answer is applied here.
+        """
+        start_time = time.time()
+        
+        try:
+            self._load_context(request.document)
+            cache_key = self._cache_key(request, self._content_hash(request.document))
             
-            self._log_repository.log_error(f"Erro inesperado durante validação: {request.document.filename}", e)
+            result = self._validate_locally(request)
+            request.document.context.release_tree()
+            self._apply_api_response(result, api_response)
+            return self._finish(request, result, start_time, cache_key)
             
-            error_result = ValidationResult(
-                document_path=str(request.document.file_path),
-                status=ValidationStatus.ERROR,
-                processing_time_ms=processing_time_ms
-            )
-            error_result.add_error(
-                ValidationType.STRUCTURE,
-                "Erro inesperado durante validação",
-                str(e)
-            )
+        except Exception as e:
+            return self._error_response(request, e, start_time)
+    
+    def _validate_locally(self, request: ValidateNFeUseCaseRequest) -> ValidationResult:
+        """Run structure, schema and signature validation steps"""
+        # Create initial validation result
+        result = ValidationResult(
+            document_path=str(request.document.file_path),
+            status=ValidationStatus.SUCCESS
+        )
+        
+        self._log_repository.log_info(f"Iniciando validação: {request.document.filename}")
+        
+        # Step 1: Basic structure validation
+        structure_result = self._validation_service.validate_structure(request.document)
+        result.extend_errors(structure_result.errors)
+        result.nfe_key = structure_result.nfe_key
+        
+        if structure_result.has_errors:
+            result.status = ValidationStatus.FAILED
+            self._log_repository.log_warning(f"Falha na validação estrutural: {request.document.filename}")
+        
+        # Step 2: Detect document type
+        document_type = self._validation_service.detect_document_type(request.document)
+        request.document.document_type = document_type
+        
+        # Step 3: Schema validation (if requested and structure is valid)
+        if request.validate_schema and not structure_result.has_errors:
+            if self._schema_service.has_schemas_loaded():
+                schema_result = self._schema_service.validate_against_schema(request.document)
+                result.extend_errors(schema_result.errors)
+                result.schema_valid = schema_result.status == ValidationStatus.SUCCESS
+                
+                if schema_result.has_errors:
+                    result.status = ValidationStatus.FAILED
+                    self._log_repository.log_warning(f"Falha na validação de schema: {request.document.filename}")
+            else:
+                self._log_repository.log_warning("Schemas XSD não carregados - pulando validação de schema")
+        
+        # Step 4: Digital signature verification (on the tree the schema step parsed), part of
+        # the local validation the request opted into - skipped along with the schema step
+        if (request.validate_schema and self._signature_service is not None
+                and not structure_result.has_errors):
+            signature_result = self._signature_service.verify_signature(request.document)
+            result.extend_errors(signature_result.errors)
+            result.signature_valid = signature_result.signature_valid
             
-            return ValidateNFeUseCaseResponse(
-                validation_result=error_result,
-                processing_time_ms=processing_time_ms,
-                success=False
-            )
\ No newline at end of file
+            if signature_result.has_errors:
+                result.status = ValidationStatus.FAILED
+                self._log_repository.log_warning(f"Falha na verificação da assinatura: {request.document.filename}")
+        
+        return result
+    
+    def _get_api_token(self, request: ValidateNFeUseCaseRequest,
+                       result: ValidationResult) -> Optional[APIToken]:
+        """Get API token when the document should be sent to the API"""
+        # Step 5: API validation (if requested and no critical errors)
+        if not request.send_to_api or result.status == ValidationStatus.ERROR:
+            return None
+        
+        config = self._config_repository.load_configuration()
+        
+        if not config.token:
+            self._log_repository.log_warning("Token da API não configurado")
+            return None
+        
+        try:
+            api_token = APIToken.from_string(config.token)
+            if not api_token:
+                self._log_repository.log_error("Token de API inválido")
+            return api_token
+        except ValueError as e:
+            self._log_repository.log_error(f"Erro no token da API: {e}")
+            return None
+    
+    def _content_hash(self, document: NFEDocument) -> Optional[str]:
+        """SHA-256 of the file bytes, None when the file cannot be read"""
+        if self._outbox is None and self._result_cache is None:
+            return None
+        
+        try:
+            return hashlib.sha256(document.read_bytes()).hexdigest()
+        except OSError:
+            return None
+    
+    def _load_context(self, document: NFEDocument) -> DocumentContext:
+        """Read the document once, parsing it on demand with the schema service's parser"""
+        context = document.get_context()
+        context.parser = self._schema_service.parse_document
+        return context
+    
+    def _cache_key(self, request: ValidateNFeUseCaseRequest, content_hash: Optional[str]) -> Optional[str]:
+        """Cache key from the file bytes, the loaded schema set and the requested steps"""
+        if self._result_cache is None or content_hash is None:
+            return None
+        
+        return (f"{content_hash}:{self._schema_service.schema_fingerprint()}:"
+                f"{int(request.validate_schema)}{int(request.send_to_api)}")
+    
+    def _get_cached_result(self, request: ValidateNFeUseCaseRequest,
+                           cache_key: Optional[str]) -> Optional[ValidationResult]:
+        """Get a copy of the cached outcome, re-targeted to this document"""
+        if cache_key is None:
+            return None
+        
+        result = self._result_cache.get(cache_key)
+        if result is None:
+            return None
+        
+        result.document_path = str(request.document.file_path)
+        result.validated_at = datetime.now()
+        self._log_repository.log_info(f"Resultado reaproveitado do cache (mesmo conteúdo): {request.document.filename}")
+        return result
+    
+    def _cache_result(self, cache_key: Optional[str], result: ValidationResult):
+        """Cache outcomes that depend only on the file bytes"""
+        if cache_key is None or result.status == ValidationStatus.ERROR:
+            return
+        
+        # Transient API failures and configuration errors (token, endpoint) must be retried
+        api_response = result.api_response
+        if api_response is not None and (
+            not api_response.is_definitive or api_response.status_code in (401, 403, 404)
+        ):
+            return
+        
+        self._result_cache.put(cache_key, result)
+    
+    def _enqueue_submission(self, document: NFEDocument, result: ValidationResult,
+                            content_hash: Optional[str]) -> Optional[OutboxEntry]:
+        """Record the upload in the outbox, keyed by the SHA-256 of the file bytes"""
+        if self._outbox is None or content_hash is None:
+            return None
+        
+        try:
+            return self._outbox.enqueue(content_hash, str(document.file_path), result.nfe_key)
+        except Exception as e:
+            self._log_repository.log_warning(f"Não foi possível registrar o envio no outbox: {e}")
+            return None
+    
+    def _acknowledge_submission(self, entry: Optional[OutboxEntry], api_response: APIResponse):
+        """Mark the submission as done once the API gave a definitive answer"""
+        if entry is None or not api_response.is_definitive:
+            return
+        
+        try:
+            self._outbox.acknowledge(entry.idempotency_key, api_response)
+        except Exception as e:
+            self._log_repository.log_warning(f"Não foi possível confirmar o envio no outbox: {e}")
+    
+    def _is_already_accepted(self, result: ValidationResult) -> bool:
+        """Check the local ledger for the document's NFe key"""
+        if self._key_ledger is None or not result.nfe_key:
+            return False
+        
+        try:
+            return self._key_ledger.contains(result.nfe_key)
+        except Exception as e:
+            self._log_repository.log_warning(f"Não foi possível consultar o registro de chaves: {e}")
+            return False
+    
+    def _duplicate_response(self) -> APIResponse:
+        """Response equivalent to the API's 409 for a key found in the ledger"""
+        return APIResponse(
+            success=True,
+            message="NFe já foi enviada anteriormente (registro local)",
+            data={"source": "ledger"},
+            status_code=409,
+            response_time_ms=0.0
+        )
+    
+    def _record_accepted_key(self, nfe_key: Optional[str], api_response: APIResponse):
+        """Remember keys the API accepted (200) or already had (409)"""
+        if self._key_ledger is None or not nfe_key or api_response.status_code not in (200, 409):
+            return
+        
+        try:
+            self._key_ledger.record(nfe_key, api_response.status_code)
+        except Exception as e:
+            self._log_repository.log_warning(f"Não foi possível registrar a chave da NFe: {e}")
+    
+    def _apply_api_response(self, result: ValidationResult, api_response: APIResponse):
+        """Record API response on the validation result"""
+        result.add_api_response(
+            success=api_response.success,
+            message=api_response.message,
+            data=api_response.data,
+            status_code=api_response.status_code,
+            response_time_ms=api_response.response_time_ms
+        )
+        
+        if api_response.is_pending:
+            self._log_repository.log_info(f"Envio retido no outbox até a API voltar: {result.document_path}")
+        elif api_response.is_error:
+            self._log_repository.log_error(f"Erro na API: {api_response.message}")
+    
+    def _finish(self, request: ValidateNFeUseCaseRequest, result: ValidationResult,
+                start_time: float, cache_key: Optional[str] = None) -> ValidateNFeUseCaseResponse:
+        """Stamp processing time, log the outcome and build the response"""
+        self._cache_result(cache_key, result)
+        
+        # Calculate processing time
+        end_time = time.time()
+        processing_time_ms = (end_time - start_time) * 1000
+        result.processing_time_ms = processing_time_ms
+        
+        # Log final result
+        if result.is_valid:
+            self._log_repository.log_info(f"Validação concluída com sucesso: {request.document.filename}")
+        elif result.is_pending:
+            self._log_repository.log_info(f"Validação aguardando resposta da API: {request.document.filename}")
+        else:
+            self._log_repository.log_warning(f"Validação falhou: {request.document.filename} - {result.error_count} erro(s)")
+        
+        return ValidateNFeUseCaseResponse(
+            validation_result=result,
+            processing_time_ms=processing_time_ms,
+            success=True
+        )
+    
+    def _error_response(self, request: ValidateNFeUseCaseRequest, error: Exception,
+                        start_time: float) -> ValidateNFeUseCaseResponse:
+        """Build the response for unexpected errors"""
+        end_time = time.time()
+        processing_time_ms = (end_time - start_time) * 1000
+        
+        self._log_repository.log_error(f"Erro inesperado durante validação: {request.document.filename}", error)
+        
+        error_result = ValidationResult(
+            document_path=str(request.document.file_path),
+            status=ValidationStatus.ERROR,
+            processing_time_ms=processing_time_ms
+        )
+        error_result.add_error(
+            ValidationType.STRUCTURE,
+            "Erro inesperado durante validação",
+            str(error)
+        )
+        
+        return ValidateNFeUseCaseResponse(
+            validation_result=error_result,
+            processing_time_ms=processing_time_ms,
+            success=False
+        )
\ No newline at end of file
@@ -8,16 +8,27 @@ from domain.services.nfe_validation_service import NFEValidationService
 from application.interfaces.repositories import IConfigurationRepository, ILogRepository
 from application.interfaces.services import (
     IFileMonitorService, IArchiveService, IAPIService, 
-    IFileOrganizerService, IXMLSchemaService
+    IFileOrganizerService, IXMLSchemaService, IXMLSignatureService
 )
 from application.use_cases.validate_nfe_use_case import ValidateNFeUseCase
 from application.use_cases.process_file_use_case import ProcessFileUseCase
+from application.use_cases.drain_outbox_use_case import DrainOutboxUseCase
 
 # Infrastructure
 from infrastructure.data_access.qsettings_config_repository import QSettingsConfigRepository
 from infrastructure.data_access.console_log_repository import ConsoleLogRepository
+from infrastructure.data_access.sqlite_nfe_key_ledger import SQLiteNFEKeyLedger
+from infrastructure.data_access.sqlite_submission_outbox import SQLiteSubmissionOutbox
 from infrastructure.external_services.validanfe_api_service import ValidaNFeAPIService
+from infrastructure.external_services.async_validanfe_api_service import AsyncValidaNFeAPIService
+from infrastructure.external_services.circuit_breaker_api_service import CircuitBreakerAPIService
+from infrastructure.external_services.micro_batching_api_service import MicroBatchingAPIService
+from infrastructure.external_services.process_pool_schema_service import ProcessPoolXMLSchemaService
 from infrastructure.external_services.xml_schema_service import XMLSchemaService
+from infrastructure.external_services.xml_signature_service import XMLSignatureService
+from infrastructure.services.circuit_breaker import CircuitBreaker
+from infrastructure.services.token_bucket_rate_limiter import TokenBucketRateLimiter
+from infrastructure.services.validation_result_cache import LRUValidationResultCache
 from infrastructure.file_system.watchdog_monitor_service import WatchdogMonitorService
 from infrastructure.file_system.archive_extractor_service import ArchiveExtractorService
 from infrastructure.file_system.file_organizer_service import FileOrganizerService
@@ -29,13 +40,14 @@ from presentation.viewmodels.main_view_model import MainViewModel
 class DependencyContainer:
     """Dependency injection container for the application"""
     
-    def __init__(self, schemas_folder: Optional[Path] = None):
+    def __init__(self, schemas_folder: Optional[Path] = None, data_folder: Optional[Path] = None):
         self._services: Dict[str, Any] = {}
         self._singletons: Dict[str, Any] = {}
         self._factories: Dict[str, Callable] = {}
         
         # Store configuration
         self._schemas_folder = schemas_folder
+        self._data_folder = data_folder or Path.home() / '.monitor_nfe'
         
         # Register all services
         self._register_services()
@@ -46,19 +58,28 @@ class DependencyContainer:
         # === Repositories ===
         self._register_singleton('config_repository', lambda: QSettingsConfigRepository())
         self._register_singleton('log_repository', lambda: ConsoleLogRepository())
+        self._register_singleton(
+            'submission_outbox',
+            lambda: SQLiteSubmissionOutbox(self._data_folder / 'outbox.db')
+        )
+        self._register_singleton(
+            'nfe_key_ledger',
+            lambda: SQLiteNFEKeyLedger(self._data_folder / 'nfe_keys.db')
+        )
         
         # === Domain Services ===
         self._register_singleton('nfe_validation_service', lambda: NFEValidationService())
         
         # === Infrastructure Services ===
-        self._register_singleton('api_service', lambda: ValidaNFeAPIService())
+        self._register_singleton('rate_limiter', self._create_rate_limiter)
+        self._register_singleton('circuit_breaker', self._create_circuit_breaker)
+        self._register_singleton('validation_result_cache', lambda: LRUValidationResultCache())
+        self._register_singleton('api_service', self._create_api_service)
         self._register_singleton('file_monitor_service', lambda: WatchdogMonitorService())
         self._register_singleton('archive_service', lambda: ArchiveExtractorService())
         self._register_singleton('file_organizer_service', lambda: FileOrganizerService())
-        self._register_singleton(
-            'xml_schema_service', 
-            lambda: XMLSchemaService(self._schemas_folder)
-        )
+        self._register_singleton('xml_schema_service', self._create_xml_schema_service)
+        self._register_singleton('xml_signature_service', self._create_xml_signature_service)
         
         # === Use Cases ===
         self._register_factory(
@@ -68,7 +89,23 @@ class DependencyContainer:
                 schema_service=self.get('xml_schema_service'),
                 api_service=self.get('api_service'),
                 config_repository=self.get('config_repository'),
-                log_repository=self.get('log_repository')
+                log_repository=self.get('log_repository'),
+                outbox=self.get('submission_outbox'),
+                key_ledger=self.get('nfe_key_ledger'),
+                result_cache=self.get('validation_result_cache'),
+                signature_service=self.get('xml_signature_service')
+            )
+        )
+        
+        self._register_factory(
+            'drain_outbox_use_case',
+            lambda: DrainOutboxUseCase(
+                outbox=self.get('submission_outbox'),
+                api_service=self.get('api_service'),
+                config_repository=self.get('config_repository'),
+                log_repository=self.get('log_repository'),
+                key_ledger=self.get('nfe_key_ledger'),
+                process_file_use_case=self.get('process_file_use_case')
             )
         )
         
@@ -79,7 +116,8 @@ class DependencyContainer:
                 archive_service=self.get('archive_service'),
                 file_organizer_service=self.get('file_organizer_service'),
                 config_repository=self.get('config_repository'),
-                log_repository=self.get('log_repository')
+                log_repository=self.get('log_repository'),
+                outbox=self.get('submission_outbox')
             )
         )
         
@@ -90,8 +128,92 @@ class DependencyContainer:
                 config_repository=self.get('config_repository'),
                 file_monitor_service=self.get('file_monitor_service'),
                 process_file_use_case=self.get('process_file_use_case'),
-                log_repository=self.get('log_repository')
+                log_repository=self.get('log_repository'),
+                api_service=self.get('api_service'),
+                drain_outbox_use_case=self.get('drain_outbox_use_case'),
+                result_cache=self.get('validation_result_cache')
+            )
+        )
+    
+    def _create_api_service(self) -> IAPIService:
+        """Create the API service selected in configuration, guarded by the circuit breaker"""
+        config = self.get('config_repository').load_configuration()
+        
+        upload_service = self._create_upload_service(config)
+        if config.upload_batch_size > 1:
+            upload_service = MicroBatchingAPIService(
+                upload_service,
+                max_documents=config.upload_batch_size,
+                window_ms=config.upload_batch_window_ms
             )
+        
+        return CircuitBreakerAPIService(upload_service, self.get('circuit_breaker'))
+    
+    def _create_upload_service(self, config) -> ValidaNFeAPIService:
+        """Create the sync or async upload service"""
+        if config.async_uploads:
+            try:
+                return AsyncValidaNFeAPIService(
+                    max_in_flight=config.max_in_flight,
+                    pool_size=config.max_workers,
+                    rate_limiter=self.get('rate_limiter'),
+                    circuit_breaker=self.get('circuit_breaker'),
+                    upload_compression=config.upload_compression,
+                    upload_deadline_seconds=config.upload_deadline_seconds,
+                    hedge_uploads=config.hedge_uploads
+                )
+            except ImportError as e:
+                print(f"⚠️  {e} - usando uploads síncronos")
+        
+        return ValidaNFeAPIService(
+            pool_size=config.max_workers,
+            rate_limiter=self.get('rate_limiter'),
+            circuit_breaker=self.get('circuit_breaker'),
+            upload_compression=config.upload_compression,
+            upload_deadline_seconds=config.upload_deadline_seconds,
+            hedge_uploads=config.hedge_uploads
+        )
+    
+    def _create_xml_schema_service(self) -> XMLSchemaService:
+        """Create the XSD validator, on worker processes when configured"""
+        config = self.get('config_repository').load_configuration()
+        options = dict(
+            single_pass=config.single_pass_schema_validation,
+            max_errors=config.schema_max_errors,
+            fail_fast=config.schema_fail_fast
+        )
+        if config.schema_validation_processes > 0:
+            return ProcessPoolXMLSchemaService(
+                self._schemas_folder, processes=config.schema_validation_processes, **options
+            )
+        return XMLSchemaService(self._schemas_folder, **options)
+    
+    def _create_xml_signature_service(self) -> Optional[IXMLSignatureService]:
+        """Create the XML-DSig verifier, None when disabled or cryptography is missing"""
+        config = self.get('config_repository').load_configuration()
+        if not config.verify_signatures:
+            return None
+        
+        try:
+            return XMLSignatureService()
+        except ImportError as e:
+            print(f"⚠️  {e}")
+            return None
+    
+    def _create_circuit_breaker(self) -> CircuitBreaker:
+        """Create the circuit breaker shared by the API service and its decorator"""
+        config = self.get('config_repository').load_configuration()
+        return CircuitBreaker(
+            failure_threshold=config.circuit_failure_threshold,
+            reset_timeout_seconds=config.circuit_reset_seconds
+        )
+    
+    def _create_rate_limiter(self) -> TokenBucketRateLimiter:
+        """Create the token bucket shared by every request sent to the API"""
+        config = self.get('config_repository').load_configuration()
+        return TokenBucketRateLimiter(
+            rate_per_second=config.api_rate_limit,
+            burst=config.api_burst
         )
     
     def _register_singleton(self, name: str, factory: Callable):
@@ -151,6 +273,26 @@ class DependencyContainer:
             if file_monitor:
                 file_monitor.stop_monitoring()
             
+            # Close pooled API connections
+            api_service = self._singletons.get('api_service')
+            if api_service:
+                api_service.close()
+            
+            # Stop XSD validation worker processes
+            schema_service = self._singletons.get('xml_schema_service')
+            if schema_service:
+                schema_service.close()
+            
+            # Flush and close the submission outbox
+            outbox = self._singletons.get('submission_outbox')
+            if outbox:
+                outbox.close()
+            
+            # Close the accepted NFe key ledger
+            key_ledger = self._singletons.get('nfe_key_ledger')
+            if key_ledger:
+                key_ledger.close()
+            
             # Clear all singletons
             self._singletons.clear()
             
@@ -0,0 +1,30 @@
+import sys
+from typing import Dict, Hashable, TypeVar
+
+T = TypeVar('T', bound=Hashable)
+
+# dataclass(slots=True) needs Python 3.10 - older interpreters keep the per-instance __dict__
+SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# Upper bound of the shared table, so unbounded distinct values can't grow it forever
+MAX_INTERNED = 4096
+
+_interned: Dict[Hashable, Hashable] = {}
+
+
+def intern_value(value: T) -> T:
+    """Return the shared instance of an equal value (messages, status codes)
+    
+    Thousands of results repeat the same few error messages and HTTP status codes; keeping
+    one instance of each means every retained result points at it instead of its own copy.
+    Once the table is full, unseen values are returned as they are.
+    """
+    if value is None:
+        return value
+    shared = _interned.get(value)
+    if shared is not None:
+        # Equal values of another type (200 and 200.0) are never swapped
+        return shared if type(shared) is type(value) else value
+    if len(_interned) < MAX_INTERNED:
+        _interned[value] = value
+    return value
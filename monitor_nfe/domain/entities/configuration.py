@@ -11,6 +11,23 @@ class Configuration:
     token: Optional[str] = None
     auto_organize: bool = True
     log_level: str = "INFO"
+    max_workers: int = 10
+    async_uploads: bool = False
+    max_in_flight: int = 200
+    api_rate_limit: float = 0.0
+    api_burst: int = 10
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: int = 30
+    upload_compression: str = "none"
+    upload_batch_size: int = 1
+    upload_batch_window_ms: int = 50
+    upload_deadline_seconds: int = 60
+    hedge_uploads: bool = False
+    schema_validation_processes: int = 0
+    single_pass_schema_validation: bool = False
+    schema_max_errors: int = 100
+    schema_fail_fast: bool = False
+    verify_signatures: bool = False
     
     @property
     def monitor_path(self) -> Optional[Path]:
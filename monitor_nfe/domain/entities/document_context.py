@@ -0,0 +1,91 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from .nfe_document import NFEType
+from ..value_objects.nfe_header import NFEHeader
+from ..value_objects.xml_encoding import FALLBACK_ENCODING, XMLEncoding
+
+
+@dataclass
+class DocumentContext:
+    """Contents of one XML document, read once and shared by every validation stage
+    
+    Holds the raw bytes, the encoding sniffed from the BOM or the XML declaration, the
+    parsed tree, the header read from the first elements, the detected document type
+    and the NFe key. The tree is built on first
+    use by ``parser`` (set by the schema service), so structure checks, schema validation
+    and the upload never read or parse the file again. Checks run on ``markup`` (bytes);
+    the whole file is only decoded if a stage asks for ``text``.
+    """
+    raw_bytes: Optional[bytes] = None
+    read_error: Optional[str] = None
+    encoding: Optional[XMLEncoding] = None
+    root: Any = None
+    parse_error: Optional[str] = None
+    document_type: Optional[NFEType] = None
+    nfe_key: Optional[str] = None
+    header: Optional[NFEHeader] = None
+    parser: Optional[Callable[['DocumentContext'], Any]] = field(default=None, repr=False)
+    _text: Optional[str] = field(default=None, init=False, repr=False)
+    _markup: Optional[bytes] = field(default=None, init=False, repr=False)
+    _verified: bool = field(default=False, init=False, repr=False)
+    
+    @classmethod
+    def load(cls, file_path: Path) -> 'DocumentContext':
+        """Read the file bytes in a single read"""
+        try:
+            raw_bytes = file_path.read_bytes()
+            return cls(raw_bytes=raw_bytes, encoding=XMLEncoding.sniff(raw_bytes))
+        except OSError as e:
+            return cls(read_error=str(e))
+    
+    @property
+    def markup(self) -> Optional[bytes]:
+        """Document bytes without the BOM, in an ASCII-compatible encoding for byte-level checks
+        
+        Only UTF-16/32 documents are transcoded (to UTF-8); anything else is the bytes as read.
+        """
+        if self.raw_bytes is None:
+            return None
+        if self.encoding.is_ascii_compatible and not self.encoding.bom_length:
+            return self.raw_bytes
+        
+        if self._markup is None:
+            if self.encoding.is_ascii_compatible:
+                self._markup = self.raw_bytes[self.encoding.bom_length:]
+            else:
+                self._markup = self.text.encode('utf-8')
+        return self._markup
+    
+    @property
+    def text(self) -> Optional[str]:
+        """Whole document decoded in its verified encoding (decoded on first use only)"""
+        if self._text is None and self.raw_bytes is not None:
+            encoding = self.verified_encoding()
+            self._text = self.raw_bytes[encoding.bom_length:].decode(encoding.name)
+        return self._text
+    
+    def verified_encoding(self) -> Optional[XMLEncoding]:
+        """Sniffed encoding once the bytes are checked against it, Latin-1 when they don't decode"""
+        if not self._verified and self.encoding is not None:
+            self._verified = True
+            if not self.encoding.verify(self.raw_bytes):
+                self.encoding = XMLEncoding(FALLBACK_ENCODING, self.encoding.bom_length, 'fallback')
+        return self.encoding
+    
+    @property
+    def is_parsed(self) -> bool:
+        """Check if the document was already parsed (successfully or not)"""
+        return self.root is not None or self.parse_error is not None
+    
+    def parse(self) -> Any:
+        """Parsed tree, built on first use with ``parser`` (None on syntax errors or without a parser)"""
+        if not self.is_parsed and self.parser is not None:
+            self.parser(self)
+        return self.root
+    
+    def release_tree(self):
+        """Drop the parsed tree once validation is done - the bytes stay for the upload"""
+        self.root = None
+        self.parser = None
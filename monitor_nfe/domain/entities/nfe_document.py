@@ -1,9 +1,15 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 from pathlib import Path
 from enum import Enum
 
+from .compact import SLOTS
+from ..value_objects.file_snapshot import FileSnapshot
+
+if TYPE_CHECKING:
+    from .document_context import DocumentContext
+
 
 class NFEType(Enum):
     NFE = "nfe"
@@ -19,26 +25,34 @@ class ProcessingStatus(Enum):
     SKIPPED = "skipped"
 
 
-@dataclass
+@dataclass(**SLOTS)
 class NFEDocument:
-    """Entity representing an NFe document"""
+    """Entity representing an NFe document
+    
+    The file is stat'ed once, when the document is created, and ``exists``, ``file_size``
+    and ``modified_at`` come from that snapshot for the rest of the pipeline. ``refresh``
+    is the explicit revalidation point for stages that need the file's current state.
+    """
     file_path: Path
     nfe_key: Optional[str] = None
     document_type: NFEType = NFEType.UNKNOWN
     file_size: int = 0
     created_at: Optional[datetime] = None
     modified_at: Optional[datetime] = None
+    # Contents read and parsed once, shared by every validation stage and the upload
+    context: Optional['DocumentContext'] = field(default=None, repr=False, compare=False)
+    # Metadata taken once (a single stat), shared by every stage
+    snapshot: Optional[FileSnapshot] = field(default=None, repr=False, compare=False)
     
     def __post_init__(self):
         if self.created_at is None:
             self.created_at = datetime.now()
         if self.modified_at is None:
             self.modified_at = self.created_at
-            
-        if self.file_path.exists():
-            stat = self.file_path.stat()
-            self.file_size = stat.st_size
-            self.modified_at = datetime.fromtimestamp(stat.st_mtime)
+        
+        if self.snapshot is None:
+            self.snapshot = FileSnapshot.capture(self.file_path)
+        self._apply_snapshot()
     
     @property
     def filename(self) -> str:
@@ -57,4 +71,39 @@ class NFEDocument:
         return self.extension in ['.zip', '.rar', '.7z']
     
     def exists(self) -> bool:
-        return self.file_path.exists()
\ No newline at end of file
+        """Check if the file existed at the last snapshot (no file system access)"""
+        return self.snapshot.exists
+    
+    def refresh(self) -> bool:
+        """Stat the file again, return True if it changed (size, mtime or inode) since the last snapshot"""
+        snapshot = FileSnapshot.capture(self.file_path)
+        changed = snapshot != self.snapshot
+        self.snapshot = snapshot
+        self._apply_snapshot()
+        return changed
+    
+    def get_context(self) -> 'DocumentContext':
+        """Get the shared document context, reading the file on first use"""
+        if self.context is None:
+            from .document_context import DocumentContext
+            self.context = DocumentContext.load(self.file_path)
+            
+            # Bytes that disagree with the snapshot mean the file changed after it was taken
+            raw_bytes = self.context.raw_bytes
+            read_size = len(raw_bytes) if raw_bytes is not None else None
+            snapshot_size = self.snapshot.size if self.snapshot.exists else None
+            if read_size != snapshot_size:
+                self.refresh()
+        return self.context
+    
+    def read_bytes(self) -> bytes:
+        """File bytes, from the document context when it was already read"""
+        if self.context is not None and self.context.raw_bytes is not None:
+            return self.context.raw_bytes
+        return self.file_path.read_bytes()
+    
+    def _apply_snapshot(self):
+        """Copy size and modification time from the snapshot"""
+        if self.snapshot.exists:
+            self.file_size = self.snapshot.size
+            self.modified_at = self.snapshot.modified_at
\ No newline at end of file
@@ -5,6 +5,8 @@ from pathlib import Path
 from enum import Enum
 import uuid
 
+from .compact import SLOTS
+
 
 class ProcessingState(Enum):
     PENDING = "pending"
@@ -16,7 +18,7 @@ class ProcessingState(Enum):
     ERROR = "error"
 
 
-@dataclass
+@dataclass(**SLOTS)
 class FileProcessingState:
     """Represents the processing state of an individual file"""
     file_path: Path
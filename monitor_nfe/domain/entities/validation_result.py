@@ -1,8 +1,10 @@
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable
 from enum import Enum
 
+from .compact import SLOTS, intern_value
+
 
 class ValidationStatus(Enum):
     SUCCESS = "success"
@@ -18,7 +20,11 @@ class ValidationType(Enum):
     STRUCTURE = "structure"
 
 
-@dataclass
+# Position of each type in a result's per-type error counts
+_TYPE_INDEX = {error_type: index for index, error_type in enumerate(ValidationType)}
+
+
+@dataclass(**SLOTS)
 class ValidationError:
     """Represents a validation error"""
     error_type: ValidationType
@@ -26,6 +32,10 @@ class ValidationError:
     details: Optional[str] = None
     line_number: Optional[int] = None
     
+    def __post_init__(self):
+        # The same few messages repeat across thousands of results
+        self.message = intern_value(self.message)
+    
     def __str__(self) -> str:
         base = f"[{self.error_type.value.upper()}] {self.message}"
         if self.line_number:
@@ -35,7 +45,7 @@ class ValidationError:
         return base
 
 
-@dataclass
+@dataclass(**SLOTS)
 class APIResponse:
     """Represents API response data"""
     success: bool
@@ -44,52 +54,169 @@ class APIResponse:
     status_code: Optional[int] = None
     response_time_ms: Optional[float] = None
     
+    def __post_init__(self):
+        self.message = intern_value(self.message)
+        self.status_code = intern_value(self.status_code)
+    
     @property
     def is_error(self) -> bool:
         return not self.success or (self.status_code and self.status_code >= 400)
+    
+    @property
+    def is_definitive(self) -> bool:
+        """True when the API processed the request and resending would not change the answer"""
+        return self.status_code is not None and self.status_code < 500 and self.status_code != 429
+    
+    @property
+    def is_pending(self) -> bool:
+        """True when the upload was held (API unavailable) and will be resent from the outbox"""
+        return bool(self.data and self.data.get('pending'))
+
+
+class ErrorList(list):
+    """List of validation errors that keeps a count per error type however it is changed
+    
+    Appends, the usual change, bump one counter; any other change recounts the list.
+    """
+    __slots__ = ('_counts',)
+    
+    def __init__(self, errors: Iterable[ValidationError] = ()):
+        super().__init__(errors)
+        self._recount()
+    
+    def count_of(self, error_type: ValidationType) -> int:
+        """Number of errors of one type, without scanning the list"""
+        return self._counts[_TYPE_INDEX[error_type]]
+    
+    def append(self, error: ValidationError):
+        super().append(error)
+        self._counts[_TYPE_INDEX[error.error_type]] += 1
+    
+    def extend(self, errors: Iterable[ValidationError]):
+        for error in (list(errors) if errors is self else errors):
+            self.append(error)
+    
+    def insert(self, index: int, error: ValidationError):
+        super().insert(index, error)
+        self._counts[_TYPE_INDEX[error.error_type]] += 1
+    
+    def __iadd__(self, errors: Iterable[ValidationError]) -> 'ErrorList':
+        self.extend(errors)
+        return self
+    
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._recount()
+    
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._recount()
+    
+    def __imul__(self, times: int) -> 'ErrorList':
+        super().__imul__(times)
+        self._recount()
+        return self
+    
+    def pop(self, index: int = -1) -> ValidationError:
+        error = super().pop(index)
+        self._recount()
+        return error
+    
+    def remove(self, error: ValidationError):
+        super().remove(error)
+        self._recount()
+    
+    def clear(self):
+        super().clear()
+        self._recount()
+    
+    def __reduce__(self):
+        # Copies and pickles are rebuilt through __init__, which counts the errors again
+        return type(self), (list(self),)
+    
+    def _recount(self):
+        counts = [0] * len(_TYPE_INDEX)
+        for error in self:
+            counts[_TYPE_INDEX[error.error_type]] += 1
+        self._counts = counts
 
 
-@dataclass
+@dataclass(**SLOTS)
 class ValidationResult:
-    """Entity representing the result of NFe validation"""
+    """Entity representing the result of NFe validation
+    
+    Sessions keep every result, so the result is slotted and holds no error list until
+    the first error is added (or ``errors`` is read). ``errors`` is an ErrorList, counted
+    per type as it changes, so checks like ``is_valid`` or ``schema_errors`` never scan it.
+    """
     document_path: str
     status: ValidationStatus
     validated_at: datetime = field(default_factory=datetime.now)
-    errors: List[ValidationError] = field(default_factory=list)
     api_response: Optional[APIResponse] = None
     schema_valid: bool = False
     signature_valid: bool = False
     processing_time_ms: Optional[float] = None
     nfe_key: Optional[str] = None
+    _errors: Optional[ErrorList] = field(default=None, init=False, repr=False)
+    
+    @property
+    def errors(self) -> List[ValidationError]:
+        """Errors in the order they were added (a list - appending to it keeps the counts right)"""
+        if self._errors is None:
+            self._errors = ErrorList()
+        return self._errors
+    
+    @errors.setter
+    def errors(self, errors: Iterable[ValidationError]):
+        self._errors = ErrorList(errors)
     
     @property
     def is_valid(self) -> bool:
-        return self.status == ValidationStatus.SUCCESS and len(self.errors) == 0
+        return self.status == ValidationStatus.SUCCESS and not self._errors and not self.is_pending
+    
+    @property
+    def is_pending(self) -> bool:
+        """True while the API answer is still to come (the upload waits in the outbox)"""
+        return self.api_response is not None and self.api_response.is_pending
     
     @property
     def has_errors(self) -> bool:
-        return len(self.errors) > 0
+        return bool(self._errors)
     
     @property
     def error_count(self) -> int:
-        return len(self.errors)
+        return len(self._errors) if self._errors else 0
     
     @property
     def schema_errors(self) -> List[ValidationError]:
-        return [e for e in self.errors if e.error_type == ValidationType.SCHEMA]
+        return self.errors_of(ValidationType.SCHEMA)
     
     @property
     def api_errors(self) -> List[ValidationError]:
-        return [e for e in self.errors if e.error_type == ValidationType.API]
+        return self.errors_of(ValidationType.API)
+    
+    def count_errors(self, error_type: ValidationType) -> int:
+        """Number of errors of one type, without scanning the errors"""
+        return self._errors.count_of(error_type) if self._errors else 0
+    
+    def errors_of(self, error_type: ValidationType) -> List[ValidationError]:
+        """Errors of one type, in the order they were added"""
+        if not self.count_errors(error_type):
+            return []
+        return [e for e in self._errors if e.error_type == error_type]
     
     def add_error(self, error_type: ValidationType, message: str, 
                   details: Optional[str] = None, line_number: Optional[int] = None):
         """Add a validation error"""
-        error = ValidationError(error_type, message, details, line_number)
-        self.errors.append(error)
+        self._append_error(ValidationError(error_type, message, details, line_number))
         if self.status == ValidationStatus.SUCCESS:
             self.status = ValidationStatus.FAILED
     
+    def extend_errors(self, errors: Iterable[ValidationError]):
+        """Add errors reported by another validation step (the status is left to the caller)"""
+        for error in errors:
+            self._append_error(error)
+    
     def add_api_response(self, success: bool, message: str, 
                         data: Optional[Dict[str, Any]] = None,
                         status_code: Optional[int] = None,
@@ -103,7 +230,8 @@ class ValidationResult:
             response_time_ms=response_time_ms
         )
         
-        if not success and self.status == ValidationStatus.SUCCESS:
+        # A held upload has no answer yet - not an API error
+        if not success and not self.api_response.is_pending and self.status == ValidationStatus.SUCCESS:
             self.status = ValidationStatus.FAILED
             self.add_error(ValidationType.API, message)
     
@@ -111,11 +239,21 @@ class ValidationResult:
         """Get a human-readable summary of the validation result"""
         if self.is_valid:
             return f"✅ Validação bem-sucedida para {self.document_path}"
+        if self.is_pending and not self._errors:
+            return f"⏸️ Envio pendente para {self.document_path}"
         
         error_summary = f"❌ {self.error_count} erro(s) encontrado(s)"
-        if self.schema_errors:
-            error_summary += f" | Schema: {len(self.schema_errors)}"
-        if self.api_errors:
-            error_summary += f" | API: {len(self.api_errors)}"
+        schema_count = self.count_errors(ValidationType.SCHEMA)
+        if schema_count:
+            error_summary += f" | Schema: {schema_count}"
+        api_count = self.count_errors(ValidationType.API)
+        if api_count:
+            error_summary += f" | API: {api_count}"
         
-        return error_summary
\ No newline at end of file
+        return error_summary
+    
+    def _append_error(self, error: ValidationError):
+        """Store an error, creating the list on the first one"""
+        if self._errors is None:
+            self._errors = ErrorList()
+        self._errors.append(error)
\ No newline at end of file
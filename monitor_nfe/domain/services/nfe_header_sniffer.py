@@ -0,0 +1,66 @@
+import re
+import xml.etree.ElementTree as ET
+from typing import Optional
+
+from ..value_objects.nfe_header import NFEHeader
+
+# Bytes fed to the pull parser per step, and how far into the file the header may go
+CHUNK_SIZE = 1024
+MAX_HEAD_SIZE = 64 * 1024
+
+# protNFe/infProt/chNFe sits at the end of a procNFe
+TAIL_SIZE = 8 * 1024
+_CHNFE_PATTERN = re.compile(rb'<chNFe>(\d{44})</chNFe>')
+_INFNFE_ID_PATTERN = re.compile(r'^NFe(\d{44})$')
+
+# Roots whose first elements lead to infNFe
+_NFE_ROOTS = ('NFe', 'nfeProc', 'procNFe')
+
+
+def sniff_nfe_header(markup: bytes) -> Optional[NFEHeader]:
+    """Read the root tag, versao and infNFe Id from the first elements only
+    
+    Feeds the pull parser a chunk at a time and stops at the infNFe start tag (or at a
+    root that is not an NFe), so the rest of the document is never parsed. The tail is
+    searched for protNFe's chNFe only when infNFe has no usable Id. Returns None when the
+    head can't be parsed (malformed XML, or an encoding expat doesn't support) so callers
+    fall back to scanning the whole document.
+    """
+    parser = ET.XMLPullParser(events=('start',))
+    root_tag = version = None
+    
+    try:
+        for start in range(0, min(len(markup), MAX_HEAD_SIZE), CHUNK_SIZE):
+            parser.feed(markup[start:start + CHUNK_SIZE])
+            for _, element in parser.read_events():
+                tag = _local_name(element.tag)
+                if root_tag is None:
+                    root_tag, version = tag, element.get('versao')
+                    if tag not in _NFE_ROOTS:
+                        return NFEHeader(root_tag, version)
+                elif tag == 'infNFe':
+                    infnfe_id = element.get('Id') or element.get('id')
+                    return NFEHeader(
+                        root_tag, version or element.get('versao'), infnfe_id,
+                        _key_from_id(infnfe_id) or _key_from_tail(markup)
+                    )
+    except ET.ParseError:
+        return None
+    
+    if root_tag is None:
+        return None
+    return NFEHeader(root_tag, version, None, _key_from_tail(markup))
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def _key_from_id(infnfe_id: Optional[str]) -> Optional[str]:
+    match = _INFNFE_ID_PATTERN.match(infnfe_id) if infnfe_id else None
+    return match.group(1) if match else None
+
+
+def _key_from_tail(markup: bytes) -> Optional[str]:
+    match = _CHNFE_PATTERN.search(markup, max(0, len(markup) - TAIL_SIZE))
+    return match.group(1).decode('ascii') if match else None
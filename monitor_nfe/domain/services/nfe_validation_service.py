@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Optional, Union
 
+from ..entities.document_context import DocumentContext
 from ..entities.nfe_document import NFEDocument, NFEType
 from ..entities.validation_result import ValidationResult, ValidationStatus, ValidationType
+from ..value_objects.nfe_header import NFEHeader
 from ..value_objects.nfe_key import NFEKey
+from .nfe_header_sniffer import sniff_nfe_header
 
 
 class INFEValidationService(ABC):
@@ -15,8 +18,8 @@ class INFEValidationService(ABC):
         pass
     
     @abstractmethod
-    def extract_nfe_key(self, xml_content: str) -> Optional[NFEKey]:
-        """Extract NFe key from XML content"""
+    def extract_nfe_key(self, xml_content: Union[str, bytes]) -> Optional[NFEKey]:
+        """Extract NFe key from XML content (text or ASCII-compatible bytes)"""
         pass
     
     @abstractmethod
@@ -39,31 +42,35 @@ class NFEValidationService(INFEValidationService):
             return NFEType.UNKNOWN
         
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
+            context = document.get_context()
+            if context.document_type is not None:
+                return context.document_type
             
-            for encoding in encodings:
-                try:
-                    content = document.file_path.read_text(encoding=encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-            else:
+            # The root element, read from the first bytes only
+            header = self._sniff_header(context)
+            if header is not None and header.document_type != NFEType.UNKNOWN:
+                context.document_type = header.document_type
+                return context.document_type
+            
+            # Byte-level search - the file is never decoded for this
+            content = context.markup
+            if content is None:
                 return NFEType.UNKNOWN
             
             # Check root element
-            if '<nfeProc' in content or '<procNFe' in content:
-                return NFEType.PROC_NFE
-            elif '<NFe' in content or '<infNFe' in content:
-                return NFEType.NFE
+            if b'<nfeProc' in content or b'<procNFe' in content:
+                context.document_type = NFEType.PROC_NFE
+            elif b'<NFe' in content or b'<infNFe' in content:
+                context.document_type = NFEType.NFE
             else:
-                return NFEType.UNKNOWN
+                context.document_type = NFEType.UNKNOWN
+            return context.document_type
                 
         except Exception:
             return NFEType.UNKNOWN
     
-    def extract_nfe_key(self, xml_content: str) -> Optional[NFEKey]:
-        """Extract NFe key from XML content using regex patterns"""
+    def extract_nfe_key(self, xml_content: Union[str, bytes]) -> Optional[NFEKey]:
+        """Extract NFe key from XML content (text or ASCII-compatible bytes) using regex patterns"""
         if not xml_content:
             return None
         
@@ -79,9 +86,13 @@ class NFEValidationService(INFEValidationService):
         ]
         
         for pattern in patterns:
+            if isinstance(xml_content, bytes):
+                pattern = pattern.encode('ascii')
             match = re.search(pattern, xml_content)
             if match:
                 key_value = match.group(1)
+                if isinstance(key_value, bytes):
+                    key_value = key_value.decode('ascii')
                 return NFEKey.from_string(key_value)
         
         return None
@@ -128,18 +139,12 @@ class NFEValidationService(INFEValidationService):
         # For XML files, check basic structure
         if document.is_xml:
             try:
-                # Try to read file content with improved encoding detection
-                encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'iso-8859-1', 'cp1252', 'windows-1252']
-                xml_content = None
-                used_encoding = None
-                
-                for encoding in encodings:
-                    try:
-                        xml_content = document.file_path.read_text(encoding=encoding)
-                        used_encoding = encoding
-                        break
-                    except UnicodeDecodeError:
-                        continue
+                # Read once - later stages reuse the same context. Checks run on the
+                # bytes, in the encoding sniffed from the BOM or declaration
+                context = document.get_context()
+                if context.read_error:
+                    raise OSError(context.read_error)
+                xml_content = context.markup
                 
                 if not xml_content:
                     result.add_error(
@@ -151,25 +156,39 @@ class NFEValidationService(INFEValidationService):
                 
                 # Check for XML declaration (improved detection)
                 xml_content_clean = self._clean_xml_content(xml_content)
-                if not self._has_xml_declaration(xml_content_clean):
+                if not self._has_xml_declaration(xml_content_clean, context):
                     result.add_error(
                         ValidationType.STRUCTURE,
                         "Declaração XML ausente",
                         "Arquivo não possui declaração XML válida"
                     )
                 
-                # Check for NFe content
-                if '<NFe' not in xml_content and '<nfeProc' not in xml_content:
+                # Check for NFe content (a recognised root settles it without scanning)
+                header = self._sniff_header(context)
+                is_nfe_root = header is not None and header.document_type != NFEType.UNKNOWN
+                if not is_nfe_root and b'<NFe' not in xml_content and b'<nfeProc' not in xml_content:
                     result.add_error(
                         ValidationType.STRUCTURE,
                         "Conteúdo NFe não encontrado",
                         "Arquivo não parece conter dados de NFe"
                     )
                 
-                # Try to extract and validate NFe key
-                nfe_key = self.extract_nfe_key(xml_content)
+                # Try to extract and validate NFe key - from the header, else scanning everything.
+                # A header key with a wrong check digit is reported as is, without the scan
+                header_key = header.nfe_key if header is not None else None
+                if header_key:
+                    nfe_key = NFEKey.from_string(header_key)
+                else:
+                    nfe_key = self.extract_nfe_key(xml_content)
                 if nfe_key:
                     result.nfe_key = str(nfe_key)
+                    context.nfe_key = result.nfe_key
+                elif header_key:
+                    result.add_error(
+                        ValidationType.STRUCTURE,
+                        "Chave NFe inválida",
+                        f"Dígito verificador não confere: {header_key}"
+                    )
                 else:
                     result.add_error(
                         ValidationType.STRUCTURE,
@@ -203,33 +222,35 @@ class NFEValidationService(INFEValidationService):
         
         return result
     
-    def _clean_xml_content(self, xml_content: str) -> str:
-        """Clean XML content by removing BOM and invisible characters"""
-        # Remove BOM (Byte Order Mark)
-        if xml_content.startswith('\ufeff'):
-            xml_content = xml_content[1:]
-        
-        # Remove other common invisible characters at the beginning
-        xml_content = xml_content.lstrip('\x00\x01\x02\x03\x04\x05\x06\x07\x08\x0b\x0c\x0e\x0f')
-        xml_content = xml_content.lstrip('\x10\x11\x12\x13\x14\x15\x16\x17\x18\x19\x1a\x1b\x1c\x1d\x1e\x1f')
+    def _clean_xml_content(self, xml_content: bytes) -> bytes:
+        """Clean XML content by removing invisible characters (the context already dropped the BOM)"""
+        # Remove common invisible characters at the beginning
+        xml_content = xml_content.lstrip(b'\x00\x01\x02\x03\x04\x05\x06\x07\x08\x0b\x0c\x0e\x0f')
+        xml_content = xml_content.lstrip(b'\x10\x11\x12\x13\x14\x15\x16\x17\x18\x19\x1a\x1b\x1c\x1d\x1e\x1f')
         
         return xml_content.strip()
     
-    def _has_xml_declaration(self, xml_content: str) -> bool:
+    def _has_xml_declaration(self, xml_content: bytes, context: Optional[DocumentContext] = None) -> bool:
         """Check if XML has valid declaration using multiple methods"""
         if not xml_content:
             return False
         
         # Method 1: Direct string check (most common case)
-        if xml_content.startswith('<?xml'):
+        if xml_content.startswith(b'<?xml'):
             return True
         
         # Method 2: Check first 100 characters for declaration
         first_part = xml_content[:100].lower()
-        if '<?xml' in first_part:
+        if b'<?xml' in first_part:
             return True
         
-        # Method 3: Try to parse with XML parser (most reliable)
+        # Method 3: Try to parse with XML parser (most reliable), reusing the context's
+        # parse so the document is parsed only once across all stages
+        if context is not None and context.parser is not None:
+            if context.parse() is not None:
+                return True
+            return any(tag in xml_content for tag in [b'<NFe', b'<nfeProc', b'<infNFe'])
+        
         try:
             import xml.etree.ElementTree as ET
             # Try to parse - if it succeeds, it's valid XML
@@ -238,9 +259,15 @@ class NFEValidationService(INFEValidationService):
         except ET.ParseError:
             # If parsing fails, it might still be valid XML but with issues
             # Check if it contains NFe elements
-            if any(tag in xml_content for tag in ['<NFe', '<nfeProc', '<infNFe']):
+            if any(tag in xml_content for tag in [b'<NFe', b'<nfeProc', b'<infNFe']):
                 return True
         except Exception:
             pass
         
-        return False
\ No newline at end of file
+        return False
+    
+    def _sniff_header(self, context: DocumentContext) -> Optional[NFEHeader]:
+        """Root tag, version and key from the document's first elements, sniffed once"""
+        if context.header is None and context.markup:
+            context.header = sniff_nfe_header(context.markup)
+        return context.header
\ No newline at end of file
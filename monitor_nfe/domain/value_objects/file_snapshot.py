@@ -0,0 +1,34 @@
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class FileSnapshot:
+    """Value object with a file's metadata, taken with a single stat call
+    
+    On SMB/NFS monitor folders every exists() or stat() is a network round trip, so a
+    document takes one snapshot and every stage reads it instead of the file system.
+    Size, mtime and inode together tell whether the file changed since the snapshot.
+    """
+    exists: bool
+    size: int = 0
+    mtime_ns: int = 0
+    inode: int = 0
+    
+    @classmethod
+    def capture(cls, file_path: Path) -> 'FileSnapshot':
+        """Stat the file once - a file that can't be stat'ed is reported as missing"""
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return cls(exists=False)
+        return cls(exists=True, size=stat.st_size, mtime_ns=stat.st_mtime_ns, inode=stat.st_ino)
+    
+    @property
+    def modified_at(self) -> Optional[datetime]:
+        """Last modification time, None for a missing file"""
+        if not self.exists:
+            return None
+        return datetime.fromtimestamp(self.mtime_ns / 1_000_000_000)
@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from ..entities.nfe_document import NFEType
+
+
+@dataclass(frozen=True)
+class NFEHeader:
+    """Value object with what the first elements of an NFe reveal: root tag, layout version and key"""
+    root_tag: str
+    version: Optional[str] = None
+    infnfe_id: Optional[str] = None
+    nfe_key: Optional[str] = None
+    
+    @property
+    def document_type(self) -> NFEType:
+        """Document type implied by the root element"""
+        if self.root_tag in ('nfeProc', 'procNFe'):
+            return NFEType.PROC_NFE
+        if self.root_tag == 'NFe':
+            return NFEType.NFE
+        return NFEType.UNKNOWN
@@ -1,38 +1,109 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from operator import mul
 from typing import Optional
 import re
 
+# Everything that is not a digit (separators in formatted keys)
+_NON_DIGITS = re.compile(r'\D')
+
+KEY_LENGTH = 44
+
+# Modulo 11 weights for the 43 digits before the check digit: 2..9 repeating from the right
+CHECK_DIGIT_WEIGHTS = tuple(2 + index % 8 for index in range(KEY_LENGTH - 1))[::-1]
+_ASCII_ZERO_OFFSET = ord('0') * sum(CHECK_DIGIT_WEIGHTS)
+
+
+def compute_check_digit(digits: str) -> int:
+    """Modulo 11 check digit of the first 43 digits of a key (0 when the remainder is 0 or 1)"""
+    # Weighted sum of the ASCII codes, minus what the '0' offset adds to it
+    codes = digits[:KEY_LENGTH - 1].encode('ascii')
+    remainder = (sum(map(mul, codes, CHECK_DIGIT_WEIGHTS)) - _ASCII_ZERO_OFFSET) % 11
+    return 0 if remainder < 2 else 11 - remainder
+
+
+def is_valid_nfe_key(digits: str) -> bool:
+    """Check a digits-only key: 44 ASCII digits whose last one is the modulo 11 check digit"""
+    return (len(digits) == KEY_LENGTH and digits.isascii() and digits.isdigit()
+            and compute_check_digit(digits) == int(digits[-1]))
+
 
 @dataclass(frozen=True)
 class NFEKey:
-    """Value object representing an NFe key"""
+    """Value object representing an NFe key
+    
+    The digits are extracted once, when the key is created, so ``clean``, ``formatted``,
+    equality and hashing never run a regex. The fields packed in the key (cUF, AAMM, CNPJ,
+    mod, serie, nNF, tpEmis, cNF, cDV) are sliced from the digits only when asked for.
+    """
     value: str
+    _digits: str = field(default='', init=False, repr=False, compare=False)
     
     def __post_init__(self):
+        value = self.value or ''
+        digits = value if value.isascii() and value.isdigit() else _NON_DIGITS.sub('', value)
+        object.__setattr__(self, '_digits', digits)
+        
         if not self.is_valid():
             raise ValueError(f"Invalid NFe key: {self.value}")
     
     def is_valid(self) -> bool:
-        """Check if NFe key is valid (44 digits)"""
-        if not self.value:
-            return False
-        
-        # Remove any non-digit characters
-        clean_key = re.sub(r'\D', '', self.value)
-        
-        # NFe key must have exactly 44 digits
-        return len(clean_key) == 44 and clean_key.isdigit()
+        """Check if NFe key is valid (44 digits with a matching modulo 11 check digit)"""
+        return is_valid_nfe_key(self._digits)
     
     @property
     def formatted(self) -> str:
         """Get formatted NFe key (with spaces every 4 digits)"""
-        clean_key = re.sub(r'\D', '', self.value)
-        return ' '.join(clean_key[i:i+4] for i in range(0, len(clean_key), 4))
+        return ' '.join(self._digits[i:i+4] for i in range(0, len(self._digits), 4))
     
     @property
     def clean(self) -> str:
         """Get clean NFe key (digits only)"""
-        return re.sub(r'\D', '', self.value)
+        return self._digits
+    
+    @property
+    def uf_code(self) -> str:
+        """IBGE code of the issuer's state (cUF)"""
+        return self._digits[0:2]
+    
+    @property
+    def year_month(self) -> str:
+        """Year and month of issue, YYMM (AAMM)"""
+        return self._digits[2:6]
+    
+    @property
+    def cnpj(self) -> str:
+        """Issuer's CNPJ (or CPF, zero-padded)"""
+        return self._digits[6:20]
+    
+    @property
+    def model(self) -> str:
+        """Document model (mod) - 55 for NF-e, 65 for NFC-e"""
+        return self._digits[20:22]
+    
+    @property
+    def series(self) -> str:
+        """Document series (serie)"""
+        return self._digits[22:25]
+    
+    @property
+    def number(self) -> str:
+        """Document number (nNF)"""
+        return self._digits[25:34]
+    
+    @property
+    def emission_type(self) -> str:
+        """Emission type (tpEmis) - 1 for normal emission"""
+        return self._digits[34]
+    
+    @property
+    def numeric_code(self) -> str:
+        """Random numeric code chosen by the issuer (cNF)"""
+        return self._digits[35:43]
+    
+    @property
+    def check_digit(self) -> int:
+        """Modulo 11 check digit (cDV)"""
+        return int(self._digits[43])
     
     @classmethod
     def from_string(cls, key_string: Optional[str]) -> Optional['NFEKey']:
@@ -46,12 +117,12 @@ class NFEKey:
             return None
     
     def __str__(self) -> str:
-        return self.clean
+        return self._digits
     
     def __eq__(self, other) -> bool:
         if not isinstance(other, NFEKey):
             return False
-        return self.clean == other.clean
+        return self._digits == other._digits
     
     def __hash__(self) -> int:
-        return hash(self.clean)
\ No newline at end of file
+        return hash(self._digits)
\ No newline at end of file
@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+import codecs
+import re
+
+# Byte order marks, longest first so UTF-32 LE is not taken for UTF-16 LE
+_BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+
+# BOM-less UTF-16 recognised from how '<?' is laid out (XML 1.0, appendix F)
+_UTF16_PREFIXES = [
+    (b'<\x00?\x00', 'utf-16-le'),
+    (b'\x00<\x00?', 'utf-16-be'),
+]
+
+# encoding="..." pseudo-attribute of the XML declaration
+_DECLARED_ENCODING_PATTERN = re.compile(
+    rb'^[ \t\r\n]*<\?xml[^>]*?\sencoding[ \t\r\n]*=[ \t\r\n]*["\']([A-Za-z][A-Za-z0-9._-]*)["\']'
+)
+
+# How much of the file the declaration may take
+HEAD_SIZE = 256
+
+# Used when the bytes are not valid in the detected encoding (any byte is valid Latin-1)
+FALLBACK_ENCODING = 'iso-8859-1'
+
+
+@dataclass(frozen=True)
+class XMLEncoding:
+    """Value object for the encoding of an XML document, detected from its first bytes"""
+    name: str
+    bom_length: int = 0
+    source: str = 'default'
+    
+    @classmethod
+    def sniff(cls, raw: bytes) -> 'XMLEncoding':
+        """Detect the encoding from the BOM or the declaration, UTF-8 (the XML default) otherwise"""
+        for bom, name in _BOMS:
+            if raw.startswith(bom):
+                return cls(name, len(bom), 'bom')
+        
+        for prefix, name in _UTF16_PREFIXES:
+            if raw.startswith(prefix):
+                return cls(name, 0, 'bom')
+        
+        match = _DECLARED_ENCODING_PATTERN.match(raw[:HEAD_SIZE])
+        if match:
+            try:
+                declared = cls(codecs.lookup(match.group(1).decode('ascii')).name, 0, 'declaration')
+                # A declaration readable as ASCII rules out UTF-16/32 whatever it says
+                if declared.is_ascii_compatible:
+                    return declared
+            except LookupError:
+                pass
+        
+        return cls('utf-8')
+    
+    @property
+    def is_ascii_compatible(self) -> bool:
+        """Check if markup is plain ASCII in this encoding, so it can be searched as bytes"""
+        return not self.name.startswith(('utf-16', 'utf-32'))
+    
+    def verify(self, raw: bytes, chunk_size: int = 64 * 1024) -> bool:
+        """Check the bytes decode in this encoding, chunk by chunk, stopping at the first error"""
+        if self.is_ascii_compatible and raw.isascii():
+            return True
+        
+        decoder = codecs.getincrementaldecoder(self.name)('strict')
+        view = memoryview(raw)
+        try:
+            for start in range(self.bom_length, len(raw), chunk_size):
+                decoder.decode(view[start:start + chunk_size])
+            decoder.decode(b'', final=True)
+            return True
+        except UnicodeDecodeError:
+            return False
+    
+    def __str__(self) -> str:
+        return self.name
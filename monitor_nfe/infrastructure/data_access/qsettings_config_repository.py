@@ -17,7 +17,24 @@ class QSettingsConfigRepository(IConfigurationRepository):
             output_folder=self._settings.value('output_folder', None),
             token=self._settings.value('token', None),
             auto_organize=self._settings.value('auto_organize', True, type=bool),
-            log_level=self._settings.value('log_level', 'INFO')
+            log_level=self._settings.value('log_level', 'INFO'),
+            max_workers=self._settings.value('max_workers', 10, type=int),
+            async_uploads=self._settings.value('async_uploads', False, type=bool),
+            max_in_flight=self._settings.value('max_in_flight', 200, type=int),
+            api_rate_limit=self._settings.value('api_rate_limit', 0.0, type=float),
+            api_burst=self._settings.value('api_burst', 10, type=int),
+            circuit_failure_threshold=self._settings.value('circuit_failure_threshold', 5, type=int),
+            circuit_reset_seconds=self._settings.value('circuit_reset_seconds', 30, type=int),
+            upload_compression=self._settings.value('upload_compression', 'none'),
+            upload_batch_size=self._settings.value('upload_batch_size', 1, type=int),
+            upload_batch_window_ms=self._settings.value('upload_batch_window_ms', 50, type=int),
+            upload_deadline_seconds=self._settings.value('upload_deadline_seconds', 60, type=int),
+            hedge_uploads=self._settings.value('hedge_uploads', False, type=bool),
+            schema_validation_processes=self._settings.value('schema_validation_processes', 0, type=int),
+            single_pass_schema_validation=self._settings.value('single_pass_schema_validation', False, type=bool),
+            schema_max_errors=self._settings.value('schema_max_errors', 100, type=int),
+            schema_fail_fast=self._settings.value('schema_fail_fast', False, type=bool),
+            verify_signatures=self._settings.value('verify_signatures', False, type=bool)
         )
     
     def save_configuration(self, config: Configuration) -> bool:
@@ -28,6 +45,23 @@ class QSettingsConfigRepository(IConfigurationRepository):
             self._settings.setValue('token', config.token)
             self._settings.setValue('auto_organize', config.auto_organize)
             self._settings.setValue('log_level', config.log_level)
+            self._settings.setValue('max_workers', config.max_workers)
+            self._settings.setValue('async_uploads', config.async_uploads)
+            self._settings.setValue('max_in_flight', config.max_in_flight)
+            self._settings.setValue('api_rate_limit', config.api_rate_limit)
+            self._settings.setValue('api_burst', config.api_burst)
+            self._settings.setValue('circuit_failure_threshold', config.circuit_failure_threshold)
+            self._settings.setValue('circuit_reset_seconds', config.circuit_reset_seconds)
+            self._settings.setValue('upload_compression', config.upload_compression)
+            self._settings.setValue('upload_batch_size', config.upload_batch_size)
+            self._settings.setValue('upload_batch_window_ms', config.upload_batch_window_ms)
+            self._settings.setValue('upload_deadline_seconds', config.upload_deadline_seconds)
+            self._settings.setValue('hedge_uploads', config.hedge_uploads)
+            self._settings.setValue('schema_validation_processes', config.schema_validation_processes)
+            self._settings.setValue('single_pass_schema_validation', config.single_pass_schema_validation)
+            self._settings.setValue('schema_max_errors', config.schema_max_errors)
+            self._settings.setValue('schema_fail_fast', config.schema_fail_fast)
+            self._settings.setValue('verify_signatures', config.verify_signatures)
             self._settings.sync()
             return True
         except Exception:
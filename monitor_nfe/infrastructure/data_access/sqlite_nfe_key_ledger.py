@@ -0,0 +1,96 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Set
+
+from application.interfaces.repositories import INFEKeyLedger
+from domain.value_objects.nfe_key import is_valid_nfe_key
+from infrastructure.services.nfe_key_batch_validator import NFEKeyBatchValidator
+
+
+class SQLiteNFEKeyLedger(INFEKeyLedger):
+    """Ledger of NFe keys accepted by the API, persisted in SQLite (WAL)
+    
+    Lookups never touch the database: all keys are loaded once into an in-memory set of
+    integers (a 44-digit key fits in a small int), so ``contains`` is a constant-time hash
+    probe even with millions of keys. New keys are written through to the database.
+    Stored keys are checked in bulk when loaded; rows with a wrong check digit (written
+    by hand or by older versions) are reported and left out of the set.
+    """
+    
+    def __init__(self, database_path: Path):
+        self._database_path = Path(database_path)
+        self._database_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._keys: Optional[Set[int]] = None
+        
+        # One connection shared by all worker threads, serialized by the lock
+        self._connection = sqlite3.connect(str(self._database_path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS accepted_keys (
+                    nfe_key TEXT PRIMARY KEY,
+                    status_code INTEGER NOT NULL,
+                    recorded_at REAL NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+    
+    def __len__(self) -> int:
+        return len(self._get_keys())
+    
+    def contains(self, nfe_key: str) -> bool:
+        """Check if the API already accepted this NFe key"""
+        key = self._to_int(nfe_key)
+        return key is not None and key in self._get_keys()
+    
+    def record(self, nfe_key: str, status_code: int):
+        """Remember an NFe key the API accepted (200) or reported as existing (409)"""
+        key = self._to_int(nfe_key)
+        if key is None:
+            return
+        
+        keys = self._get_keys()
+        with self._lock:
+            if key in keys:
+                return
+            with self._connection:
+                self._connection.execute(
+                    "INSERT OR IGNORE INTO accepted_keys (nfe_key, status_code, recorded_at) VALUES (?, ?, ?)",
+                    (nfe_key, status_code, time.time())
+                )
+            keys.add(key)
+    
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._connection.close()
+    
+    def _get_keys(self) -> Set[int]:
+        """Load every stored key into memory on first use"""
+        keys = self._keys
+        if keys is not None:
+            return keys
+        
+        with self._lock:
+            if self._keys is None:
+                started = time.time()
+                stored = [row[0] for row in self._connection.execute("SELECT nfe_key FROM accepted_keys")]
+                flags = NFEKeyBatchValidator().validate(stored)
+                self._keys = {int(key) for key, valid in zip(stored, flags) if valid}
+                print(f"[NFEKeyLedger] 📒 {len(self._keys)} chave(s) carregada(s) em "
+                      f"{(time.time() - started) * 1000:.0f}ms")
+                if len(self._keys) < len(stored):
+                    print(f"[NFEKeyLedger] ⚠️  {len(stored) - len(self._keys)} chave(s) inválida(s) ignorada(s)")
+            return self._keys
+    
+    @staticmethod
+    def _to_int(nfe_key: Optional[str]) -> Optional[int]:
+        # A key with a wrong check digit is never looked up nor stored - no database I/O
+        if not nfe_key or not is_valid_nfe_key(nfe_key):
+            return None
+        return int(nfe_key)
@@ -0,0 +1,150 @@
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from application.dtos.outbox_dto import OutboxEntry
+from application.interfaces.repositories import ISubmissionOutbox
+from domain.entities.validation_result import APIResponse
+
+
+class SQLiteSubmissionOutbox(ISubmissionOutbox):
+    """Durable submission outbox stored in an append-only SQLite WAL database
+    
+    Submissions and acknowledgements are two insert-only tables: a submission is pending
+    while it has no acknowledgement row. The only update is the file path of a pending
+    submission, which follows the file when it is organized so the drain can still send
+    it. Acknowledged rows older than ``retention_days`` are removed when the outbox is
+    opened.
+    """
+    
+    def __init__(self, database_path: Path, retention_days: int = 30):
+        self._database_path = Path(database_path)
+        self._database_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        
+        # One connection shared by all worker threads, serialized by the lock
+        self._connection = sqlite3.connect(str(self._database_path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        self._compact(retention_days)
+    
+    def enqueue(self, content_hash: str, file_path: str, nfe_key: Optional[str] = None) -> OutboxEntry:
+        """Record a submission, returning the pending entry for the same content if there is one"""
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                """
+                SELECT s.idempotency_key, s.content_hash, s.file_path, s.enqueued_at, s.nfe_key
+                FROM submissions s
+                LEFT JOIN acknowledgements a ON a.idempotency_key = s.idempotency_key
+                WHERE s.content_hash = ? AND a.idempotency_key IS NULL
+                ORDER BY s.enqueued_at
+                LIMIT 1
+                """,
+                (content_hash,)
+            ).fetchone()
+            if row:
+                return self._to_entry(row)
+            
+            entry = OutboxEntry(
+                idempotency_key=uuid.uuid4().hex,
+                content_hash=content_hash,
+                file_path=file_path,
+                enqueued_at=datetime.now(),
+                nfe_key=nfe_key
+            )
+            self._connection.execute(
+                "INSERT INTO submissions (idempotency_key, content_hash, file_path, enqueued_at, nfe_key) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (entry.idempotency_key, entry.content_hash, entry.file_path,
+                 entry.enqueued_at.timestamp(), entry.nfe_key)
+            )
+            return entry
+    
+    def acknowledge(self, idempotency_key: str, response: APIResponse):
+        """Record the API's definitive answer for a submission"""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO acknowledgements "
+                "(idempotency_key, status_code, success, message, acknowledged_at) VALUES (?, ?, ?, ?, ?)",
+                (idempotency_key, response.status_code, int(response.success),
+                 response.message, time.time())
+            )
+    
+    def pending(self) -> List[OutboxEntry]:
+        """Get submissions not acknowledged yet, oldest first"""
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT s.idempotency_key, s.content_hash, s.file_path, s.enqueued_at, s.nfe_key
+                FROM submissions s
+                LEFT JOIN acknowledgements a ON a.idempotency_key = s.idempotency_key
+                WHERE a.idempotency_key IS NULL
+                ORDER BY s.enqueued_at
+                """
+            ).fetchall()
+        return [self._to_entry(row) for row in rows]
+    
+    def relocate(self, old_path: str, new_path: str) -> int:
+        """Point pending submissions of a moved file at its new path, return how many were updated"""
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                """
+                UPDATE submissions SET file_path = ?
+                WHERE file_path = ? AND idempotency_key NOT IN (SELECT idempotency_key FROM acknowledgements)
+                """,
+                (new_path, old_path)
+            )
+            return cursor.rowcount
+    
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._connection.close()
+    
+    def _create_schema(self):
+        with self._connection:
+            self._connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS submissions (
+                    idempotency_key TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    enqueued_at REAL NOT NULL,
+                    nfe_key TEXT
+                );
+                CREATE INDEX IF NOT EXISTS ix_submissions_content_hash ON submissions (content_hash);
+                CREATE TABLE IF NOT EXISTS acknowledgements (
+                    idempotency_key TEXT PRIMARY KEY,
+                    status_code INTEGER,
+                    success INTEGER NOT NULL,
+                    message TEXT,
+                    acknowledged_at REAL NOT NULL
+                );
+                """
+            )
+    
+    def _compact(self, retention_days: int):
+        """Drop acknowledged submissions older than the retention period"""
+        cutoff = time.time() - retention_days * 86400
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM submissions WHERE idempotency_key IN "
+                "(SELECT idempotency_key FROM acknowledgements WHERE acknowledged_at < ?)",
+                (cutoff,)
+            )
+            self._connection.execute("DELETE FROM acknowledgements WHERE acknowledged_at < ?", (cutoff,))
+    
+    def _to_entry(self, row) -> OutboxEntry:
+        idempotency_key, content_hash, file_path, enqueued_at, nfe_key = row
+        return OutboxEntry(
+            idempotency_key=idempotency_key,
+            content_hash=content_hash,
+            file_path=file_path,
+            enqueued_at=datetime.fromtimestamp(enqueued_at),
+            nfe_key=nfe_key
+        )
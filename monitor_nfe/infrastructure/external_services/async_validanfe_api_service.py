@@ -0,0 +1,379 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp é opcional - só necessário para uploads assíncronos
+    aiohttp = None
+
+from domain.entities.nfe_document import NFEDocument
+from domain.entities.validation_result import APIResponse
+from domain.value_objects.api_token import APIToken
+from infrastructure.external_services.multipart_body import MultipartXmlBody
+from infrastructure.services.adaptive_concurrency_limiter import AdaptiveConcurrencyLimiter, UploadOutcome
+from infrastructure.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from infrastructure.services.retry_scheduler import RetryBudget, backoff_delay
+from infrastructure.services.token_bucket_rate_limiter import TokenBucketRateLimiter
+from .validanfe_api_service import ValidaNFeAPIService
+
+
+class AsyncValidaNFeAPIService(ValidaNFeAPIService):
+    """ValidaNFe API service running uploads on a single asyncio event loop"""
+    
+    def __init__(self, base_url: str = "https://api.validanfe.com",
+                 max_in_flight: int = 200, pool_size: int = 10,
+                 concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 upload_compression: Optional[str] = None,
+                 retry_budget: Optional[RetryBudget] = None,
+                 upload_deadline_seconds: float = 60.0,
+                 hedge_uploads: bool = False):
+        if aiohttp is None:
+            raise ImportError("aiohttp não instalado - uploads assíncronos indisponíveis")
+        
+        # Start at the worker count and let the limiter grow towards max_in_flight
+        super().__init__(
+            base_url=base_url,
+            pool_size=pool_size,
+            concurrency_limiter=concurrency_limiter or AdaptiveConcurrencyLimiter(
+                initial_limit=pool_size,
+                max_limit=max_in_flight
+            ),
+            rate_limiter=rate_limiter,
+            circuit_breaker=circuit_breaker,
+            upload_compression=upload_compression,
+            retry_budget=retry_budget,
+            upload_deadline_seconds=upload_deadline_seconds,
+            hedge_uploads=hedge_uploads
+        )
+        self._max_in_flight = max(1, max_in_flight)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        self._client: Optional['aiohttp.ClientSession'] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._slot_released: Optional[asyncio.Condition] = None
+    
+    @property
+    def max_in_flight(self) -> int:
+        """Maximum number of uploads in flight at the same time"""
+        return self._max_in_flight
+    
+    def validate_nfe(self, document: NFEDocument, token: APIToken,
+                     idempotency_key: Optional[str] = None) -> APIResponse:
+        """Send NFe document to the API, blocking until the upload completes"""
+        return self.submit(document, token, idempotency_key).result()
+    
+    def submit(self, document: NFEDocument, token: APIToken,
+               idempotency_key: Optional[str] = None) -> Future:
+        """Schedule an upload on the event loop and return a thread-safe future"""
+        return asyncio.run_coroutine_threadsafe(
+            self.validate_nfe_async(document, token, idempotency_key), self._ensure_loop()
+        )
+    
+    def submit_batch(self, documents: List[NFEDocument], token: APIToken,
+                     idempotency_keys: Optional[List[Optional[str]]] = None) -> Future:
+        """Schedule a batch of uploads and return a future for the list of responses"""
+        return asyncio.run_coroutine_threadsafe(
+            self.validate_batch_async(documents, token, idempotency_keys), self._ensure_loop()
+        )
+    
+    async def validate_batch_async(self, documents: List[NFEDocument], token: APIToken,
+                                   idempotency_keys: Optional[List[Optional[str]]] = None) -> List[APIResponse]:
+        """Upload documents concurrently, bounded by max_in_flight, keeping input order"""
+        keys = idempotency_keys or [None] * len(documents)
+        return list(await asyncio.gather(
+            *(self.validate_nfe_async(document, token, key) for document, key in zip(documents, keys))
+        ))
+    
+    async def validate_nfe_async(self, document: NFEDocument, token: APIToken,
+                                 idempotency_key: Optional[str] = None) -> APIResponse:
+        """Send NFe document to the API from the event loop"""
+        start_time = time.time()
+        
+        try:
+            url = f"{self.base_url}{self.guarda_endpoint}"
+            headers = self._request_headers(token, idempotency_key)
+            
+            loop = asyncio.get_running_loop()
+            async with self._semaphore:
+                # Read bytes only once a slot is free, so queued uploads hold no XML in memory.
+                # Documents without a loaded context are read from disk - off the event loop
+                xml_content, rejection = await loop.run_in_executor(None, self._prepare_upload, document)
+                if rejection:
+                    return rejection
+                
+                compressed_body = None
+                if self._upload_compression:
+                    # Compress in the loop's executor so the event loop keeps serving other uploads
+                    compressed_body = await loop.run_in_executor(
+                        None, self._compress_body,
+                        MultipartXmlBody('xmlFile', document.filename, xml_content)
+                    )
+                
+                # Every attempt of this document shares one deadline
+                status_code, text = await self._post_with_retry(
+                    url, document.filename, xml_content, headers, body=compressed_body,
+                    deadline=time.monotonic() + self._upload_deadline_seconds, hedge=self._hedge_uploads
+                )
+            
+            response_time_ms = (time.time() - start_time) * 1000
+            print(f"[AsyncValidaNFeAPIService] {document.filename}: HTTP {status_code} ({response_time_ms:.0f}ms)")
+            
+            return self._build_api_response(status_code, text, response_time_ms)
+        
+        except CircuitOpenError:
+            return self._circuit_open_response((time.time() - start_time) * 1000)
+        
+        except asyncio.TimeoutError:
+            return APIResponse(
+                success=False,
+                message="Timeout na conexão com a API",
+                status_code=None,
+                response_time_ms=(time.time() - start_time) * 1000
+            )
+        
+        except aiohttp.ClientConnectionError:
+            return APIResponse(
+                success=False,
+                message="Erro de conexão com a API",
+                status_code=None,
+                response_time_ms=(time.time() - start_time) * 1000
+            )
+        
+        except Exception as e:
+            return APIResponse(
+                success=False,
+                message=f"Erro inesperado: {str(e)[:100]}",
+                status_code=None,
+                response_time_ms=(time.time() - start_time) * 1000
+            )
+    
+    def close(self):
+        """Close the async client, stop the event loop and release pooled connections"""
+        with self._loop_lock:
+            loop = self._loop
+            if loop is not None:
+                if self._client is not None:
+                    asyncio.run_coroutine_threadsafe(self._client.close(), loop).result(timeout=5)
+                    self._client = None
+                loop.call_soon_threadsafe(loop.stop)
+                if self._loop_thread:
+                    self._loop_thread.join(timeout=5)
+                loop.close()
+                self._loop = None
+                self._loop_thread = None
+        
+        super().close()
+    
+    def _upload_individually(self, documents: List[NFEDocument], token: APIToken,
+                             keys: List[Optional[str]]) -> List[APIResponse]:
+        """Pipeline single uploads on the event loop"""
+        return self.submit_batch(documents, token, keys).result()
+    
+    def _send_batch_request(self, url: str, body: MultipartXmlBody,
+                            headers: Dict[str, str]) -> Tuple[Optional[int], str]:
+        """POST a batch body from the event loop, returning (status, text) or (None, error message)"""
+        try:
+            return asyncio.run_coroutine_threadsafe(
+                self._post_with_retry(url, "lote", b'', headers, body=body), self._ensure_loop()
+            ).result()
+        except asyncio.TimeoutError:
+            return None, "Timeout na conexão com a API"
+        except aiohttp.ClientConnectionError:
+            return None, "Erro de conexão com a API"
+        except aiohttp.ClientError as e:
+            return None, f"Erro na requisição à API: {str(e)[:100]}"
+    
+    async def _post_with_retry(self, url: str, filename: str, xml_content: bytes,
+                               headers: dict, body: Optional[MultipartXmlBody] = None,
+                               max_retries: int = 3, deadline: Optional[float] = None,
+                               hedge: bool = False):
+        """POST with retry on temporary errors, backing off without blocking the loop
+        
+        Backoff is jittered and every retry is taken from the shared retry budget. With a
+        ``deadline`` (time.monotonic) attempts use the adaptive timeouts and no retry starts
+        after it; ``hedge`` races a second copy against a first attempt slower than p99.
+        ``body`` is a ready multipart body (compressed or batched) sent instead of ``xml_content``.
+        """
+        self._retry_budget.record_request()
+        for attempt in range(max_retries + 1):
+            try:
+                if hedge and attempt == 0:
+                    status_code, text, retry_after = await self._post_hedged(
+                        url, filename, xml_content, headers, body, deadline
+                    )
+                else:
+                    status_code, text, retry_after = await self._post_with_limit_async(
+                        url, filename, xml_content, headers, body, deadline
+                    )
+                
+                retryable = retry_after or status_code in [502, 503, 504]
+                wait_time = retry_after or backoff_delay(attempt)  # Exponential backoff with jitter: ~1s, 2s, 4s
+                if not (retryable and attempt < max_retries and self._within_deadline(deadline, wait_time)
+                        and self._spend_retry(f"HTTP {status_code}")):
+                    return status_code, text
+                
+                # Retry-After already paused the shared rate limiter - the next attempt waits there
+                if retry_after:
+                    print(f"[AsyncValidaNFeAPIService] ⏸️  HTTP {status_code} - Retry após pausa global: {filename}")
+                    continue
+                
+                # Temporary error (502, 503, 504) and not last attempt: retry
+                print(f"[AsyncValidaNFeAPIService] ⏰ HTTP {status_code} - Retry em {wait_time:.1f}s: {filename}")
+                await asyncio.sleep(wait_time)
+            
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                wait_time = backoff_delay(attempt)
+                if (attempt < max_retries and self._within_deadline(deadline, wait_time)
+                        and self._spend_retry(type(e).__name__)):
+                    print(f"[AsyncValidaNFeAPIService] ⏰ {type(e).__name__} - Retry em {wait_time:.1f}s: {filename}")
+                    await asyncio.sleep(wait_time)
+                    continue
+                raise
+    
+    async def _post_hedged(self, url: str, filename: str, xml_content: bytes, headers: dict,
+                           body: Optional[MultipartXmlBody], deadline: Optional[float]):
+        """Make one attempt and race a second copy against it once it outlives the observed p99"""
+        started = asyncio.Event()
+        primary = asyncio.ensure_future(
+            self._post_with_limit_async(url, filename, xml_content, headers, body, deadline, started)
+        )
+        delay = self._timeouts.hedge_delay()
+        if delay is None:
+            return await primary
+        
+        # The p99 clock starts once the attempt is sent, not while it waits for a slot
+        sent = asyncio.ensure_future(started.wait())
+        await asyncio.wait({primary, sent}, return_when=asyncio.FIRST_COMPLETED)
+        sent.cancel()
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self._spend_retry("Hedge"):
+            return await primary
+        
+        print(f"[AsyncValidaNFeAPIService] 🪃 Sem resposta após {delay:.1f}s (p99) - enviando cópia: {filename}")
+        hedged = asyncio.ensure_future(
+            self._post_with_limit_async(url, filename, xml_content, headers, body, deadline)
+        )
+        pending = {primary, hedged}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # The first usable answer wins - a failed copy waits for the other one
+                for task in done:
+                    if task.exception() is None and task.result()[0] < 500:
+                        return task.result()
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _post_with_limit_async(self, url: str, filename: str, xml_content: bytes, headers: dict,
+                                     body: Optional[MultipartXmlBody] = None,
+                                     deadline: Optional[float] = None,
+                                     started: Optional[asyncio.Event] = None):
+        """Make one POST attempt after taking a rate token, holding an adaptive concurrency slot
+        
+        With a ``deadline`` (time.monotonic) both the wait for a slot and the request end by
+        then, the request using the adaptive timeouts. ``started`` is set once the slot is
+        held, right before the request goes out.
+        """
+        remaining = deadline - time.monotonic() if deadline is not None else None
+        if not await self._rate_limiter.acquire_async(remaining):
+            raise asyncio.TimeoutError()
+        if self._circuit_breaker:
+            self._circuit_breaker.check()
+        
+        await self._acquire_slot(deadline)
+        attempt_start = time.time()
+        timeout = self._attempt_client_timeout(deadline)
+        if started:
+            started.set()
+        outcome, reason = UploadOutcome.ERROR, None
+        failure = "Erro de conexão"
+        
+        try:
+            if body is not None:
+                data, headers = body.getbuffer(), {**headers, **body.headers}
+            else:
+                # The original bytes go to the socket as-is (BytesPayload, no re-encoding)
+                data = aiohttp.FormData()
+                data.add_field('xmlFile', xml_content, filename=filename, content_type='application/xml')
+            
+            options = {'timeout': timeout} if timeout else {}
+            async with self._client.post(url, data=data, headers=headers, **options) as response:
+                text = await response.text()
+                if timeout:
+                    self._timeouts.record(time.time() - attempt_start)
+                outcome, reason = self._classify_status(response.status)
+                failure = f"HTTP {response.status}" if response.status >= 500 else None
+                retry_after = self._apply_retry_after(response.status, response.headers.get('Retry-After'))
+                return response.status, text, retry_after
+        except asyncio.TimeoutError:
+            outcome, reason = UploadOutcome.OVERLOAD, "Timeout"
+            failure = "Timeout"
+            if timeout:
+                # A high share of timeouts widens the timeouts again
+                self._timeouts.record_timeout(timeout.sock_read)
+            raise
+        finally:
+            self._concurrency_limiter.release((time.time() - attempt_start) * 1000, outcome, reason)
+            self._record_circuit(failure)
+            async with self._slot_released:
+                self._slot_released.notify_all()
+    
+    async def _acquire_slot(self, deadline: Optional[float]):
+        """Wait for an adaptive concurrency slot, raising asyncio.TimeoutError past the deadline"""
+        async with self._slot_released:
+            while not self._concurrency_limiter.try_acquire():
+                if deadline is None:
+                    await self._slot_released.wait()
+                    continue
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    await asyncio.wait_for(self._slot_released.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+    
+    def _attempt_client_timeout(self, deadline: Optional[float]) -> Optional['aiohttp.ClientTimeout']:
+        """Adaptive timeout of one attempt within the document's deadline (None = client default)"""
+        if deadline is None:
+            return None
+        
+        remaining = max(0.1, deadline - time.monotonic())
+        connect, read = self._timeouts.current(remaining)
+        return aiohttp.ClientTimeout(total=remaining, sock_connect=connect, sock_read=read)
+    
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the event loop thread and async client on first use"""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=loop.run_forever, name="NFE-AsyncUpload", daemon=True
+                )
+                self._loop_thread.start()
+                asyncio.run_coroutine_threadsafe(self._open_client(), loop).result()
+                self._loop = loop
+            return self._loop
+    
+    async def _open_client(self):
+        """Create the aiohttp session and in-flight semaphore inside the loop"""
+        connector = aiohttp.TCPConnector(
+            limit=self._max_in_flight,
+            limit_per_host=self._max_in_flight,
+            keepalive_timeout=30
+        )
+        self._client = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+        self._semaphore = asyncio.Semaphore(self._max_in_flight)
+        self._slot_released = asyncio.Condition()
@@ -0,0 +1,138 @@
+import threading
+from concurrent.futures import Future
+from typing import Optional
+
+from application.interfaces.services import IAPIService
+from domain.entities.nfe_document import NFEDocument
+from domain.entities.validation_result import APIResponse
+from domain.value_objects.api_token import APIToken
+from infrastructure.services.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class CircuitBreakerAPIService(IAPIService):
+    """API service decorator that skips uploads while the API circuit is open
+    
+    Uploads submitted while the circuit is open, or that fail because the API just went
+    down, complete at once with a pending (non-definitive) response: the worker moves on
+    to the next file and the submission stays unacknowledged in the outbox. A background
+    probe checks the API with ``test_connection``; once the circuit closes, the outbox
+    drain resends what was left pending. No upload waits in memory for the API.
+    """
+    
+    def __init__(self, api_service: IAPIService, circuit_breaker: CircuitBreaker):
+        self._api_service = api_service
+        self._circuit_breaker = circuit_breaker
+        
+        self._lock = threading.Lock()
+        self._last_token: Optional[APIToken] = None
+        self._probe_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._probe_wakeup = threading.Event()
+        
+        self._circuit_breaker.add_listener(self._on_circuit_state_changed)
+    
+    def __getattr__(self, name):
+        # Expose limiters and settings of the wrapped service (rate_limiter, max_in_flight, ...)
+        return getattr(self._api_service, name)
+    
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """Circuit breaker guarding the wrapped service"""
+        return self._circuit_breaker
+    
+    def validate_nfe(self, document: NFEDocument, token: APIToken,
+                     idempotency_key: Optional[str] = None) -> APIResponse:
+        """Send NFe document, answering with a pending response if the circuit is open"""
+        return self.submit(document, token, idempotency_key).result()
+    
+    def submit(self, document: NFEDocument, token: APIToken,
+               idempotency_key: Optional[str] = None) -> Future:
+        """Send NFe document, or complete right away with a pending response while the circuit is open"""
+        self._last_token = token
+        future = Future()
+        
+        if not self._circuit_breaker.allow_request():
+            future.set_result(self.pending_response())
+            return future
+        
+        def on_response(api_future: Future):
+            try:
+                response = api_future.result()
+            except Exception as e:
+                future.set_exception(e)
+                return
+            
+            # Uploads that failed because the API went down are reported as pending
+            if self._is_outage_failure(response) and not self._circuit_breaker.allow_request():
+                response = self.pending_response(response.response_time_ms)
+            future.set_result(response)
+        
+        try:
+            self._api_service.submit(document, token, idempotency_key).add_done_callback(on_response)
+        except Exception as e:
+            future.set_exception(e)
+        
+        return future
+    
+    def test_connection(self, token: APIToken) -> bool:
+        """Test API connectivity and token validity"""
+        return self._api_service.test_connection(token)
+    
+    def warm_up(self, connections: Optional[int] = None) -> int:
+        """Open connections ahead of the first request, return how many were opened"""
+        return self._api_service.warm_up(connections)
+    
+    def close(self):
+        """Stop probing and close the wrapped service"""
+        self._stop_event.set()
+        self._probe_wakeup.set()
+        self._api_service.close()
+    
+    @staticmethod
+    def pending_response(response_time_ms: Optional[float] = 0) -> APIResponse:
+        """Response for uploads not sent because the API is down - resent by the outbox drain"""
+        return APIResponse(
+            success=False,
+            message="Servidor da API indisponível (circuito aberto) - envio pendente",
+            data={'pending': True},
+            status_code=None,
+            response_time_ms=response_time_ms
+        )
+    
+    def _probe_loop(self):
+        """Probe the API with test_connection whenever the circuit is open"""
+        while not self._stop_event.is_set():
+            self._probe_wakeup.clear()
+            if self._circuit_breaker.state == CircuitState.CLOSED:
+                self._probe_wakeup.wait()
+                continue
+            
+            wait = self._circuit_breaker.seconds_until_probe()
+            if wait > 0:
+                self._stop_event.wait(wait)
+                continue
+            
+            if not self._circuit_breaker.begin_probe():
+                self._stop_event.wait(0.1)
+                continue
+            
+            healthy = False
+            try:
+                healthy = self._last_token is not None and self._api_service.test_connection(self._last_token)
+            except Exception as e:
+                print(f"[CircuitBreakerAPIService] ⚠️  Erro no teste de conexão: {e}")
+            self._circuit_breaker.end_probe(healthy)
+    
+    def _on_circuit_state_changed(self, state: CircuitState, reason: str):
+        if state == CircuitState.OPEN:
+            with self._lock:
+                if self._probe_thread is None:
+                    self._probe_thread = threading.Thread(
+                        target=self._probe_loop, name="NFE-CircuitProbe", daemon=True
+                    )
+                    self._probe_thread.start()
+            self._probe_wakeup.set()
+    
+    def _is_outage_failure(self, response: APIResponse) -> bool:
+        """Check if a response failed at the transport level or with a server error"""
+        return not response.success and (response.status_code is None or response.status_code >= 500)
@@ -0,0 +1,173 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from application.interfaces.services import IAPIService
+from domain.entities.nfe_document import NFEDocument
+from domain.entities.validation_result import APIResponse
+from domain.value_objects.api_token import APIToken
+
+# document, idempotency key, caller's future
+_QueuedUpload = Tuple[NFEDocument, Optional[str], Future]
+
+
+@dataclass
+class _PendingBatch:
+    """Uploads collected for the next batch request"""
+    token: APIToken
+    deadline: float
+    uploads: List[_QueuedUpload] = field(default_factory=list)
+    size_bytes: int = 0
+
+
+class MicroBatchingAPIService(IAPIService):
+    """API service decorator grouping submitted uploads into batch requests
+    
+    Uploads wait until ``max_documents`` are queued, their files add up to ``max_bytes``,
+    or ``window_ms`` has passed since the first one arrived, then go out together through
+    the wrapped service's ``validate_batch``. Each caller's future gets its own response.
+    """
+    
+    def __init__(self, api_service: IAPIService, max_documents: int = 50,
+                 max_bytes: int = 10 * 1024 * 1024, window_ms: int = 50, send_workers: int = 4):
+        self._api_service = api_service
+        self._max_documents = max(1, max_documents)
+        self._max_bytes = max(1, max_bytes)
+        self._window_seconds = max(0, window_ms) / 1000
+        
+        self._condition = threading.Condition()
+        self._pending: Optional[_PendingBatch] = None
+        self._stopped = False
+        self._window_thread: Optional[threading.Thread] = None
+        self._send_executor = ThreadPoolExecutor(
+            max_workers=max(1, send_workers), thread_name_prefix="NFE-Batch"
+        )
+    
+    def __getattr__(self, name):
+        # Expose limiters and settings of the wrapped service (rate_limiter, circuit_breaker, ...)
+        return getattr(self._api_service, name)
+    
+    @property
+    def max_in_flight(self) -> int:
+        """Uploads callers should keep in flight so batches can fill up"""
+        return max(getattr(self._api_service, 'max_in_flight', 0), 2 * self._max_documents)
+    
+    def validate_nfe(self, document: NFEDocument, token: APIToken,
+                     idempotency_key: Optional[str] = None) -> APIResponse:
+        """Send NFe document with the next batch, blocking until it is answered"""
+        return self.submit(document, token, idempotency_key).result()
+    
+    def submit(self, document: NFEDocument, token: APIToken,
+               idempotency_key: Optional[str] = None) -> Future:
+        """Queue the upload for the next batch and return a future for its response"""
+        future = Future()
+        size = document.file_size
+        
+        ready = []
+        with self._condition:
+            if self._stopped:
+                ready.append(_PendingBatch(token, 0.0, [(document, idempotency_key, future)]))
+            else:
+                # A different token or an oversized batch closes the current one first
+                pending = self._pending
+                if pending and (pending.token != token or pending.size_bytes + size > self._max_bytes):
+                    ready.append(self._take_pending())
+                
+                if self._pending is None:
+                    self._pending = _PendingBatch(token, time.monotonic() + self._window_seconds)
+                    self._ensure_window_thread()
+                self._pending.uploads.append((document, idempotency_key, future))
+                self._pending.size_bytes += size
+                
+                if len(self._pending.uploads) >= self._max_documents:
+                    ready.append(self._take_pending())
+                else:
+                    self._condition.notify()
+        
+        for batch in ready:
+            self._dispatch(batch)
+        return future
+    
+    def validate_batch(self, documents: List[NFEDocument], token: APIToken,
+                       idempotency_keys: Optional[List[Optional[str]]] = None) -> List[APIResponse]:
+        """Send documents that are already grouped straight to the wrapped service"""
+        return self._api_service.validate_batch(documents, token, idempotency_keys)
+    
+    def test_connection(self, token: APIToken) -> bool:
+        """Test API connectivity and token validity"""
+        return self._api_service.test_connection(token)
+    
+    def warm_up(self, connections: Optional[int] = None) -> int:
+        """Open connections ahead of the first request, return how many were opened"""
+        return self._api_service.warm_up(connections)
+    
+    def close(self):
+        """Send the queued batch, stop batching and close the wrapped service"""
+        with self._condition:
+            self._stopped = True
+            batch = self._take_pending()
+            self._condition.notify_all()
+        
+        if batch:
+            self._send(batch)
+        self._send_executor.shutdown(wait=True)
+        self._api_service.close()
+    
+    def _take_pending(self) -> Optional[_PendingBatch]:
+        """Detach the batch being collected (caller holds the condition)"""
+        batch, self._pending = self._pending, None
+        return batch
+    
+    def _ensure_window_thread(self):
+        """Start the thread closing batches at the end of their window (caller holds the condition)"""
+        if self._window_thread is None:
+            self._window_thread = threading.Thread(
+                target=self._window_loop, name="NFE-BatchWindow", daemon=True
+            )
+            self._window_thread.start()
+    
+    def _window_loop(self):
+        """Close the pending batch once its time window has passed"""
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                
+                remaining = self._pending.deadline - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                batch = self._take_pending()
+            
+            self._dispatch(batch)
+    
+    def _dispatch(self, batch: _PendingBatch):
+        """Send a closed batch from the send pool"""
+        try:
+            self._send_executor.submit(self._send, batch)
+        except RuntimeError:
+            # Pool already shut down - send from the calling thread
+            self._send(batch)
+    
+    def _send(self, batch: _PendingBatch):
+        """Upload one batch and hand each caller its own response"""
+        documents = [document for document, _, _ in batch.uploads]
+        keys = [key for _, key, _ in batch.uploads]
+        futures = [future for _, _, future in batch.uploads]
+        
+        try:
+            if len(documents) == 1:
+                responses = [self._api_service.submit(documents[0], batch.token, keys[0]).result()]
+            else:
+                responses = self._api_service.validate_batch(documents, batch.token, keys)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        
+        for future, response in zip(futures, responses):
+            future.set_result(response)
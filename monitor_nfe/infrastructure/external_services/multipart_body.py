@@ -0,0 +1,110 @@
+import copy
+import uuid
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+# zlib window bits per HTTP Content-Encoding
+COMPRESSION_WBITS = {'gzip': 31, 'deflate': 15}
+
+
+class MultipartXmlBody:
+    """Readable multipart/form-data body for XML files
+    
+    The file bytes are referenced, not copied: ``read`` hands out slices of the original
+    buffers between the multipart headers and trailer, so the HTTP client streams exactly
+    the bytes that were on disk. Seekable so the body can be rewound between attempts.
+    """
+    
+    def __init__(self, field_name: str, filename: str, content: bytes,
+                 content_type: str = 'application/xml'):
+        self._init_parts(field_name, [(filename, content, None)], content_type)
+    
+    @classmethod
+    def for_files(cls, field_name: str, files: List[Tuple[str, bytes, Optional[str]]],
+                  content_type: str = 'application/xml') -> 'MultipartXmlBody':
+        """Body with one part per (filename, content, idempotency_key) entry"""
+        body = cls.__new__(cls)
+        body._init_parts(field_name, files, content_type)
+        return body
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Content headers to send with this body"""
+        headers = {'Content-Type': self.content_type}
+        if self.content_encoding:
+            headers['Content-Encoding'] = self.content_encoding
+        return headers
+    
+    def compress(self, encoding: str, level: int = 6) -> 'MultipartXmlBody':
+        """Return a copy of this body with the whole multipart payload compressed"""
+        compressor = zlib.compressobj(level, zlib.DEFLATED, COMPRESSION_WBITS[encoding])
+        compressed = b''.join([compressor.compress(part) for part in self._parts] + [compressor.flush()])
+        
+        body = copy.copy(self)
+        body._parts = [memoryview(compressed)]
+        body._length = len(compressed)
+        body._position = 0
+        body.content_encoding = encoding
+        return body
+    
+    def getbuffer(self) -> memoryview:
+        """Whole body as one buffer (no copy once compressed)"""
+        if len(self._parts) == 1:
+            return self._parts[0]
+        return memoryview(b''.join(self._parts))
+    
+    def read(self, size: int = -1) -> bytes:
+        """Read up to ``size`` bytes of the body"""
+        if size is None or size < 0:
+            size = self._length - self._position
+        
+        chunks = []
+        offset = self._position
+        for part in self._parts:
+            if size <= 0:
+                break
+            if offset >= len(part):
+                offset -= len(part)
+                continue
+            chunk = part[offset:offset + size]
+            chunks.append(chunk)
+            size -= len(chunk)
+            offset = 0
+        
+        data = b''.join(chunks)
+        self._position += len(data)
+        return data
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def seek(self, offset: int, whence: int = 0) -> int:
+        base = {0: 0, 1: self._position, 2: self._length}[whence]
+        self._position = min(max(0, base + offset), self._length)
+        return self._position
+    
+    def _init_parts(self, field_name: str, files: List[Tuple[str, bytes, Optional[str]]],
+                    content_type: str):
+        boundary = uuid.uuid4().hex
+        parts: List[memoryview] = []
+        for index, (filename, content, idempotency_key) in enumerate(files):
+            safe_filename = filename.replace('\\', '\\\\').replace('"', '%22')
+            separator = '\r\n' if index else ''
+            head = (
+                f'{separator}--{boundary}\r\n'
+                f'Content-Disposition: form-data; name="{field_name}"; filename="{safe_filename}"\r\n'
+                f'Content-Type: {content_type}\r\n'
+            )
+            if idempotency_key:
+                head += f'Idempotency-Key: {idempotency_key}\r\n'
+            parts += [memoryview(f'{head}\r\n'.encode('utf-8')), memoryview(content)]
+        parts.append(memoryview(f'\r\n--{boundary}--\r\n'.encode('ascii')))
+        
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        self.content_encoding: Optional[str] = None
+        self._parts = parts
+        self._length = sum(len(part) for part in self._parts)
+        self._position = 0
@@ -0,0 +1,139 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from lxml import etree
+
+from domain.entities.nfe_document import NFEDocument
+from infrastructure.services.xml_parser_factory import load_schema, parse_xml
+from .xml_schema_service import (
+    SCHEMA_FILES, SchemaErrorRecord, XMLSchemaService, collect_schema_errors, validate_while_parsing
+)
+
+# Schemas compiled once by each worker process (see _init_worker)
+_worker_schemas: Dict[str, etree.XMLSchema] = {}
+_worker_options: Dict[str, Any] = {}
+
+
+def _init_worker(schemas_folder: str, single_pass: bool = False, max_errors: int = 0):
+    """Compile every schema once, when the worker process starts"""
+    for schema_key, filename in SCHEMA_FILES.items():
+        schema_path = Path(schemas_folder) / filename
+        if schema_path.exists():
+            _worker_schemas[schema_key] = load_schema(schema_path)
+    _worker_options.update(single_pass=single_pass, max_errors=max_errors)
+
+
+def _validate_in_worker(shm_name: str, size: int, schema_key: str) -> Optional[List[SchemaErrorRecord]]:
+    """Validate the document bytes in shared memory, None when they can't be parsed"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        xml_bytes = bytes(shm.buf[:size])
+    finally:
+        shm.close()
+    
+    schema = _worker_schemas[schema_key]
+    if _worker_options['single_pass']:
+        return validate_while_parsing(xml_bytes, schema, _worker_options['max_errors'])[1]
+    
+    try:
+        xml_doc = parse_xml(xml_bytes)
+    except etree.XMLSyntaxError:
+        return None
+    
+    if schema.validate(xml_doc):
+        return []
+    return collect_schema_errors(schema.error_log, _worker_options['max_errors'])
+
+
+class ProcessPoolXMLSchemaService(XMLSchemaService):
+    """XSD validation on a pool of worker processes, each with its own precompiled schemas
+    
+    Parsing and validating large procNFe files is CPU-bound, so running them on the
+    processing threads serializes them on the interpreter lock. Here the document bytes
+    are copied into shared memory, a worker process parses and validates them, and only
+    compact error records come back (already capped by the worker), so throughput scales
+    with the number of cores.
+    Documents the worker can't parse, or that an earlier stage already parsed, are
+    validated in-thread as before (which also covers the encoding fallback).
+    """
+    
+    def __init__(self, schemas_folder: Optional[Path] = None, processes: Optional[int] = None,
+                 single_pass: bool = False, max_errors: int = 0, fail_fast: bool = False):
+        super().__init__(schemas_folder, single_pass=single_pass, max_errors=max_errors, fail_fast=fail_fast)
+        self._processes = max(1, processes or os.cpu_count() or 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+    
+    def load_schemas(self) -> bool:
+        """Load the schemas and start the workers, so the first documents don't wait for them"""
+        loaded = super().load_schemas()
+        if loaded:
+            try:
+                executor = self._get_executor()
+                for future in [executor.submit(int) for _ in range(self._processes)]:
+                    future.result()
+            except (BrokenProcessPool, OSError) as e:
+                print(f"[ProcessPoolXMLSchemaService] ⚠️ Falha ao iniciar processos de validação: {e}")
+                self._reset_executor()
+        return loaded
+    
+    def close(self):
+        """Stop the worker processes"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _validate_document(self, document: NFEDocument, schema_key: str) -> Optional[List[SchemaErrorRecord]]:
+        """Validate in a worker process, in-thread when the tree is already here or the worker can't parse"""
+        context = document.get_context()
+        if context.raw_bytes is None or context.root is not None:
+            return super()._validate_document(document, schema_key)
+        
+        try:
+            errors = self._validate_in_pool(context.raw_bytes, schema_key)
+        except (BrokenProcessPool, OSError) as e:
+            print(f"[ProcessPoolXMLSchemaService] ⚠️ Processos de validação indisponíveis, validando na thread: {e}")
+            self._reset_executor()
+            errors = None
+        
+        if errors is None:
+            return super()._validate_document(document, schema_key)
+        return errors
+    
+    def _validate_in_pool(self, xml_bytes: bytes, schema_key: str) -> Optional[List[SchemaErrorRecord]]:
+        """Hand the bytes to a worker through shared memory and wait for its error records"""
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(xml_bytes)))
+        try:
+            shm.buf[:len(xml_bytes)] = xml_bytes
+            future = self._get_executor().submit(_validate_in_worker, shm.name, len(xml_bytes), schema_key)
+            return future.result()
+        finally:
+            shm.close()
+            shm.unlink()
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the worker pool on first use"""
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs Qt and network threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._processes,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(str(self._schemas_folder), self._single_pass, self._max_errors)
+                )
+                print(f"[ProcessPoolXMLSchemaService] {self._processes} processo(s) de validação XSD")
+            return self._executor
+    
+    def _reset_executor(self):
+        """Drop a broken pool so the next document starts a fresh one"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -1,81 +1,466 @@
+import copy
+import json
+import re
 import requests
+import threading
 import time
-from pathlib import Path
-from typing import Optional, Dict, Any
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from typing import Optional, Dict, Any, Callable, List, Tuple, Union
+from requests.adapters import HTTPAdapter
 
 from application.interfaces.services import IAPIService
 from domain.entities.nfe_document import NFEDocument
 from domain.entities.validation_result import APIResponse
 from domain.value_objects.api_token import APIToken
+from infrastructure.external_services.multipart_body import COMPRESSION_WBITS, MultipartXmlBody
+from infrastructure.services.adaptive_concurrency_limiter import AdaptiveConcurrencyLimiter, UploadOutcome
+from infrastructure.services.adaptive_timeouts import AdaptiveTimeouts
+from infrastructure.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from infrastructure.services.retry_scheduler import RetryBudget, RetryScheduler, backoff_delay
+from infrastructure.services.token_bucket_rate_limiter import TokenBucketRateLimiter, parse_retry_after
+
+
+# Optional UTF-8 BOM and leading whitespace before the XML declaration
+_XML_PREFIX_PATTERN = re.compile(rb'(?:\xef\xbb\xbf)?\s*')
+
+# Upload size limit accepted by the API (5MB)
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+
+# Timeout of batch requests, whose latency per-document percentiles do not describe
+BATCH_TIMEOUT_SECONDS = 30
+
+# requests timeout: seconds, or (connect, read)
+RequestTimeout = Union[float, Tuple[float, float]]
 
 
 class ValidaNFeAPIService(IAPIService):
     """ValidaNFe API service implementation"""
     
-    def __init__(self, base_url: str = "https://api.validanfe.com"):
+    def __init__(self, base_url: str = "https://api.validanfe.com", pool_size: int = 10,
+                 concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 upload_compression: Optional[str] = None,
+                 retry_budget: Optional[RetryBudget] = None,
+                 upload_deadline_seconds: float = 60.0,
+                 hedge_uploads: bool = False):
         self.base_url = base_url
         self.guarda_endpoint = "/GuardaNFe/EnviarXml"
+        self.batch_endpoint = "/GuardaNFe/EnviarXmlLote"
+        # None until the first batch tells whether the server accepts several documents per request
+        self._batch_supported: Optional[bool] = None
+        self._pool_size = max(1, pool_size)
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+        # Sync uploads are bounded by the caller's threads and the connection pool, so the
+        # limit can only back off under overload here - it grows only in async mode
+        self._concurrency_limiter = concurrency_limiter or AdaptiveConcurrencyLimiter(
+            initial_limit=self._pool_size,
+            max_limit=self._pool_size
+        )
+        # Without a shared limiter only Retry-After pauses apply
+        self._rate_limiter = rate_limiter or TokenBucketRateLimiter(rate_per_second=0)
+        self._circuit_breaker = circuit_breaker
+        
+        # Retries wait in the scheduler instead of sleeping on the thread that sent the attempt
+        self._retry_budget = retry_budget or RetryBudget()
+        self._retry_scheduler = RetryScheduler(workers=self._pool_size)
+        
+        # Every attempt of a document shares one deadline; timeouts follow observed latency
+        self._upload_deadline_seconds = max(1.0, upload_deadline_seconds)
+        self._timeouts = AdaptiveTimeouts()
+        self._hedge_uploads = hedge_uploads
+        
+        # Request body compression ('gzip' or 'deflate'), only when the API side accepts it
+        self._upload_compression = upload_compression if upload_compression in COMPRESSION_WBITS else None
+        self._compression_lock = threading.Lock()
+        self._compression_totals = {'documents': 0, 'original_bytes': 0, 'compressed_bytes': 0, 'time_ms': 0.0}
+    
+    @property
+    def pool_size(self) -> int:
+        """Maximum number of keep-alive connections kept per host"""
+        return self._pool_size
+    
+    @property
+    def max_in_flight(self) -> int:
+        """Uploads callers should keep in flight so documents waiting for a retry do not hold a worker"""
+        return 4 * self._pool_size
+    
+    @property
+    def concurrency_limiter(self) -> AdaptiveConcurrencyLimiter:
+        """Adaptive limiter bounding concurrent upload attempts"""
+        return self._concurrency_limiter
+    
+    @property
+    def rate_limiter(self) -> TokenBucketRateLimiter:
+        """Token bucket shared by every request sent to the API"""
+        return self._rate_limiter
+    
+    @property
+    def circuit_breaker(self) -> Optional[CircuitBreaker]:
+        """Circuit breaker fed by every upload attempt, if any"""
+        return self._circuit_breaker
     
-    def validate_nfe(self, document: NFEDocument, token: APIToken) -> APIResponse:
+    @property
+    def retry_budget(self) -> RetryBudget:
+        """Budget capping retries across every upload"""
+        return self._retry_budget
+    
+    @property
+    def timeouts(self) -> AdaptiveTimeouts:
+        """Connect and read timeouts learned from upload latencies"""
+        return self._timeouts
+    
+    @property
+    def upload_compression(self) -> Optional[str]:
+        """Content-Encoding used for upload bodies (None = uncompressed)"""
+        return self._upload_compression
+    
+    def compression_stats(self) -> Dict[str, Any]:
+        """Get upload compression metrics (ratio and time spent compressing)"""
+        with self._compression_lock:
+            totals = dict(self._compression_totals)
+        
+        documents = totals['documents']
+        return {
+            'encoding': self._upload_compression,
+            'documents': documents,
+            'original_bytes': totals['original_bytes'],
+            'compressed_bytes': totals['compressed_bytes'],
+            'ratio': totals['original_bytes'] / totals['compressed_bytes'] if totals['compressed_bytes'] else 0.0,
+            'avg_time_ms': totals['time_ms'] / documents if documents else 0.0
+        }
+    
+    def validate_nfe(self, document: NFEDocument, token: APIToken,
+                     idempotency_key: Optional[str] = None) -> APIResponse:
         """Send NFe document to ValidaNFe API for validation"""
+        return self.submit(document, token, idempotency_key).result()
+    
+    def submit(self, document: NFEDocument, token: APIToken,
+               idempotency_key: Optional[str] = None) -> Future:
+        """Send NFe document and return a future for the APIResponse
+        
+        The first attempt runs on the calling thread. Retries wait in the retry scheduler,
+        so the caller moves on to other documents as soon as an attempt fails temporarily.
+        """
         start_time = time.time()
+        future = Future()
         
         try:
-            # Check if file exists
-            if not document.exists():
-                return APIResponse(
-                    success=False,
-                    message=f"Arquivo não encontrado: {document.filename}",
-                    status_code=None,
-                    response_time_ms=0
-                )
-            
-            # Read XML file content
-            xml_content = self._read_xml_content(document.file_path)
-            if not xml_content:
-                return APIResponse(
-                    success=False,
-                    message="Não foi possível ler o conteúdo do arquivo XML",
-                    status_code=None,
-                    response_time_ms=0
-                )
+            # Read and check XML content before uploading
+            xml_content, rejection = self._prepare_upload(document)
+            if rejection:
+                future.set_result(rejection)
+                return future
             
-            # Validate XML content
-            validation_error = self._validate_xml_content(xml_content)
-            if validation_error:
-                return APIResponse(
-                    success=False,
-                    message=validation_error,
-                    status_code=None,
-                    response_time_ms=0
-                )
-            
-            # Check file size limit (5MB)
-            if len(xml_content) > 5 * 1024 * 1024:
-                return APIResponse(
-                    success=False,
-                    message="Arquivo muito grande (limite 5MB)",
-                    status_code=None,
-                    response_time_ms=0
-                )
-            
-            # Prepare API request
-            headers = {'X-API-KEY': str(token)}
-            files = {
-                'xmlFile': (document.filename, xml_content, 'application/xml')
-            }
+            # Prepare API request - the multipart body streams the original file bytes
+            headers = self._request_headers(token, idempotency_key)
+            body = MultipartXmlBody('xmlFile', document.filename, xml_content)
+            if self._upload_compression:
+                body = self._compress_body(body)
             url = f"{self.base_url}{self.guarda_endpoint}"
             
             # Log API request details for debugging
             print(f"[ValidaNFeAPIService] API Request: {url}")
             print(f"[ValidaNFeAPIService] Headers: {{'X-API-KEY': '[TOKEN]'}}")
             print(f"[ValidaNFeAPIService] Sending as multipart/form-data with xmlFile field")
-            print(f"[ValidaNFeAPIService] XML content length: {len(xml_content)} chars")
-            print(f"[ValidaNFeAPIService] XML starts with: {xml_content[:100]}...")
+            print(f"[ValidaNFeAPIService] XML content length: {len(xml_content)} bytes")
+            print(f"[ValidaNFeAPIService] XML starts with: {xml_content[:100].decode('utf-8', errors='replace')}...")
             print(f"[ValidaNFeAPIService] File name: {document.filename}")
             
-            # Make API request with retry logic
-            response = self._make_request_with_retry(url, files, headers)
+            # Make API request with retry logic, every attempt within the document's deadline
+            deadline = time.monotonic() + self._upload_deadline_seconds
+            self._make_request_with_retry(
+                url, body, headers, deadline=deadline, hedge=self._hedge_uploads
+            ).add_done_callback(
+                lambda request_future: future.set_result(self._response_from_request(request_future, start_time))
+            )
+        
+        except Exception as e:
+            future.set_result(self._unexpected_error_response(e, start_time))
+        
+        return future
+    
+    def validate_batch(self, documents: List[NFEDocument], token: APIToken,
+                       idempotency_keys: Optional[List[Optional[str]]] = None) -> List[APIResponse]:
+        """Send several NFe documents in one multipart request, one APIResponse per document
+        
+        Falls back to pipelined single uploads when the server has no batch endpoint or its
+        answer cannot be matched to the documents sent.
+        """
+        keys = list(idempotency_keys) if idempotency_keys else [None] * len(documents)
+        if len(documents) <= 1 or self._batch_supported is False:
+            return self._upload_individually(documents, token, keys)
+        
+        start_time = time.time()
+        responses: List[Optional[APIResponse]] = [None] * len(documents)
+        files = []
+        batch_indexes = []
+        
+        # Documents that cannot be sent get their rejection, the rest share one request
+        for index, document in enumerate(documents):
+            xml_content, rejection = self._prepare_upload(document)
+            if rejection:
+                responses[index] = rejection
+                continue
+            files.append((document.filename, xml_content, keys[index]))
+            batch_indexes.append(index)
+        
+        if files:
+            batch_responses = self._post_batch(files, token, start_time)
+            if batch_responses is None:
+                batch_responses = self._upload_individually(
+                    [documents[index] for index in batch_indexes], token, [keys[index] for index in batch_indexes]
+                )
+            for index, response in zip(batch_indexes, batch_responses):
+                responses[index] = response
+        
+        return responses
+    
+    def test_connection(self, token: APIToken) -> bool:
+        """Test API connectivity and token validity"""
+        try:
+            # Use a simple endpoint or create a minimal test request
+            # For now, we'll use a HEAD request to the base URL
+            headers = {'X-API-KEY': str(token)}
+            response = self._get_session().head(self.base_url, headers=headers, timeout=10)
+            return response.status_code < 500  # Accept any non-server-error
+        except Exception:
+            return False
+    
+    def warm_up(self, connections: Optional[int] = None) -> int:
+        """Open pooled keep-alive connections so the first uploads skip the TCP/TLS handshake"""
+        count = min(connections or self._pool_size, self._pool_size)
+        session = self._get_session()
+        
+        def open_connection(_) -> bool:
+            try:
+                # Concurrent requests force the pool to open one connection each
+                session.head(self.base_url, timeout=10)
+                return True
+            except requests.exceptions.RequestException:
+                return False
+        
+        with ThreadPoolExecutor(max_workers=count, thread_name_prefix="API-Warmup") as executor:
+            opened = sum(executor.map(open_connection, range(count)))
+        
+        print(f"[ValidaNFeAPIService] 🔌 Conexões pré-aquecidas: {opened}/{count}")
+        return opened
+    
+    def close(self):
+        """Send scheduled retries, then close the pooled session and its keep-alive connections"""
+        self._retry_scheduler.close()
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+    
+    def _get_session(self) -> requests.Session:
+        """Get the shared pooled session, creating it on first use"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    # One pool per host, each holding up to pool_size keep-alive connections
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self._pool_size)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers.update({'Connection': 'keep-alive'})
+                    self._session = session
+        return self._session
+    
+    def _read_xml_content(self, document: NFEDocument) -> Optional[bytes]:
+        """Get the XML file's raw bytes, reusing the ones already read for validation"""
+        try:
+            return document.read_bytes()
+        except OSError:
+            return None
+    
+    def _validate_xml_content(self, xml_content: bytes) -> Optional[str]:
+        """Validate XML bytes and return error message if invalid"""
+        # Byte-level checks - no decoding and no stripped copy of the content
+        start = _XML_PREFIX_PATTERN.match(xml_content).end() if xml_content else 0
+        if not xml_content or len(xml_content) - start < 10:
+            return "Arquivo XML vazio ou muito pequeno"
+        
+        if not xml_content.startswith(b'<?xml', start):
+            return "Arquivo não é um XML válido (sem declaração XML)"
+        
+        if b'<NFe' not in xml_content and b'<nfeProc' not in xml_content:
+            return "Arquivo não parece ser uma NFe válida"
+        
+        return None
+    
+    def _prepare_upload(self, document: NFEDocument) -> Tuple[Optional[bytes], Optional[APIResponse]]:
+        """Read XML bytes for upload, returning a rejection response when it cannot be sent"""
+        # Check if file exists
+        if not document.exists():
+            return None, APIResponse(
+                success=False,
+                message=f"Arquivo não encontrado: {document.filename}",
+                status_code=None,
+                response_time_ms=0
+            )
+        
+        # Check file size limit (5MB) before reading anything
+        if document.file_size > MAX_UPLOAD_BYTES:
+            return None, APIResponse(
+                success=False,
+                message="Arquivo muito grande (limite 5MB)",
+                status_code=None,
+                response_time_ms=0
+            )
+        
+        # Read XML file content
+        xml_content = self._read_xml_content(document)
+        if not xml_content:
+            return None, APIResponse(
+                success=False,
+                message="Não foi possível ler o conteúdo do arquivo XML",
+                status_code=None,
+                response_time_ms=0
+            )
+        
+        # Validate XML content
+        validation_error = self._validate_xml_content(xml_content)
+        if validation_error:
+            return None, APIResponse(
+                success=False,
+                message=validation_error,
+                status_code=None,
+                response_time_ms=0
+            )
+        
+        return xml_content, None
+    
+    def _request_headers(self, token: APIToken, idempotency_key: Optional[str]) -> Dict[str, str]:
+        """Build upload headers, tagging resends of the same submission with its idempotency key"""
+        headers = {'X-API-KEY': str(token)}
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
+        return headers
+    
+    def _compress_body(self, body: MultipartXmlBody) -> MultipartXmlBody:
+        """Compress an upload body and record ratio and time"""
+        start = time.perf_counter()
+        compressed = body.compress(self._upload_compression)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        with self._compression_lock:
+            self._compression_totals['documents'] += 1
+            self._compression_totals['original_bytes'] += len(body)
+            self._compression_totals['compressed_bytes'] += len(compressed)
+            self._compression_totals['time_ms'] += elapsed_ms
+        
+        print(f"[ValidaNFeAPIService] 🗜️  {self._upload_compression}: {len(body)} → {len(compressed)} bytes "
+              f"({len(body) / max(1, len(compressed)):.1f}x em {elapsed_ms:.1f}ms)")
+        return compressed
+    
+    def _upload_individually(self, documents: List[NFEDocument], token: APIToken,
+                             keys: List[Optional[str]]) -> List[APIResponse]:
+        """Pipeline single uploads over the pooled connections
+        
+        The pool only runs first attempts (``submit``); retries wait in the retry scheduler
+        instead of holding a pool thread through the backoff.
+        """
+        if len(documents) <= 1:
+            return [self.submit(document, token, key).result() for document, key in zip(documents, keys)]
+        
+        workers = min(len(documents), self._pool_size)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="API-Batch") as executor:
+            futures = list(executor.map(self.submit, documents, [token] * len(documents), keys))
+        return [future.result() for future in futures]
+    
+    def _post_batch(self, files: List[Tuple[str, bytes, Optional[str]]], token: APIToken,
+                    start_time: float) -> Optional[List[APIResponse]]:
+        """Upload files in one request, None when the server cannot answer per document"""
+        body = MultipartXmlBody.for_files('xmlFiles', files)
+        if self._upload_compression:
+            body = self._compress_body(body)
+        url = f"{self.base_url}{self.batch_endpoint}"
+        print(f"[{type(self).__name__}] 📦 Lote: {len(files)} documento(s), {len(body)} bytes")
+        
+        try:
+            status_code, text = self._send_batch_request(url, body, {'X-API-KEY': str(token)})
+        except CircuitOpenError:
+            return [self._circuit_open_response((time.time() - start_time) * 1000)] * len(files)
+        response_time_ms = (time.time() - start_time) * 1000
+        
+        if status_code is None:
+            failure = APIResponse(success=False, message=text, status_code=None, response_time_ms=response_time_ms)
+            return [failure] * len(files)
+        
+        # No batch endpoint on this server - stop trying and upload one by one from now on
+        if status_code in [404, 405, 501]:
+            self._batch_supported = False
+            print(f"[{type(self).__name__}] 📦 HTTP {status_code} - servidor não aceita lotes, enviando individualmente")
+            return None
+        
+        # Batch too large for the server: send these documents one by one
+        if status_code == 413:
+            return None
+        
+        if status_code != 200:
+            return [self._build_api_response(status_code, text, response_time_ms) for _ in files]
+        
+        results = self._demultiplex_batch(text, [filename for filename, _, _ in files])
+        if results is None:
+            print(f"[{type(self).__name__}] ⚠️  Resposta do lote não identifica os documentos, enviando individualmente")
+            return None
+        
+        self._batch_supported = True
+        return [self._build_api_response(status, item_text, response_time_ms) for status, item_text in results]
+    
+    def _send_batch_request(self, url: str, body: MultipartXmlBody,
+                            headers: Dict[str, str]) -> Tuple[Optional[int], str]:
+        """POST a batch body, returning (status, text) or (None, error message) on transport failure"""
+        try:
+            response = self._make_request_with_retry(url, body, headers).result()
+            return response.status_code, response.text
+        except requests.exceptions.Timeout:
+            return None, "Timeout na conexão com a API"
+        except requests.exceptions.ConnectionError:
+            return None, "Erro de conexão com a API"
+        except requests.exceptions.RequestException as e:
+            # Any other transport failure (TooManyRedirects, ChunkedEncodingError, ...) fails
+            # each document in the batch instead of escaping to the caller
+            return None, f"Erro na requisição à API: {str(e)[:100]}"
+    
+    def _demultiplex_batch(self, text: str, filenames: List[str]) -> Optional[List[Tuple[int, str]]]:
+        """Split a batch answer into (status, item JSON) per file, in the order files were sent
+        
+        Accepts a JSON list, or an object with ``results``/``resultados``, holding one item
+        per file with ``status``/``statusCode`` and optionally ``fileName``/``arquivo``.
+        """
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return None
+        
+        items = data.get('results', data.get('resultados')) if isinstance(data, dict) else data
+        if not isinstance(items, list) or len(items) != len(filenames):
+            return None
+        if not all(isinstance(item, dict) for item in items):
+            return None
+        
+        # Match by file name when every item carries a unique one, otherwise by position
+        names = [item.get('fileName', item.get('arquivo')) for item in items]
+        if len(set(filenames)) == len(filenames) and sorted(map(str, names)) == sorted(filenames):
+            by_name = dict(zip(names, items))
+            items = [by_name[filename] for filename in filenames]
+        
+        results = []
+        for item in items:
+            status = item.get('status', item.get('statusCode'))
+            if not isinstance(status, int):
+                return None
+            results.append((status, json.dumps(item)))
+        return results
+    
+    def _response_from_request(self, request_future: Future, start_time: float) -> APIResponse:
+        """Map the outcome of an upload, retries included, to an APIResponse"""
+        try:
+            response = request_future.result()
             
             # Log response for debugging
             print(f"[ValidaNFeAPIService] API Response: {response.status_code}")
@@ -90,62 +475,10 @@ class ValidaNFeAPIService(IAPIService):
             response_time_ms = (end_time - start_time) * 1000
             
             # Process response
-            if response.status_code == 200:
-                try:
-                    response_data = response.json()
-                    return APIResponse(
-                        success=True,
-                        message="NFe enviada com sucesso",
-                        data=response_data,
-                        status_code=response.status_code,
-                        response_time_ms=response_time_ms
-                    )
-                except ValueError:
-                    # Response is not JSON
-                    return APIResponse(
-                        success=True,
-                        message="NFe enviada com sucesso (resposta não-JSON)",
-                        data={"raw_response": response.text[:200]},
-                        status_code=response.status_code,
-                        response_time_ms=response_time_ms
-                    )
-            else:
-                # API error - handle specific status codes
-                if response.status_code == 401:
-                    error_message = "Token inválido/expirado"
-                elif response.status_code == 400:
-                    error_message = f"Validação falhou: {response.text[:100] if response.text else 'Dados inválidos'}"
-                elif response.status_code == 404:
-                    error_message = "Endpoint não encontrado (404) - Verifique a URL da API"
-                elif response.status_code == 409:
-                    # NFe já existe - isso pode ser considerado sucesso
-                    return APIResponse(
-                        success=True,
-                        message="NFe já foi enviada anteriormente",
-                        data={"raw_response": response.text[:200]} if response.text else None,
-                        status_code=response.status_code,
-                        response_time_ms=response_time_ms
-                    )
-                elif response.status_code == 429:
-                    error_message = "API sobrecarregada - tente novamente mais tarde"
-                elif response.status_code == 500:
-                    error_message = "Erro interno do servidor (500)"
-                elif response.status_code == 502:
-                    error_message = "Bad Gateway (502) - Servidor indisponível temporariamente"
-                elif response.status_code == 503:
-                    error_message = "Service Unavailable (503) - Servidor sobrecarregado temporariamente"
-                elif response.status_code == 504:
-                    error_message = "Gateway Timeout (504) - Timeout no servidor"
-                else:
-                    error_message = self._extract_error_message(response)
-                
-                return APIResponse(
-                    success=False,
-                    message=error_message,
-                    data={"raw_response": response.text[:200]} if response.text else None,
-                    status_code=response.status_code,
-                    response_time_ms=response_time_ms
-                )
+            return self._build_api_response(response.status_code, response.text, response_time_ms)
+        
+        except CircuitOpenError:
+            return self._circuit_open_response((time.time() - start_time) * 1000)
                 
         except requests.exceptions.Timeout:
             end_time = time.time()
@@ -168,114 +501,320 @@ class ValidaNFeAPIService(IAPIService):
             )
             
         except Exception as e:
-            end_time = time.time()
-            response_time_ms = (end_time - start_time) * 1000
-            return APIResponse(
-                success=False,
-                message=f"Erro inesperado: {str(e)[:100]}",
-                status_code=None,
-                response_time_ms=response_time_ms
-            )
+            return self._unexpected_error_response(e, start_time)
     
-    def test_connection(self, token: APIToken) -> bool:
-        """Test API connectivity and token validity"""
-        try:
-            # Use a simple endpoint or create a minimal test request
-            # For now, we'll use a HEAD request to the base URL
-            headers = {'X-API-KEY': str(token)}
-            response = requests.head(self.base_url, headers=headers, timeout=10)
-            return response.status_code < 500  # Accept any non-server-error
-        except Exception:
-            return False
+    def _unexpected_error_response(self, error: Exception, start_time: float) -> APIResponse:
+        """Response for uploads that failed with an unexpected error"""
+        end_time = time.time()
+        response_time_ms = (end_time - start_time) * 1000
+        return APIResponse(
+            success=False,
+            message=f"Erro inesperado: {str(error)[:100]}",
+            status_code=None,
+            response_time_ms=response_time_ms
+        )
     
-    def _read_xml_content(self, file_path: Path) -> Optional[str]:
-        """Read XML file content with multiple encoding attempts"""
-        encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-        
-        for encoding in encodings:
-            try:
-                return file_path.read_text(encoding=encoding)
-            except UnicodeDecodeError:
-                continue
-            except Exception:
-                break
-        
-        return None
+    def _circuit_open_response(self, response_time_ms: float) -> APIResponse:
+        """Response for uploads skipped because the API circuit is open"""
+        return APIResponse(
+            success=False,
+            message="Servidor da API indisponível (circuito aberto)",
+            status_code=None,
+            response_time_ms=response_time_ms
+        )
     
-    def _validate_xml_content(self, xml_content: str) -> Optional[str]:
-        """Validate XML content and return error message if invalid"""
-        if not xml_content or len(xml_content.strip()) < 10:
-            return "Arquivo XML vazio ou muito pequeno"
-        
-        xml_stripped = xml_content.strip()
-        if not xml_stripped.startswith('<?xml'):
-            return "Arquivo não é um XML válido (sem declaração XML)"
+    def _record_circuit(self, failure_reason: Optional[str]):
+        """Feed one upload attempt's outcome to the circuit breaker"""
+        if self._circuit_breaker is None:
+            return
+        if failure_reason:
+            self._circuit_breaker.record_failure(failure_reason)
+        else:
+            self._circuit_breaker.record_success()
+    
+    def _build_api_response(self, status_code: int, text: str, response_time_ms: float) -> APIResponse:
+        """Map an HTTP status and body to an APIResponse"""
+        if status_code == 200:
+            try:
+                response_data = json.loads(text)
+                return APIResponse(
+                    success=True,
+                    message="NFe enviada com sucesso",
+                    data=response_data,
+                    status_code=status_code,
+                    response_time_ms=response_time_ms
+                )
+            except ValueError:
+                # Response is not JSON
+                return APIResponse(
+                    success=True,
+                    message="NFe enviada com sucesso (resposta não-JSON)",
+                    data={"raw_response": text[:200]},
+                    status_code=status_code,
+                    response_time_ms=response_time_ms
+                )
         
-        if '<NFe' not in xml_content and '<nfeProc' not in xml_content:
-            return "Arquivo não parece ser uma NFe válida"
+        # API error - handle specific status codes
+        if status_code == 401:
+            error_message = "Token inválido/expirado"
+        elif status_code == 400:
+            error_message = f"Validação falhou: {text[:100] if text else 'Dados inválidos'}"
+        elif status_code == 404:
+            error_message = "Endpoint não encontrado (404) - Verifique a URL da API"
+        elif status_code == 409:
+            # NFe já existe - isso pode ser considerado sucesso
+            return APIResponse(
+                success=True,
+                message="NFe já foi enviada anteriormente",
+                data={"raw_response": text[:200]} if text else None,
+                status_code=status_code,
+                response_time_ms=response_time_ms
+            )
+        elif status_code == 429:
+            error_message = "API sobrecarregada - tente novamente mais tarde"
+        elif status_code == 500:
+            error_message = "Erro interno do servidor (500)"
+        elif status_code == 502:
+            error_message = "Bad Gateway (502) - Servidor indisponível temporariamente"
+        elif status_code == 503:
+            error_message = "Service Unavailable (503) - Servidor sobrecarregado temporariamente"
+        elif status_code == 504:
+            error_message = "Gateway Timeout (504) - Timeout no servidor"
+        else:
+            error_message = self._extract_error_message(status_code, text)
         
-        return None
+        return APIResponse(
+            success=False,
+            message=error_message,
+            data={"raw_response": text[:200]} if text else None,
+            status_code=status_code,
+            response_time_ms=response_time_ms
+        )
     
-    def _extract_error_message(self, response: requests.Response) -> str:
+    def _extract_error_message(self, status_code: int, text: str) -> str:
         """Extract error message from API response"""
         try:
-            if response.text:
+            if text:
                 # Try to parse as JSON first
                 try:
-                    error_data = response.json()
+                    error_data = json.loads(text)
                     if isinstance(error_data, dict):
-                        return error_data.get('message', error_data.get('error', f"Erro HTTP {response.status_code}"))
+                        return error_data.get('message', error_data.get('error', f"Erro HTTP {status_code}"))
                 except ValueError:
                     pass
                 
                 # Return first part of text response
-                return f"Erro HTTP {response.status_code}: {response.text[:100]}"
+                return f"Erro HTTP {status_code}: {text[:100]}"
             else:
-                return f"Erro HTTP {response.status_code}"
+                return f"Erro HTTP {status_code}"
         except Exception:
-            return f"Erro HTTP {response.status_code}"
+            return f"Erro HTTP {status_code}"
+    
+    def _classify_status(self, status_code: int) -> Tuple[UploadOutcome, Optional[str]]:
+        """Classify an HTTP status for the adaptive concurrency limiter"""
+        if status_code in [429, 503, 504]:
+            return UploadOutcome.OVERLOAD, f"HTTP {status_code}"
+        if status_code >= 500:
+            return UploadOutcome.ERROR, f"HTTP {status_code}"
+        return UploadOutcome.SUCCESS, None
+    
+    def _apply_retry_after(self, status_code: int, retry_after: Optional[str]) -> Optional[float]:
+        """Pause every request when the API answers 429/503 with a Retry-After header"""
+        if status_code not in [429, 503]:
+            return None
+        
+        seconds = parse_retry_after(retry_after)
+        if seconds:
+            self._rate_limiter.pause(seconds, f"HTTP {status_code} Retry-After")
+        return seconds
+    
+    def _post_with_limit(self, url, body: MultipartXmlBody, headers, deadline: Optional[float] = None,
+                         on_start: Optional[Callable[[], None]] = None) -> requests.Response:
+        """Make one POST attempt after taking a rate token, holding an adaptive concurrency slot
+        
+        With a ``deadline`` (time.monotonic) both the wait for a slot and the request end by
+        then, the request using the adaptive timeouts. ``on_start`` is called once the slot
+        is held, right before the request goes out.
+        """
+        remaining = deadline - time.monotonic() if deadline is not None else None
+        if not self._rate_limiter.acquire(remaining):
+            raise requests.exceptions.Timeout("Prazo do documento esgotado aguardando vez na taxa de envio")
+        if self._circuit_breaker:
+            self._circuit_breaker.check()
+        
+        remaining = deadline - time.monotonic() if deadline is not None else None
+        if not self._concurrency_limiter.acquire(remaining):
+            raise requests.exceptions.Timeout("Prazo do documento esgotado aguardando vaga de envio")
+        attempt_start = time.time()
+        timeout = self._attempt_timeout(deadline)
+        if on_start:
+            on_start()
+        outcome, reason = UploadOutcome.ERROR, None
+        failure = "Erro de conexão"
+        
+        try:
+            # Each attempt streams the body from the start
+            body.seek(0)
+            response = self._get_session().post(
+                url,
+                data=body,
+                headers={**headers, **body.headers},
+                timeout=timeout
+            )
+            if deadline is not None:
+                self._timeouts.record(response.elapsed.total_seconds())
+            outcome, reason = self._classify_status(response.status_code)
+            failure = f"HTTP {response.status_code}" if response.status_code >= 500 else None
+            self._apply_retry_after(response.status_code, response.headers.get('Retry-After'))
+            return response
+        except requests.exceptions.Timeout:
+            outcome, reason = UploadOutcome.OVERLOAD, "Timeout"
+            failure = "Timeout"
+            if deadline is not None:
+                # A high share of timeouts widens the timeouts again
+                self._timeouts.record_timeout(timeout[1])
+            raise
+        finally:
+            self._concurrency_limiter.release((time.time() - attempt_start) * 1000, outcome, reason)
+            self._record_circuit(failure)
     
-    def _make_request_with_retry(self, url, files, headers, max_retries=3):
-        """Make HTTP request with retry logic for temporary server errors"""
-        import time
+    def _make_request_with_retry(self, url, body: MultipartXmlBody, headers, max_retries=3,
+                                 deadline: Optional[float] = None, hedge: bool = False) -> Future:
+        """Make HTTP request with retry logic for temporary server errors
         
-        for attempt in range(max_retries + 1):
+        Returns a future for the final response. Retries are scheduled with jittered
+        exponential backoff within the retry budget instead of sleeping on this thread.
+        With a ``deadline`` (time.monotonic) attempts use the adaptive timeouts, cut to the
+        time left, and no retry starts after it; ``hedge`` also sends a second copy of a
+        first attempt still unanswered after the observed p99.
+        """
+        future = Future()
+        self._attempt_request(url, body, headers, future, 0, max_retries, deadline, hedge)
+        return future
+    
+    def _attempt_request(self, url, body: MultipartXmlBody, headers, future: Future, attempt: int,
+                         max_retries: int, deadline: Optional[float] = None, hedge: bool = False):
+        """Make one attempt, then resolve the future or schedule the next attempt"""
+        # A hedged copy may already have answered
+        if future.done():
+            return
+        
+        print(f"[ValidaNFeAPIService] 🌐 Tentativa {attempt + 1}/{max_retries + 1}")
+        if attempt == 0:
+            self._retry_budget.record_request()
+        
+        try:
+            answered = threading.Event()
+            # The p99 clock starts once the attempt is sent, not while it waits for a slot
+            on_start = (lambda: self._schedule_hedge(url, body, headers, future, deadline, answered)) if hedge else None
             try:
-                print(f"[ValidaNFeAPIService] 🌐 Tentativa {attempt + 1}/{max_retries + 1}")
-                response = requests.post(url, files=files, headers=headers, timeout=30)
-                
-                # If success or permanent error, return immediately
-                if response.status_code < 500 or response.status_code in [500]:
-                    return response
-                
-                # If temporary error (502, 503, 504) and not last attempt, retry
-                if response.status_code in [502, 503, 504] and attempt < max_retries:
-                    wait_time = (2 ** attempt)  # Exponential backoff: 1s, 2s, 4s
-                    print(f"[ValidaNFeAPIService] ⏰ HTTP {response.status_code} - Retry em {wait_time}s...")
-                    print(f"[ValidaNFeAPIService]    Motivo: {response.text[:100] if response.text else 'Servidor indisponível'}")
-                    time.sleep(wait_time)
-                    continue
-                
-                return response
-                
-            except requests.exceptions.Timeout:
-                if attempt < max_retries:
-                    wait_time = (2 ** attempt)
-                    print(f"[ValidaNFeAPIService] ⏰ Timeout - Retry em {wait_time}s...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    raise
+                response = self._post_with_limit(url, body, headers, deadline, on_start)
+            finally:
+                answered.set()
             
-            except requests.exceptions.ConnectionError as e:
-                if attempt < max_retries and ("connection" in str(e).lower() or "reset" in str(e).lower()):
-                    wait_time = (2 ** attempt)
-                    print(f"[ValidaNFeAPIService] ⏰ Erro de conexão - Retry em {wait_time}s...")
-                    print(f"[ValidaNFeAPIService]    Motivo: {str(e)[:100]}")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    raise
-        
-        # Should not reach here
-        return response
\ No newline at end of file
+            delay = None
+            if attempt < max_retries and not future.done():
+                delay = self._retry_delay(attempt, deadline, response=response)
+            if delay is None:
+                self._resolve(future, response)
+                return
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            delay = self._retry_delay(attempt, deadline, error=e) if attempt < max_retries else None
+            if delay is None:
+                self._resolve(future, error=e)
+                return
+        except Exception as e:
+            self._resolve(future, error=e)
+            return
+        
+        self._retry_scheduler.schedule(
+            delay, lambda: self._attempt_request(url, body, headers, future, attempt + 1, max_retries, deadline)
+        )
+    
+    def _attempt_timeout(self, deadline: Optional[float]) -> RequestTimeout:
+        """Timeout of one attempt: adaptive (connect, read) within the document's deadline"""
+        if deadline is None:
+            return BATCH_TIMEOUT_SECONDS
+        return self._timeouts.current(max(0.1, deadline - time.monotonic()))
+    
+    def _schedule_hedge(self, url, body: MultipartXmlBody, headers, future: Future,
+                        deadline: Optional[float], answered: threading.Event):
+        """Send a second copy of the request if the first one is not ``answered`` by the observed p99"""
+        delay = self._timeouts.hedge_delay()
+        if delay is None:
+            return
+        
+        def hedge():
+            if answered.is_set() or future.done() or not self._spend_retry("Hedge"):
+                return
+            print(f"[ValidaNFeAPIService] 🪃 Sem resposta após {delay:.1f}s (p99) - enviando cópia da requisição")
+            try:
+                # The copy has its own read position: both requests stream the body at once
+                response = self._post_with_limit(url, copy.copy(body), headers, deadline)
+            except (requests.exceptions.RequestException, CircuitOpenError):
+                return
+            if response.status_code < 500:
+                self._resolve(future, response)
+        
+        self._retry_scheduler.schedule(delay, hedge)
+    
+    @staticmethod
+    def _resolve(future: Future, response: Optional[requests.Response] = None,
+                 error: Optional[Exception] = None):
+        """Complete the request future unless the other copy of a hedged request already did"""
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(response)
+        except InvalidStateError:
+            pass
+    
+    def _retry_delay(self, attempt: int, deadline: Optional[float] = None,
+                     response: Optional[requests.Response] = None,
+                     error: Optional[Exception] = None) -> Optional[float]:
+        """Seconds to wait before retrying a failed attempt, None when its outcome is final"""
+        if error is not None:
+            # Only timeouts and dropped/reset connections are worth another attempt
+            message = str(error).lower()
+            if isinstance(error, requests.exceptions.Timeout):
+                reason = "Timeout"
+            elif "connection" in message or "reset" in message:
+                reason = "Erro de conexão"
+            else:
+                return None
+            detail = str(error)[:100]
+            delay = backoff_delay(attempt)
+        else:
+            # Retry-After already paused the shared rate limiter - retry once the pause ends
+            retry_after = parse_retry_after(response.headers.get('Retry-After')) \
+                if response.status_code in [429, 503] else None
+            if retry_after:
+                reason = f"HTTP {response.status_code} Retry-After"
+                delay = retry_after
+            elif response.status_code in [502, 503, 504]:
+                reason = f"HTTP {response.status_code}"
+                delay = backoff_delay(attempt)
+            else:
+                return None
+            detail = response.text[:100] if response.text else 'Servidor indisponível'
+        
+        if not self._within_deadline(deadline, delay) or not self._spend_retry(reason):
+            return None
+        print(f"[ValidaNFeAPIService] ⏰ {reason} - Retry em {delay:.1f}s...")
+        print(f"[ValidaNFeAPIService]    Motivo: {detail}")
+        return delay
+    
+    def _within_deadline(self, deadline: Optional[float], delay: float) -> bool:
+        """Check if a retry after ``delay`` seconds still starts before the document's deadline"""
+        if deadline is None or time.monotonic() + delay < deadline:
+            return True
+        print(f"[{type(self).__name__}] ⌛ Prazo do documento esgotado - sem nova tentativa")
+        return False
+    
+    def _spend_retry(self, reason: str) -> bool:
+        """Take one retry from the shared budget, False when retry storms exhausted it"""
+        if self._retry_budget.try_spend():
+            return True
+        print(f"[{type(self).__name__}] 🪫 {reason} - orçamento de retries esgotado, sem nova tentativa")
+        return False
\ No newline at end of file
@@ -1,21 +1,116 @@
+import hashlib
+from collections import Counter
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from lxml import etree
 
 from application.interfaces.services import IXMLSchemaService
+from domain.entities.document_context import DocumentContext
 from domain.entities.nfe_document import NFEDocument, NFEType
 from domain.entities.validation_result import ValidationResult, ValidationStatus, ValidationType
 from domain.services.nfe_validation_service import NFEValidationService
+from infrastructure.services.xml_parser_factory import hardened_parser, load_schema, parse_xml, release_parser
+
+# Schema key -> XSD file in the schemas folder
+SCHEMA_FILES = {
+    'nfe': 'leiauteNFe_v4.00.xsd',
+    'procNFe': 'procNFe_v4.00.xsd'
+}
+
+# Distinct messages kept when the errors past the cap are grouped by message
+MAX_GROUPED_MESSAGES = 20
+
+
+@dataclass(frozen=True)
+class SchemaErrorRecord:
+    """Compact, picklable copy of one libxml2 schema error
+    
+    With ``count`` set the record stands for that many errors past the cap, grouped by
+    message (no message: the remaining errors of every other message).
+    """
+    message: str
+    line: Optional[int] = None
+    column: Optional[int] = None
+    path: Optional[str] = None
+    count: int = 0
+    
+    @classmethod
+    def from_log_entry(cls, error) -> 'SchemaErrorRecord':
+        return cls(error.message, error.line, error.column, getattr(error, 'path', None))
+    
+    @property
+    def is_group(self) -> bool:
+        """Check if the record counts grouped errors instead of describing one"""
+        return self.count > 0
+
+
+def collect_schema_errors(error_log, max_errors: int = 0) -> List[SchemaErrorRecord]:
+    """Error records for a schema error log, at most max_errors of them in detail
+    
+    Errors past the cap are only counted, grouped by message (the MAX_GROUPED_MESSAGES
+    most frequent ones, the rest in a single record), so a junk document yields a short
+    list however many errors libxml2 reported.
+    """
+    if not max_errors or len(error_log) <= max_errors:
+        return [SchemaErrorRecord.from_log_entry(error) for error in error_log]
+    
+    records = [SchemaErrorRecord.from_log_entry(error) for error in error_log[:max_errors]]
+    remaining = Counter(error.message for error in error_log[max_errors:])
+    grouped = remaining.most_common(MAX_GROUPED_MESSAGES)
+    records.extend(SchemaErrorRecord(message, count=count) for message, count in grouped)
+    
+    others = sum(remaining.values()) - sum(count for _, count in grouped)
+    if others:
+        records.append(SchemaErrorRecord('', count=others))
+    return records
+
+
+def validate_while_parsing(xml_bytes: bytes, schema: etree.XMLSchema,
+                           max_errors: int = 0) -> Tuple[Optional[etree._Element], Optional[List[SchemaErrorRecord]]]:
+    """Parse and validate in a single pass with this thread's parser bound to the schema
+    
+    Returns (tree, []) for a valid document and (None, records) - capped by
+    collect_schema_errors - for an invalid one. Returns (None, None) when the bytes are not
+    well-formed: libxml2 stops at the first fatal error and callers fall back to the
+    two-pass path for the parse error. Errors found while streaming carry no line or path.
+    After a failure the thread's parser is released, so its error log (every error, not
+    just the capped ones) is not kept alive until the thread's next parse.
+    """
+    parser = hardened_parser(schema)
+    try:
+        return etree.fromstring(xml_bytes, parser), []
+    except etree.XMLSyntaxError:
+        error_log = parser.error_log
+        release_parser(schema)
+        if not error_log or any(error.domain_name != 'SCHEMASV' for error in error_log):
+            return None, None
+        return None, collect_schema_errors(error_log, max_errors)
 
 
 class XMLSchemaService(IXMLSchemaService):
-    """XML Schema validation service implementation using lxml"""
+    """XML Schema validation service implementation using lxml
     
-    def __init__(self, schemas_folder: Optional[Path] = None):
+    By default a document is parsed into a tree and the tree validated afterwards. With
+    ``single_pass`` the thread's schema-bound parser validates while parsing. Only
+    ``max_errors`` errors are reported in detail, the rest are counted by message.
+    ``fail_fast`` details just the first error and validates while parsing, which avoids
+    the node path libxml2 builds for every error when validating a tree (quadratic on junk
+    documents with thousands of repeated elements). The cap bounds the result, not the
+    work: libxml2 can't stop at the first error, so it still validates the whole document
+    and logs every error. The log is released right after, with the parser. Every parse
+    goes through the hardened per-thread parsers of xml_parser_factory.
+    """
+    
+    def __init__(self, schemas_folder: Optional[Path] = None, single_pass: bool = False, max_errors: int = 0,
+                 fail_fast: bool = False):
         self._schemas: Dict[str, etree.XMLSchema] = {}
         self._schemas_folder = schemas_folder or Path(__file__).parent.parent.parent / 'schemas'
         self._validation_service = NFEValidationService()
         self._loaded = False
+        self._fingerprint = 'no-schemas'
+        self._single_pass = single_pass or fail_fast
+        self._max_errors = 1 if fail_fast else max(0, max_errors)
     
     def load_schemas(self) -> bool:
         """Load XSD schemas for validation"""
@@ -30,12 +125,12 @@ class XMLSchemaService(IXMLSchemaService):
             schema_count = 0
             
             # Load NFe schema
-            nfe_schema_path = self._schemas_folder / 'leiauteNFe_v4.00.xsd'
+            nfe_schema_path = self._schemas_folder / SCHEMA_FILES['nfe']
             if self._load_schema_file('nfe', nfe_schema_path):
                 schema_count += 1
             
             # Load procNFe schema
-            proc_schema_path = self._schemas_folder / 'procNFe_v4.00.xsd'
+            proc_schema_path = self._schemas_folder / SCHEMA_FILES['procNFe']
             if self._load_schema_file('procNFe', proc_schema_path):
                 schema_count += 1
             
@@ -53,6 +148,8 @@ class XMLSchemaService(IXMLSchemaService):
                 print("✅ Todos os schemas carregados com sucesso")
                 self._loaded = True
             
+            self._fingerprint = self._compute_fingerprint() if self._loaded else 'no-schemas'
+            
             return self._loaded
             
         except Exception as e:
@@ -107,9 +204,8 @@ class XMLSchemaService(IXMLSchemaService):
                 )
                 return result
             
-            # Parse XML document
-            xml_doc = self._parse_xml_document(document)
-            if xml_doc is None:
+            errors = self._validate_document(document, schema_key)
+            if errors is None:
                 result.add_error(
                     ValidationType.SCHEMA,
                     "Erro ao analisar XML",
@@ -121,20 +217,23 @@ class XMLSchemaService(IXMLSchemaService):
             print(f"   Schema usado: {schema_key}")
             print(f"   Tipo de documento: {doc_type.value}")
             
-            # Validate against schema
-            if schema.validate(xml_doc):
+            if not errors:
                 result.schema_valid = True
                 print(f"✅ Validação de schema bem-sucedida: {document.filename}")
             else:
                 result.schema_valid = False
+                total = sum(error.count or 1 for error in errors)
                 
-                print(f"❌ Falha na validação de schema: {document.filename} - {len(schema.error_log)} erro(s)")
-                print("📋 Detalhes dos erros:")
+                print(f"❌ Falha na validação de schema: {document.filename} - {total} erro(s)")
                 
-                # Add schema validation errors with detailed logging
-                for i, error in enumerate(schema.error_log, 1):
-                    error_msg = f"Erro de schema: {error.message}"
-                    error_detail = f"Linha {error.line}, Coluna {error.column}" if error.line and error.column else f"Linha {error.line}" if error.line else "Posição não especificada"
+                # Add schema validation errors - the ones past the cap as one error per message
+                for i, error in enumerate(errors, 1):
+                    if error.is_group:
+                        error_msg = f"Erro de schema: {error.message}" if error.message else "Outros erros de schema"
+                        error_detail = f"Mais {error.count} ocorrência(s) não detalhada(s)"
+                    else:
+                        error_msg = f"Erro de schema: {error.message}"
+                        error_detail = f"Linha {error.line}, Coluna {error.column}" if error.line and error.column else f"Linha {error.line}" if error.line else "Posição não especificada"
                     
                     result.add_error(
                         ValidationType.SCHEMA,
@@ -143,14 +242,8 @@ class XMLSchemaService(IXMLSchemaService):
                         error.line
                     )
                     
-                    print(f"   {i:2d}. {error.message}")
-                    print(f"       Posição: {error_detail}")
-                    if hasattr(error, 'path') and error.path:
-                        print(f"       XPath: {error.path}")
-                
-                # Log a summary for debugging
-                print(f"⚠️  RESUMO: {document.filename} falhou na validação XSD com {len(schema.error_log)} erro(s)")
-                print(f"   Primeiros erros: {[e.message[:50] + '...' if len(e.message) > 50 else e.message for e in schema.error_log[:3]]}")
+                    location = f" ({error.path})" if error.path else ""
+                    print(f"   {i:2d}. {error.message or 'Outros erros'}{location} - {error_detail}")
             
             return result
             
@@ -162,10 +255,49 @@ class XMLSchemaService(IXMLSchemaService):
             )
             return result
     
+    def parse_document(self, context: DocumentContext) -> Optional[etree._Element]:
+        """Parse the context's bytes once, keeping the tree (or the error) in the context"""
+        if not context.is_parsed:
+            context.root = self._parse_xml_bytes(context)
+        return context.root
+    
     def has_schemas_loaded(self) -> bool:
         """Check if schemas are loaded and ready"""
         return self._loaded and len(self._schemas) > 0
     
+    def schema_fingerprint(self) -> str:
+        """Get a digest of the XSD files behind the loaded schemas"""
+        return self._fingerprint
+    
+    def _validate_document(self, document: NFEDocument, schema_key: str) -> Optional[List[SchemaErrorRecord]]:
+        """Validate the document against one loaded schema, None when it can't be parsed"""
+        context = document.get_context()
+        if self._single_pass and context.root is None and context.raw_bytes is not None:
+            xml_doc, errors = validate_while_parsing(
+                context.raw_bytes, self._schemas[schema_key], self._max_errors
+            )
+            if errors is not None:
+                context.root = xml_doc
+                return errors
+        
+        # Parse XML document (once - reused when an earlier stage already parsed it)
+        xml_doc = self.parse_document(context)
+        if xml_doc is None:
+            return None
+        
+        schema = self._schemas[schema_key]
+        if schema.validate(xml_doc):
+            return []
+        return collect_schema_errors(schema.error_log, self._max_errors)
+    
+    def _compute_fingerprint(self) -> str:
+        """SHA-256 over the names and bytes of every XSD in the schemas folder (includes/imports too)"""
+        digest = hashlib.sha256()
+        for schema_path in sorted(self._schemas_folder.glob('*.xsd')):
+            digest.update(schema_path.name.encode('utf-8') + b'\0')
+            digest.update(schema_path.read_bytes())
+        return digest.hexdigest()
+    
     def _load_schema_file(self, schema_key: str, schema_path: Path) -> bool:
         """Load a specific schema file"""
         try:
@@ -175,11 +307,7 @@ class XMLSchemaService(IXMLSchemaService):
                 print(f"   ⚠️  Arquivo não encontrado: {schema_path.name}")
                 return False
             
-            with open(schema_path, 'r', encoding='utf-8') as f:
-                schema_doc = etree.parse(f)
-            
-            schema = etree.XMLSchema(schema_doc)
-            self._schemas[schema_key] = schema
+            self._schemas[schema_key] = load_schema(schema_path)
             
             print(f"   ✅ Schema {schema_key} carregado")
             return True
@@ -191,45 +319,34 @@ class XMLSchemaService(IXMLSchemaService):
             print(f"   ❌ Erro ao carregar schema {schema_key}: {e}")
             return False
     
-    def _parse_xml_document(self, document: NFEDocument) -> Optional[etree._Element]:
-        """Parse XML document with multiple encoding attempts and better error handling"""
-        encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
+    def _parse_xml_bytes(self, context: DocumentContext) -> Optional[etree._Element]:
+        """Parse the document bytes, re-parsing as Latin-1 when they don't match the sniffed encoding"""
+        if context.raw_bytes is None:
+            context.parse_error = context.read_error or "Arquivo não lido"
+            return None
         
-        for encoding in encodings:
+        try:
+            # Parse directly from bytes - libxml2 decodes them itself
+            return parse_xml(context.raw_bytes)
+        except etree.XMLSyntaxError as e:
+            context.parse_error = str(e)
+        
+        # Declared encoding may not match the bytes (e.g. Latin-1 saved as UTF-8): parse the
+        # bytes again in the encoding they verify as, still without decoding them in Python
+        sniffed = context.encoding
+        encoding = context.verified_encoding()
+        if encoding is not None and encoding != sniffed:
             try:
-                # Method 1: Try reading as bytes first (avoids encoding declaration issues)
-                try:
-                    with open(document.file_path, 'rb') as f:
-                        xml_bytes = f.read()
-                    
-                    # Parse directly from bytes
-                    return etree.fromstring(xml_bytes)
-                    
-                except etree.XMLSyntaxError:
-                    # If binary parsing fails, try text parsing
-                    pass
-                
-                # Method 2: Read as text and encode to bytes
-                with open(document.file_path, 'r', encoding=encoding) as f:
-                    xml_content = f.read()
-                
-                # Convert to bytes to avoid "Unicode strings with encoding declaration" error
-                xml_bytes = xml_content.encode('utf-8')
-                
-                # Parse XML from bytes
-                return etree.fromstring(xml_bytes)
-                
-            except UnicodeDecodeError:
-                continue
+                root = parse_xml(context.raw_bytes[encoding.bom_length:], encoding=encoding.name)
+                context.parse_error = None
+                return root
             except etree.XMLSyntaxError as e:
-                print(f"   ❌ Erro de sintaxe XML ({encoding}): {e}")
-                # Try next encoding instead of returning None immediately
-                continue
+                context.parse_error = str(e)
             except Exception as e:
                 print(f"   ❌ Erro ao analisar XML ({encoding}): {e}")
-                continue
+                context.parse_error = str(e)
         
-        print(f"   ❌ Não foi possível fazer parse do XML com nenhum encoding")
+        print(f"   ❌ Erro de sintaxe XML ({context.encoding}): {context.parse_error}")
         return None
     
     def get_loaded_schemas(self) -> Dict[str, str]:
@@ -0,0 +1,293 @@
+import base64
+import binascii
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from lxml import etree
+
+try:
+    from cryptography import x509
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding, rsa
+except ImportError:  # cryptography vem com o signxml - sem ele a assinatura não é verificada
+    x509 = None
+
+from application.interfaces.services import IXMLSignatureService
+from domain.entities.nfe_document import NFEDocument
+from domain.entities.validation_result import ValidationResult, ValidationStatus, ValidationType
+
+DS_NAMESPACE = 'http://www.w3.org/2000/09/xmldsig#'
+_NS = {'ds': DS_NAMESPACE}
+
+ENVELOPED_SIGNATURE = DS_NAMESPACE + 'enveloped-signature'
+
+# Canonicalization URI -> lxml c14n options
+_C14N_METHODS = {
+    'http://www.w3.org/TR/2001/REC-xml-c14n-20010315': dict(exclusive=False, with_comments=False),
+    'http://www.w3.org/TR/2001/REC-xml-c14n-20010315#WithComments': dict(exclusive=False, with_comments=True),
+    'http://www.w3.org/2001/10/xml-exc-c14n#': dict(exclusive=True, with_comments=False),
+    'http://www.w3.org/2001/10/xml-exc-c14n#WithComments': dict(exclusive=True, with_comments=True),
+}
+
+# DigestMethod URI -> hashlib name
+_DIGEST_METHODS = {
+    DS_NAMESPACE + 'sha1': 'sha1',
+    'http://www.w3.org/2001/04/xmlenc#sha256': 'sha256',
+}
+
+# SignatureMethod URI -> hash used with RSA PKCS#1 v1.5 (NFe layout 4.00 signs with RSA-SHA1)
+_SIGNATURE_METHODS = {
+    DS_NAMESPACE + 'rsa-sha1': 'SHA1',
+    'http://www.w3.org/2001/04/xmldsig-more#rsa-sha256': 'SHA256',
+}
+
+
+class SignatureVerificationError(Exception):
+    """A signature that does not verify, with the message and details to report"""
+    
+    def __init__(self, message: str, details: str):
+        super().__init__(f"{message}: {details}")
+        self.message = message
+        self.details = details
+
+
+class XMLSignatureService(IXMLSignatureService):
+    """XML-DSig verification of the enveloped signatures in NFe documents
+    
+    Works on the tree the document context already holds, so the document is not parsed
+    again. Each Reference is canonicalized and digested once and compared with its
+    DigestValue, then SignedInfo is canonicalized once and its SignatureValue checked with
+    the RSA key of the embedded X509 certificate. The same emitter certificate signs
+    thousands of notes, so keys are cached by certificate fingerprint (SHA-256 of the DER)
+    in an LRU bounded to ``max_certificates``. Only the signature is checked - the
+    certificate chain and validity dates are left to the API.
+    """
+    
+    def __init__(self, max_certificates: int = 1000):
+        if x509 is None:
+            raise ImportError("cryptography não instalado - assinaturas digitais não serão verificadas")
+        
+        self._max_certificates = max(1, max_certificates)
+        self._keys: 'OrderedDict[str, rsa.RSAPublicKey]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+    
+    def verify_signature(self, document: NFEDocument) -> ValidationResult:
+        """Verify every ds:Signature in the document"""
+        result = ValidationResult(
+            document_path=str(document.file_path),
+            status=ValidationStatus.SUCCESS
+        )
+        
+        root = document.get_context().parse()
+        if root is None:
+            result.add_error(
+                ValidationType.SIGNATURE,
+                "Erro ao analisar XML",
+                "Não foi possível fazer o parsing do documento para verificar a assinatura"
+            )
+            return result
+        
+        signatures = root.findall('.//ds:Signature', _NS)
+        if not signatures:
+            result.add_error(
+                ValidationType.SIGNATURE,
+                "Assinatura digital não encontrada",
+                "O documento não contém o elemento ds:Signature"
+            )
+            return result
+        
+        try:
+            for signature in signatures:
+                self._verify(root, signature)
+            result.signature_valid = True
+        except SignatureVerificationError as e:
+            result.add_error(ValidationType.SIGNATURE, e.message, e.details)
+            print(f"❌ Assinatura inválida: {document.filename} - {e.message}")
+        except Exception as e:
+            result.add_error(
+                ValidationType.SIGNATURE,
+                "Erro inesperado na verificação da assinatura",
+                str(e)
+            )
+        
+        return result
+    
+    def certificate_cache_stats(self) -> Dict:
+        """Get certificate cache statistics (hits, misses, size, max_entries, hit_ratio)"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'size': len(self._keys),
+                'max_entries': self._max_certificates,
+                'hit_ratio': self._hits / lookups if lookups else 0.0
+            }
+    
+    def _verify(self, root: etree._Element, signature: etree._Element):
+        """Check the digest of every Reference, then the SignatureValue over SignedInfo"""
+        signed_info = self._required(signature, 'ds:SignedInfo')
+        c14n_options = self._c14n_options(self._required(signed_info, 'ds:CanonicalizationMethod'))
+        
+        references = signed_info.findall('ds:Reference', _NS)
+        if not references:
+            raise SignatureVerificationError("Assinatura sem referências", "ds:SignedInfo não contém ds:Reference")
+        for reference in references:
+            self._verify_reference(root, signature, reference)
+        
+        method = self._required(signed_info, 'ds:SignatureMethod').get('Algorithm')
+        if method not in _SIGNATURE_METHODS:
+            raise SignatureVerificationError("Algoritmo de assinatura não suportado", str(method))
+        
+        public_key = self._public_key(self._required(signature, 'ds:KeyInfo/ds:X509Data/ds:X509Certificate'))
+        try:
+            public_key.verify(
+                self._decode(self._required(signature, 'ds:SignatureValue'), "SignatureValue"),
+                self._canonicalize(signed_info, c14n_options),
+                padding.PKCS1v15(),
+                getattr(hashes, _SIGNATURE_METHODS[method])()
+            )
+        except InvalidSignature:
+            raise SignatureVerificationError(
+                "Assinatura digital inválida",
+                "SignatureValue não confere com o certificado do emitente"
+            )
+    
+    def _verify_reference(self, root: etree._Element, signature: etree._Element, reference: etree._Element):
+        """Canonicalize the referenced element once and compare its digest with DigestValue"""
+        uri = reference.get('URI', '')
+        target = self._referenced_element(root, signature, uri)
+        
+        c14n_options = dict(exclusive=False, with_comments=False)
+        enveloped = False
+        for transform in reference.findall('ds:Transforms/ds:Transform', _NS):
+            if transform.get('Algorithm') == ENVELOPED_SIGNATURE:
+                enveloped = True
+            else:
+                c14n_options = self._c14n_options(transform)
+        
+        # enveloped-signature: digest the target as if the Signature were not inside it
+        exclude = signature if enveloped and signature in target.iter(signature.tag) else None
+        
+        method = self._required(reference, 'ds:DigestMethod').get('Algorithm')
+        if method not in _DIGEST_METHODS:
+            raise SignatureVerificationError("Algoritmo de digest não suportado", str(method))
+        
+        digest = hashlib.new(_DIGEST_METHODS[method], self._canonicalize(target, c14n_options, exclude)).digest()
+        if digest != self._decode(self._required(reference, 'ds:DigestValue'), "DigestValue"):
+            raise SignatureVerificationError(
+                "Digest da assinatura não confere",
+                f"O conteúdo de {uri or 'documento'} foi alterado após a assinatura"
+            )
+    
+    def _referenced_element(self, root: etree._Element, signature: etree._Element, uri: str) -> etree._Element:
+        """Element a Reference URI points to - the signature's siblings are tried first"""
+        if not uri:
+            return root
+        if not uri.startswith('#'):
+            raise SignatureVerificationError("Referência não suportada", f"URI externa: {uri}")
+        
+        element_id = uri[1:]
+        parent = signature.getparent()
+        for candidate in (parent if parent is not None else ()):
+            if candidate.get('Id') == element_id:
+                return candidate
+        
+        matches = root.xpath('//*[@Id=$id]', id=element_id)
+        if len(matches) != 1:
+            raise SignatureVerificationError(
+                "Referência da assinatura não encontrada",
+                f"{uri} corresponde a {len(matches)} elemento(s)"
+            )
+        return matches[0]
+    
+    def _public_key(self, certificate_element: etree._Element) -> Any:
+        """RSA public key of the certificate, parsed once per fingerprint"""
+        der = self._decode(certificate_element, "X509Certificate")
+        fingerprint = hashlib.sha256(der).hexdigest()
+        
+        with self._lock:
+            public_key = self._keys.get(fingerprint)
+            if public_key is not None:
+                self._keys.move_to_end(fingerprint)
+                self._hits += 1
+                return public_key
+            self._misses += 1
+        
+        try:
+            public_key = x509.load_der_x509_certificate(der).public_key()
+        except ValueError as e:
+            raise SignatureVerificationError("Certificado da assinatura inválido", str(e))
+        if not isinstance(public_key, rsa.RSAPublicKey):
+            raise SignatureVerificationError("Certificado da assinatura inválido", "A chave do certificado não é RSA")
+        
+        with self._lock:
+            self._keys[fingerprint] = public_key
+            while len(self._keys) > self._max_certificates:
+                self._keys.popitem(last=False)
+        return public_key
+    
+    @staticmethod
+    def _canonicalize(element: etree._Element, c14n_options: Dict[str, bool],
+                      exclude: Optional[etree._Element] = None) -> bytes:
+        """C14N of the element as a document subset, optionally without one of its descendants
+        
+        Serialized in place, a nested element loses its inherited default namespace on the
+        descendants (lxml 6 / libxml2 2.14 write them as xmlns=""), and a plain deep copy drops
+        the unused namespaces in scope that inclusive C14N keeps. So the element is rebuilt
+        as the root of a detached copy declaring every namespace in scope - the shared tree
+        is never modified.
+        """
+        detached = etree.Element(element.tag, attrib=dict(element.attrib), nsmap=element.nsmap)
+        detached.text = element.text
+        for child in element:
+            detached.append(copy.deepcopy(child))
+        
+        if exclude is not None:
+            indexes: List[int] = []
+            node = exclude
+            while node is not element:
+                parent = node.getparent()
+                indexes.append(parent.index(node))
+                node = parent
+            
+            node = detached
+            for index in reversed(indexes):
+                node = node[index]
+            
+            # The text after the Signature belongs to its parent and survives the transform
+            parent, previous = node.getparent(), node.getprevious()
+            if node.tail:
+                if previous is not None:
+                    previous.tail = (previous.tail or '') + node.tail
+                else:
+                    parent.text = (parent.text or '') + node.tail
+            parent.remove(node)
+        
+        return etree.tostring(detached, method='c14n', **c14n_options)
+    
+    @staticmethod
+    def _c14n_options(method_element: etree._Element) -> Dict[str, bool]:
+        algorithm = method_element.get('Algorithm')
+        if algorithm not in _C14N_METHODS:
+            raise SignatureVerificationError("Canonicalização não suportada", str(algorithm))
+        return _C14N_METHODS[algorithm]
+    
+    @staticmethod
+    def _required(parent: etree._Element, path: str) -> etree._Element:
+        element = parent.find(path, _NS)
+        if element is None:
+            raise SignatureVerificationError("Assinatura incompleta", f"Elemento {path} não encontrado")
+        return element
+    
+    @staticmethod
+    def _decode(element: etree._Element, name: str) -> bytes:
+        try:
+            return base64.b64decode(''.join((element.text or '').split()), validate=True)
+        except (binascii.Error, ValueError):
+            raise SignatureVerificationError("Assinatura inválida", f"{name} não está em base64")
@@ -11,15 +11,14 @@ class FileOrganizerService(IFileOrganizerService):
     """File organization service implementation"""
     
     def organize_processed_file(self, file_path: Path, validation_result: ValidationResult, 
-                              output_folder: Path) -> bool:
-        """Move processed file to appropriate folder based on validation result"""
+                              output_folder: Path) -> Optional[Path]:
+        """Move processed file to appropriate folder based on validation result, return its new path (None on failure)"""
         try:
-            if not file_path.exists():
-                print(f"❌ Arquivo não existe para organização: {file_path}")
-                return False
-            
             # Determine target folder based on validation result
-            if validation_result.is_valid:
+            if validation_result.is_pending:
+                # Held until the API answers - the outbox drain organizes it again then
+                target_folder = output_folder / "pending"
+            elif validation_result.is_valid:
                 target_folder = output_folder / "processed"
             else:
                 # Check if error should go to reprocess or permanent errors
@@ -34,23 +33,30 @@ class FileOrganizerService(IFileOrganizerService):
             # Generate unique filename if file already exists
             target_path = self._get_unique_target_path(target_folder, file_path)
             
-            # Move the file
-            shutil.move(str(file_path), str(target_path))
+            # Move the file - a missing source fails the move itself, no extra stat beforehand
+            try:
+                shutil.move(str(file_path), str(target_path))
+            except FileNotFoundError:
+                if file_path.exists():
+                    raise
+                print(f"❌ Arquivo não existe para organização: {file_path}")
+                return None
             
-            # Create a processing log file with details
-            self._create_processing_log(target_path, validation_result, output_folder)
+            # Create a processing log file with details (once the outcome is known)
+            if not validation_result.is_pending:
+                self._create_processing_log(target_path, validation_result, output_folder)
             
             print(f"📁 Arquivo organizado: {file_path.name} -> {target_folder.name}/{target_path.name}")
-            return True
+            return target_path
             
         except Exception as e:
             print(f"❌ Erro ao organizar arquivo {file_path.name}: {e}")
-            return False
+            return None
     
     def create_output_structure(self, output_folder: Path) -> bool:
-        """Create output folder structure (processed, errors, logs)"""
+        """Create output folder structure (processed, errors, reprocess, pending, logs)"""
         try:
-            folders = ['processed', 'errors', 'reprocess', 'logs']
+            folders = ['processed', 'errors', 'reprocess', 'pending', 'logs']
             
             for folder_name in folders:
                 folder_path = output_folder / folder_name
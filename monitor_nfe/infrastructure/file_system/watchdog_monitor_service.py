@@ -5,6 +5,7 @@ from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
 
 from application.interfaces.services import IFileMonitorService
+from domain.value_objects.file_snapshot import FileSnapshot
 
 
 class NFEFileHandler(FileSystemEventHandler):
@@ -38,7 +39,8 @@ class NFEFileHandler(FileSystemEventHandler):
             # Check if file has supported extension
             if file_path.suffix.lower() in self._supported_extensions:
                 # Check if file exists and has content (to avoid processing incomplete files)
-                if file_path.exists() and file_path.stat().st_size > 0:
+                snapshot = FileSnapshot.capture(file_path)
+                if snapshot.exists and snapshot.size > 0:
                     self.callback(file_path)
         except Exception as e:
             # Log error but don't crash the monitor
@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+
+class UploadOutcome(Enum):
+    SUCCESS = "success"
+    OVERLOAD = "overload"
+    ERROR = "error"
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on concurrent API uploads driven by overload signals and latency
+    
+    The limit grows by ``increase_step`` after every window of healthy samples (low error
+    rate, p95 latency close to the best p95 seen) and is multiplied by ``decrease_factor``
+    when the API signals overload (429/503/timeouts).
+    """
+    
+    def __init__(
+        self,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 10,
+        window_size: int = 20,
+        increase_step: int = 1,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        max_error_rate: float = 0.05,
+        decrease_cooldown_seconds: float = 1.0
+    ):
+        self._min_limit = max(1, min_limit)
+        self._max_limit = max(self._min_limit, max_limit)
+        self._limit = min(max(initial_limit, self._min_limit), self._max_limit)
+        self._window_size = max(1, window_size)
+        self._increase_step = max(1, increase_step)
+        self._decrease_factor = decrease_factor
+        self._latency_tolerance = latency_tolerance
+        self._max_error_rate = max_error_rate
+        self._decrease_cooldown_seconds = decrease_cooldown_seconds
+        
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._samples: Deque[Tuple[float, UploadOutcome]] = deque(maxlen=self._window_size)
+        self._samples_since_change = 0
+        self._baseline_p95_ms: Optional[float] = None
+        self._last_decrease_at = 0.0
+        self._last_change_reason = "Limite inicial"
+        self._listeners: List[Callable[[int, str], None]] = []
+    
+    @property
+    def limit(self) -> int:
+        """Current number of uploads allowed in flight"""
+        return self._limit
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of uploads currently holding a slot"""
+        return self._in_flight
+    
+    @property
+    def last_change_reason(self) -> str:
+        """Why the limit last changed"""
+        return self._last_change_reason
+    
+    def add_listener(self, listener: Callable[[int, str], None]):
+        """Register callback called with (limit, reason) whenever the limit changes"""
+        self._listeners.append(listener)
+    
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until an upload slot is free, return False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(self._take_slot, timeout)
+    
+    def try_acquire(self) -> bool:
+        """Take an upload slot if one is free, without blocking"""
+        with self._condition:
+            return self._take_slot()
+    
+    def release(self, latency_ms: float, outcome: UploadOutcome, reason: Optional[str] = None):
+        """Free an upload slot and feed the attempt's latency and outcome to the controller"""
+        with self._condition:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._samples.append((latency_ms, outcome))
+            self._samples_since_change += 1
+            
+            change = None
+            if outcome == UploadOutcome.OVERLOAD:
+                change = self._decrease(reason or "Sobrecarga da API")
+            elif self._samples_since_change >= self._window_size:
+                change = self._maybe_increase()
+            
+            self._condition.notify_all()
+        
+        if change:
+            self._notify_listeners(*change)
+    
+    def snapshot(self) -> Dict:
+        """Get current limiter state for display"""
+        with self._condition:
+            return {
+                'limit': self._limit,
+                'in_flight': self._in_flight,
+                'min_limit': self._min_limit,
+                'max_limit': self._max_limit,
+                'p95_ms': self._p95_ms(),
+                'reason': self._last_change_reason
+            }
+    
+    def _take_slot(self) -> bool:
+        if self._in_flight < self._limit:
+            self._in_flight += 1
+            return True
+        return False
+    
+    def _decrease(self, reason: str) -> Optional[Tuple[int, str]]:
+        """Multiplicative decrease, at most once per cooldown"""
+        now = time.monotonic()
+        # Uploads started under the old limit tend to fail together - cut only once for them
+        if now - self._last_decrease_at < self._decrease_cooldown_seconds:
+            return None
+        
+        self._last_decrease_at = now
+        new_limit = max(self._min_limit, int(self._limit * self._decrease_factor))
+        return self._apply(new_limit, reason)
+    
+    def _maybe_increase(self) -> Optional[Tuple[int, str]]:
+        """Additive increase after a full window of healthy samples"""
+        self._samples_since_change = 0
+        
+        p95_ms = self._p95_ms()
+        if p95_ms is None:
+            return None
+        
+        if self._baseline_p95_ms is None or p95_ms < self._baseline_p95_ms:
+            self._baseline_p95_ms = p95_ms
+        
+        errors = sum(1 for _, outcome in self._samples if outcome != UploadOutcome.SUCCESS)
+        error_rate = errors / len(self._samples)
+        
+        if error_rate > self._max_error_rate:
+            return None
+        if p95_ms > self._baseline_p95_ms * self._latency_tolerance:
+            return None
+        if self._limit >= self._max_limit:
+            return None
+        
+        new_limit = min(self._max_limit, self._limit + self._increase_step)
+        return self._apply(new_limit, f"API saudável (p95 {p95_ms:.0f}ms, erros {error_rate:.0%})")
+    
+    def _apply(self, new_limit: int, reason: str) -> Optional[Tuple[int, str]]:
+        if new_limit == self._limit:
+            return None
+        
+        old_limit = self._limit
+        self._limit = new_limit
+        self._last_change_reason = reason
+        self._samples_since_change = 0
+        
+        icon = "📈" if new_limit > old_limit else "📉"
+        print(f"[AdaptiveConcurrency] {icon} Limite de envios: {old_limit} → {new_limit} ({reason})")
+        return new_limit, reason
+    
+    def _p95_ms(self) -> Optional[float]:
+        if not self._samples:
+            return None
+        latencies = sorted(latency for latency, _ in self._samples)
+        return latencies[int(0.95 * (len(latencies) - 1))]
+    
+    def _notify_listeners(self, limit: int, reason: str):
+        for listener in self._listeners:
+            try:
+                listener(limit, reason)
+            except Exception as e:
+                print(f"[AdaptiveConcurrency] ⚠️  Erro no listener: {e}")
@@ -0,0 +1,85 @@
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+
+class AdaptiveTimeouts:
+    """Connect and read timeouts derived from recently observed upload latencies
+    
+    The read timeout is ``read_multiplier`` times the p99 of the answered attempts among
+    the last ``window_size`` and the connect timeout ``connect_multiplier`` times their p50,
+    each clamped to its bounds. The upper bounds are used until ``min_samples`` answers
+    have been seen, and again whenever more than ``max_timeout_ratio`` of recent attempts
+    timed out: a slowing API widens the timeouts instead of being cut off over and over,
+    while a few requests that never answer only cost the learned timeout.
+    """
+    
+    def __init__(self, window_size: int = 200, min_samples: int = 20,
+                 read_multiplier: float = 3.0, connect_multiplier: float = 4.0,
+                 read_bounds: Tuple[float, float] = (5.0, 30.0),
+                 connect_bounds: Tuple[float, float] = (2.0, 10.0),
+                 max_timeout_ratio: float = 0.1):
+        self._min_samples = max(1, min_samples)
+        self._read_multiplier = read_multiplier
+        self._connect_multiplier = connect_multiplier
+        self._read_bounds = read_bounds
+        self._connect_bounds = connect_bounds
+        self._max_timeout_ratio = max_timeout_ratio
+        # (latency in seconds, timed out)
+        self._samples: Deque[Tuple[float, bool]] = deque(maxlen=max(self._min_samples, window_size))
+        self._lock = threading.Lock()
+    
+    def record(self, latency_seconds: float):
+        """Record how long one answered upload attempt took"""
+        with self._lock:
+            self._samples.append((max(0.0, latency_seconds), False))
+    
+    def record_timeout(self, timeout_seconds: float):
+        """Record an upload attempt that timed out"""
+        with self._lock:
+            self._samples.append((timeout_seconds, True))
+    
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency percentile of answered attempts in seconds (0.99 = p99)
+        
+        None while still learning or while too many attempts time out.
+        """
+        with self._lock:
+            answered = sorted(latency for latency, timed_out in self._samples if not timed_out)
+            timed_out = len(self._samples) - len(answered)
+        
+        if len(answered) < self._min_samples or timed_out > self._max_timeout_ratio * len(self._samples):
+            return None
+        return answered[min(len(answered) - 1, int(fraction * len(answered)))]
+    
+    def current(self, remaining_seconds: Optional[float] = None) -> Tuple[float, float]:
+        """(connect, read) timeouts for the next attempt, never beyond the remaining deadline"""
+        p50, p99 = self.percentile(0.50), self.percentile(0.99)
+        connect = self._clamp(p50 * self._connect_multiplier if p50 is not None else None, self._connect_bounds)
+        read = self._clamp(p99 * self._read_multiplier if p99 is not None else None, self._read_bounds)
+        
+        if remaining_seconds is not None:
+            connect = min(connect, remaining_seconds)
+            read = min(read, remaining_seconds)
+        return connect, read
+    
+    def hedge_delay(self) -> Optional[float]:
+        """How long to wait before hedging a slow attempt (p99), None while still learning"""
+        return self.percentile(0.99)
+    
+    def snapshot(self) -> Dict:
+        """Get current percentiles and timeouts"""
+        connect, read = self.current()
+        return {
+            'samples': len(self._samples),
+            'timed_out': sum(1 for _, timed_out in list(self._samples) if timed_out),
+            'p50': self.percentile(0.50),
+            'p99': self.percentile(0.99),
+            'connect_timeout': connect,
+            'read_timeout': read
+        }
+    
+    @staticmethod
+    def _clamp(value: Optional[float], bounds: Tuple[float, float]) -> float:
+        low, high = bounds
+        return high if value is None else min(max(value, low), high)
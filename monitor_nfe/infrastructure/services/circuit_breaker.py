@@ -0,0 +1,132 @@
+import threading
+import time
+from enum import Enum
+from typing import Callable, List
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when an upload is attempted while the API circuit is open"""
+    pass
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for the ValidaNFe API
+    
+    Opens after ``failure_threshold`` consecutive transport or 5xx failures. While open no
+    upload is attempted; after ``reset_timeout_seconds`` a single health probe may run
+    (half-open). A healthy probe closes the circuit, a failed one reopens it and doubles
+    the wait up to ``max_reset_timeout_seconds``.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout_seconds: float = 30.0,
+                 max_reset_timeout_seconds: float = 300.0):
+        self._failure_threshold = max(1, failure_threshold)
+        self._base_reset_timeout = max(0.1, reset_timeout_seconds)
+        self._max_reset_timeout = max(self._base_reset_timeout, max_reset_timeout_seconds)
+        self._reset_timeout = self._base_reset_timeout
+        
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._listeners: List[Callable[[CircuitState, str], None]] = []
+    
+    @property
+    def state(self) -> CircuitState:
+        """Current circuit state"""
+        return self._state
+    
+    @property
+    def consecutive_failures(self) -> int:
+        """Number of failures since the last success"""
+        return self._consecutive_failures
+    
+    def add_listener(self, listener: Callable[[CircuitState, str], None]):
+        """Register callback called with (state, reason) whenever the state changes"""
+        self._listeners.append(listener)
+    
+    def allow_request(self) -> bool:
+        """Check if uploads may be sent to the API"""
+        return self._state == CircuitState.CLOSED
+    
+    def check(self):
+        """Raise CircuitOpenError unless uploads may be sent"""
+        if not self.allow_request():
+            raise CircuitOpenError("Circuito da API aberto")
+    
+    def record_success(self):
+        """Reset the failure count after a request reached a healthy API"""
+        with self._lock:
+            self._consecutive_failures = 0
+    
+    def record_failure(self, reason: str):
+        """Count a transport or 5xx failure, opening the circuit at the threshold"""
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state != CircuitState.CLOSED or self._consecutive_failures < self._failure_threshold:
+                return
+            change = self._set_state(
+                CircuitState.OPEN,
+                f"{self._consecutive_failures} falhas consecutivas, última: {reason}"
+            )
+        
+        self._notify_listeners(*change)
+    
+    def seconds_until_probe(self) -> float:
+        """Seconds left before a half-open probe may run"""
+        with self._lock:
+            if self._state != CircuitState.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self._reset_timeout - time.monotonic())
+    
+    def begin_probe(self) -> bool:
+        """Move to half-open if the reset timeout elapsed, return True if the caller should probe"""
+        with self._lock:
+            if self._state != CircuitState.OPEN:
+                return False
+            if time.monotonic() < self._opened_at + self._reset_timeout:
+                return False
+            change = self._set_state(CircuitState.HALF_OPEN, "Testando conexão com a API")
+        
+        self._notify_listeners(*change)
+        return True
+    
+    def end_probe(self, healthy: bool):
+        """Close the circuit after a healthy probe or reopen it with a longer wait"""
+        with self._lock:
+            if self._state != CircuitState.HALF_OPEN:
+                return
+            if healthy:
+                self._consecutive_failures = 0
+                self._reset_timeout = self._base_reset_timeout
+                change = self._set_state(CircuitState.CLOSED, "API respondeu ao teste de conexão")
+            else:
+                self._reset_timeout = min(self._reset_timeout * 2, self._max_reset_timeout)
+                change = self._set_state(
+                    CircuitState.OPEN,
+                    f"Teste de conexão falhou, nova tentativa em {self._reset_timeout:.0f}s"
+                )
+        
+        self._notify_listeners(*change)
+    
+    def _set_state(self, state: CircuitState, reason: str):
+        self._state = state
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+        
+        icons = {CircuitState.CLOSED: "🟢", CircuitState.OPEN: "🔴", CircuitState.HALF_OPEN: "🟡"}
+        print(f"[CircuitBreaker] {icons[state]} Circuito {state.value}: {reason}")
+        return state, reason
+    
+    def _notify_listeners(self, state: CircuitState, reason: str):
+        for listener in self._listeners:
+            try:
+                listener(state, reason)
+            except Exception as e:
+                print(f"[CircuitBreaker] ⚠️  Erro no listener: {e}")
@@ -0,0 +1,75 @@
+from itertools import compress
+from typing import Iterable, List
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional - sem ele as chaves são validadas uma a uma
+    np = None
+
+from domain.value_objects.nfe_key import CHECK_DIGIT_WEIGHTS, KEY_LENGTH, is_valid_nfe_key
+
+
+class NFEKeyBatchValidator:
+    """Check-digit validation of many NFe keys in one call, for backfills and ledger audits
+    
+    The keys are copied into a matrix of byte codes, one row per key, and the digits and
+    the modulo 11 check digit of every row are checked with a handful of NumPy operations
+    - about the cost of copying the keys. Keys are processed ``chunk_size`` rows at a time
+    so millions of keys don't need a matrix of millions of rows. Without NumPy each key is
+    checked with is_valid_nfe_key.
+    """
+    
+    def __init__(self, chunk_size: int = 262144):
+        self._chunk_size = max(1, chunk_size)
+        if np is not None:
+            # int16 holds the weighted sum of any row of digits; rows with other bytes may
+            # overflow, but the digit check rejects those anyway
+            self._weights = np.array(CHECK_DIGIT_WEIGHTS, dtype=np.int16)
+            self._zero_offset = ord('0') * sum(CHECK_DIGIT_WEIGHTS)
+    
+    @property
+    def is_vectorized(self) -> bool:
+        """Check if NumPy is available for the vectorized path"""
+        return np is not None
+    
+    def validate(self, keys: Iterable[str]) -> List[bool]:
+        """One flag per key (in order): 44 digits with a matching check digit"""
+        keys = keys if isinstance(keys, list) else list(keys)
+        if np is None:
+            return [bool(key) and is_valid_nfe_key(key) for key in keys]
+        
+        flags = np.zeros(len(keys), dtype=bool)
+        for start in range(0, len(keys), self._chunk_size):
+            chunk = keys[start:start + self._chunk_size]
+            flags[start:start + len(chunk)] = self._validate_chunk(chunk)
+        return flags.tolist()
+    
+    def invalid_keys(self, keys: Iterable[str]) -> List[str]:
+        """Keys that fail validation, in input order"""
+        keys = keys if isinstance(keys, list) else list(keys)
+        return [key for key, valid in zip(keys, self.validate(keys)) if not valid]
+    
+    def _validate_chunk(self, keys: List[str]) -> 'np.ndarray':
+        """Flags for one chunk of keys"""
+        lengths = np.fromiter(map(len, keys), dtype=np.int64, count=len(keys))
+        has_length = lengths == KEY_LENGTH
+        flags = np.zeros(len(keys), dtype=bool)
+        if not has_length.any():
+            return flags
+        
+        # Only 44-character keys go into the matrix; anything not ASCII becomes '?', a non-digit
+        candidates = keys if has_length.all() else list(compress(keys, has_length))
+        raw = ''.join(candidates).encode('ascii', 'replace')
+        codes = np.frombuffer(raw, dtype=np.uint8).reshape(len(candidates), KEY_LENGTH)
+        
+        # Weighted sum of the byte codes, minus what the '0' offset adds to it
+        remainders = (codes[:, :KEY_LENGTH - 1] @ self._weights - self._zero_offset) % 11
+        check_digits = np.where(remainders < 2, 0, 11 - remainders)
+        valid = check_digits == codes[:, KEY_LENGTH - 1].astype(np.int16) - ord('0')
+        
+        # One scan of the bytes settles the usual case where every character is a digit
+        if not raw.isdigit():
+            valid &= ((codes - ord('0')) <= 9).all(axis=1)
+        
+        flags[has_length] = valid
+        return flags
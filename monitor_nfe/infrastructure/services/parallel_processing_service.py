@@ -19,11 +19,14 @@ class ParallelProcessingService:
         self,
         process_file_use_case: ProcessFileUseCase,
         log_repository: ILogRepository,
-        max_threads: int = 10
+        max_threads: int = 10,
+        batch_size: int = 1
     ):
         self._process_file_use_case = process_file_use_case
         self._log_repository = log_repository
         self._max_threads = max_threads
+        # XML files handed to one worker at a time; > 1 lets an async API service overlap their uploads
+        self._batch_size = max(1, batch_size)
         self._executor: Optional[ThreadPoolExecutor] = None
         self._active_sessions: Dict[str, ProcessingSession] = {}
         self._session_lock = threading.Lock()
@@ -69,21 +72,34 @@ class ParallelProcessingService:
         
         # Submit processing tasks
         futures = []
+        xml_batch = []
         for file_path in file_paths:
+            request = ProcessFileUseCaseRequest(
+                file_path=file_path,
+                process_archives=process_archives,
+                validate_schema=validate_schema,
+                send_to_api=send_to_api,
+                organize_output=organize_output
+            )
+            
+            if self._batch_size > 1 and file_path.suffix.lower() == '.xml':
+                xml_batch.append(request)
+                if len(xml_batch) >= self._batch_size:
+                    futures.append(self._executor.submit(self._process_file_batch, session.session_id, xml_batch))
+                    xml_batch = []
+                continue
+            
             future = self._executor.submit(
                 self._process_single_file,
                 session.session_id,
                 file_path,
-                ProcessFileUseCaseRequest(
-                    file_path=file_path,
-                    process_archives=process_archives,
-                    validate_schema=validate_schema,
-                    send_to_api=send_to_api,
-                    organize_output=organize_output
-                )
+                request
             )
             futures.append(future)
         
+        if xml_batch:
+            futures.append(self._executor.submit(self._process_file_batch, session.session_id, xml_batch))
+        
         # Monitor completion in background thread
         monitoring_thread = threading.Thread(
             target=self._monitor_session_completion,
@@ -114,40 +130,72 @@ class ParallelProcessingService:
             # Process the file
             response = self._process_file_use_case.execute(request)
             
-            # Process each result immediately and call callbacks
-            for result in response.results:
-                try:
-                    # Call main result callback immediately for each result
-                    if self._result_callback:
-                        self._result_callback(result, thread_id)
-                        
-                except Exception as e:
-                    self._log_repository.log_error(f"Erro no callback de resultado: {e}")
-            
-            # Update progress after processing
-            try:
-                if self._progress_callback:
-                    completed_count = len(session.get_completed_files()) + 1  # +1 for current
-                    total_count = len(session.files)
-                    self._progress_callback(session_id, completed_count, total_count)
-            except Exception as e:
-                self._log_repository.log_error(f"Erro no callback de progresso: {e}")
-            
-            # Mark as completed
-            if response.success:
-                session.mark_file_completed(file_path)
-                processing_time = (time.time() - start_time) * 1000
-                self._log_repository.log_info(f"[{thread_id}] ✅ Concluído: {file_path.name} ({processing_time:.1f}ms)")
-            else:
-                error_msg = response.error_message or "Processamento falhou"
-                session.mark_file_error(file_path, error_msg)
-                self._log_repository.log_error(f"[{thread_id}] ❌ Falhou: {file_path.name} - {error_msg}")
+            self._complete_file(session, file_path, response, thread_id, start_time)
             
         except Exception as e:
             # Mark as error
             session.mark_file_error(file_path, str(e))
             self._log_repository.log_error(f"[{thread_id}] ❌ Erro: {file_path.name} - {e}")
     
+    def _process_file_batch(self, session_id: str, requests: List[ProcessFileUseCaseRequest]):
+        """Process a batch of XML files within a session, overlapping their uploads"""
+        thread_id = threading.current_thread().name
+        start_time = time.time()
+        
+        # Get session
+        with self._session_lock:
+            session = self._active_sessions.get(session_id)
+            if not session:
+                return
+        
+        try:
+            for request in requests:
+                session.mark_file_processing(request.file_path, thread_id)
+            
+            self._log_repository.log_info(f"[{thread_id}] 🔄 Iniciando lote: {len(requests)} arquivo(s)")
+            
+            responses = self._process_file_use_case.execute_many(requests)
+            
+            for request, response in zip(requests, responses):
+                self._complete_file(session, request.file_path, response, thread_id, start_time)
+            
+        except Exception as e:
+            for request in requests:
+                session.mark_file_error(request.file_path, str(e))
+            self._log_repository.log_error(f"[{thread_id}] ❌ Erro no lote de {len(requests)} arquivo(s) - {e}")
+    
+    def _complete_file(self, session: ProcessingSession, file_path: Path, response,
+                       thread_id: str, start_time: float):
+        """Report results and progress for a processed file and update its session state"""
+        # Process each result immediately and call callbacks
+        for result in response.results:
+            try:
+                # Call main result callback immediately for each result
+                if self._result_callback:
+                    self._result_callback(result, thread_id)
+                    
+            except Exception as e:
+                self._log_repository.log_error(f"Erro no callback de resultado: {e}")
+        
+        # Update progress after processing
+        try:
+            if self._progress_callback:
+                completed_count = len(session.get_completed_files()) + 1  # +1 for current
+                total_count = len(session.files)
+                self._progress_callback(session.session_id, completed_count, total_count)
+        except Exception as e:
+            self._log_repository.log_error(f"Erro no callback de progresso: {e}")
+        
+        # Mark as completed
+        if response.success:
+            session.mark_file_completed(file_path)
+            processing_time = (time.time() - start_time) * 1000
+            self._log_repository.log_info(f"[{thread_id}] ✅ Concluído: {file_path.name} ({processing_time:.1f}ms)")
+        else:
+            error_msg = response.error_message or "Processamento falhou"
+            session.mark_file_error(file_path, error_msg)
+            self._log_repository.log_error(f"[{thread_id}] ❌ Falhou: {file_path.name} - {error_msg}")
+    
     def _monitor_session_completion(self, session_id: str, futures: List):
         """Monitor session completion and cleanup"""
         try:
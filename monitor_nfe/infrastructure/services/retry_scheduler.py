@@ -0,0 +1,147 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def backoff_delay(attempt: int, base_seconds: float = 1.0, max_seconds: float = 30.0) -> float:
+    """Exponential backoff with jitter: a random delay between half and all of base * 2^attempt"""
+    ceiling = min(max_seconds, base_seconds * (2 ** attempt))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+class RetryBudget:
+    """Process-wide budget capping retries to a fraction of the requests sent
+    
+    Every first attempt deposits ``ratio`` of a retry and every retry withdraws a whole
+    one, so a failure storm adds at most ``ratio`` extra load on top of regular traffic.
+    The balance also refills at ``min_per_second`` so isolated errors during quiet periods
+    can still be retried. It never holds more than ``max_balance`` retries.
+    """
+    
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 5.0, max_balance: int = 50):
+        self._ratio = max(0.0, ratio)
+        self._min_per_second = max(0.0, min_per_second)
+        self._max_balance = max(1, max_balance)
+        self._balance = float(self._max_balance)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._granted = 0
+        self._denied = 0
+    
+    def record_request(self):
+        """Deposit the share of a retry earned by a first attempt"""
+        with self._lock:
+            self._refill()
+            self._balance = min(self._max_balance, self._balance + self._ratio)
+    
+    def try_spend(self) -> bool:
+        """Withdraw one retry, False when the budget is exhausted"""
+        with self._lock:
+            self._refill()
+            if self._balance < 1:
+                self._denied += 1
+                return False
+            self._balance -= 1
+            self._granted += 1
+            return True
+    
+    def stats(self) -> Dict:
+        """Get budget statistics (balance, granted, denied)"""
+        with self._lock:
+            self._refill()
+            return {'balance': self._balance, 'granted': self._granted, 'denied': self._denied}
+    
+    def _refill(self):
+        """Add the time-based reserve (caller holds the lock)"""
+        now = time.monotonic()
+        self._balance = min(self._max_balance, self._balance + (now - self._updated) * self._min_per_second)
+        self._updated = now
+
+
+class RetryScheduler:
+    """Delayed-retry scheduler: a timer heap watched by one thread, due callbacks run on a pool
+    
+    A thread that must retry later hands the callback to ``schedule`` and returns at once
+    instead of sleeping through the backoff, so waiting retries never hold a worker.
+    """
+    
+    def __init__(self, workers: int = 4, thread_name_prefix: str = "NFE-Retry"):
+        self._heap: List[Tuple[float, int, Callable[[], None]]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread_name_prefix = thread_name_prefix
+        self._timer_thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=thread_name_prefix)
+    
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._heap)
+    
+    def schedule(self, delay_seconds: float, callback: Callable[[], None]):
+        """Run callback on the retry pool once delay_seconds have passed"""
+        with self._condition:
+            if not self._stopped:
+                due = time.monotonic() + max(0.0, delay_seconds)
+                heapq.heappush(self._heap, (due, next(self._sequence), callback))
+                self._ensure_timer_thread()
+                self._condition.notify()
+                return
+        
+        # Scheduler closed - retry right away on the calling thread
+        self._run(callback)
+    
+    def close(self):
+        """Run every scheduled callback now and wait for them to finish"""
+        with self._condition:
+            self._stopped = True
+            due = [callback for _, _, callback in sorted(self._heap)]
+            self._heap.clear()
+            self._condition.notify_all()
+        
+        for callback in due:
+            self._dispatch(callback)
+        self._executor.shutdown(wait=True)
+    
+    def _ensure_timer_thread(self):
+        """Start the thread firing due callbacks (caller holds the condition)"""
+        if self._timer_thread is None:
+            self._timer_thread = threading.Thread(
+                target=self._timer_loop, name=f"{self._thread_name_prefix}Timer", daemon=True
+            )
+            self._timer_thread.start()
+    
+    def _timer_loop(self):
+        """Wait for the earliest deadline and dispatch every callback that is due"""
+        while True:
+            with self._condition:
+                while not self._heap and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                
+                remaining = self._heap[0][0] - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                _, _, callback = heapq.heappop(self._heap)
+            
+            self._dispatch(callback)
+    
+    def _dispatch(self, callback: Callable[[], None]):
+        """Run a due callback on the retry pool"""
+        try:
+            self._executor.submit(self._run, callback)
+        except RuntimeError:
+            # Pool already shut down - run on the calling thread
+            self._run(callback)
+    
+    def _run(self, callback: Callable[[], None]):
+        try:
+            callback()
+        except Exception as e:
+            print(f"[RetryScheduler] ❌ Erro ao executar retry: {e}")
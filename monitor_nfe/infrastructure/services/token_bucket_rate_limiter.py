@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, List, Optional, Tuple
+
+
+def parse_retry_after(value: Optional[str], max_seconds: float = 300.0) -> Optional[float]:
+    """Parse a Retry-After header (delay in seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        seconds = (retry_at - datetime.now(timezone.utc)).total_seconds()
+    
+    return min(max(0.0, seconds), max_seconds)
+
+
+class TokenBucketRateLimiter:
+    """Process-wide token bucket for API requests with a global Retry-After pause
+    
+    Tokens refill at ``rate_per_second`` up to ``burst``. Callers reserve a token and wait
+    for their turn, so requests from every worker are spaced out instead of retrying in
+    lockstep. ``pause`` stops everyone until the server's Retry-After has elapsed and
+    then resumes at the configured rate. A rate of 0 disables rate limiting but keeps
+    the pause.
+    """
+    
+    def __init__(self, rate_per_second: float = 10.0, burst: int = 10):
+        self._rate = max(0.0, rate_per_second)
+        self._burst = max(1, burst)
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._pause_count = 0
+        self._lock = threading.Lock()
+        self._pause_listeners: List[Callable[[float, str], None]] = []
+    
+    @property
+    def rate_per_second(self) -> float:
+        """Configured request rate (0 = unlimited)"""
+        return self._rate
+    
+    @property
+    def burst(self) -> int:
+        """Maximum number of requests allowed back to back"""
+        return self._burst
+    
+    def add_pause_listener(self, listener: Callable[[float, str], None]):
+        """Register callback called with (seconds, reason) when a global pause starts"""
+        self._pause_listeners.append(listener)
+    
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block the calling thread until it may send a request
+        
+        With a ``timeout`` (seconds) returns False, without taking a token, when the turn
+        would come after it.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            reservation = self._reserve(self._remaining(deadline))
+            if reservation is None:
+                return False
+            delay, pause_count = reservation
+            if delay > 0:
+                time.sleep(delay)
+            # Tokens granted before a pause are void - queue again behind it
+            if pause_count == self._pause_count:
+                return True
+    
+    async def acquire_async(self, timeout: Optional[float] = None) -> bool:
+        """Wait on the event loop until the caller may send a request (False past ``timeout``)"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            reservation = self._reserve(self._remaining(deadline))
+            if reservation is None:
+                return False
+            delay, pause_count = reservation
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if pause_count == self._pause_count:
+                return True
+    
+    def reserve(self) -> float:
+        """Take a token and return how many seconds the caller must wait before using it"""
+        return self._reserve()[0]
+    
+    def _remaining(self, deadline: Optional[float]) -> Optional[float]:
+        return max(0.0, deadline - time.monotonic()) if deadline is not None else None
+    
+    def _reserve(self, max_wait: Optional[float] = None) -> Optional[Tuple[float, int]]:
+        """Take a token, return (delay, pause count) - None, token kept, if the delay exceeds ``max_wait``"""
+        with self._lock:
+            now = time.monotonic()
+            
+            if self._rate == 0:
+                delay = max(0.0, self._paused_until - now)
+                if max_wait is not None and delay > max_wait:
+                    return None
+                return delay, self._pause_count
+            
+            if now > self._updated:
+                self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+            
+            ready_at = self._updated + max(0.0, 1 - self._tokens) / self._rate
+            delay = max(0.0, ready_at - now, self._paused_until - now)
+            if max_wait is not None and delay > max_wait:
+                return None
+            
+            self._tokens -= 1
+            return delay, self._pause_count
+    
+    def pause(self, seconds: float, reason: str = "Retry-After"):
+        """Stop all requests for the given number of seconds"""
+        if seconds <= 0:
+            return
+        
+        with self._lock:
+            now = time.monotonic()
+            until = now + seconds
+            if until <= self._paused_until:
+                return
+            
+            # Waiting callers queue again behind the pause, so their debt is dropped:
+            # no refill during the pause and no burst after it - resume at the configured rate
+            self._tokens = 1.0
+            self._updated = until
+            self._paused_until = until
+            self._pause_count += 1
+        
+        print(f"[TokenBucketRateLimiter] ⏸️  Envios pausados por {seconds:.1f}s ({reason})")
+        for listener in self._pause_listeners:
+            try:
+                listener(seconds, reason)
+            except Exception as e:
+                print(f"[TokenBucketRateLimiter] ⚠️  Erro no listener: {e}")
+    
+    def pause_remaining(self) -> float:
+        """Seconds left in the current global pause"""
+        with self._lock:
+            return max(0.0, self._paused_until - time.monotonic())
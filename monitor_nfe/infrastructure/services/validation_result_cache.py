@@ -0,0 +1,54 @@
+import copy
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from application.interfaces.services import IValidationResultCache
+from domain.entities.validation_result import ValidationResult
+
+
+class LRUValidationResultCache(IValidationResultCache):
+    """In-memory LRU cache of final validation results, bounded to ``max_entries``
+    
+    Results are copied on the way in and out so callers can stamp path and timing on
+    their copy without touching the cached outcome.
+    """
+    
+    def __init__(self, max_entries: int = 5000):
+        self._max_entries = max(1, max_entries)
+        self._entries: 'OrderedDict[str, ValidationResult]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+    
+    def get(self, key: str) -> Optional[ValidationResult]:
+        """Get the result cached for a key, or None"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return copy.deepcopy(result)
+    
+    def put(self, key: str, result: ValidationResult):
+        """Cache a final validation result, evicting the least recently used one when full"""
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict:
+        """Get cache statistics (hits, misses, size, max_entries, hit_ratio)"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'size': len(self._entries),
+                'max_entries': self._max_entries,
+                'hit_ratio': self._hits / lookups if lookups else 0.0
+            }
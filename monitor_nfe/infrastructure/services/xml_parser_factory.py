@@ -0,0 +1,65 @@
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from lxml import etree
+
+# Per-thread parsers, keyed by (schema, encoding) - lxml parsers must not be shared across threads
+_local = threading.local()
+
+
+def hardened_parser(schema: Optional[etree.XMLSchema] = None, encoding: Optional[str] = None) -> etree.XMLParser:
+    """This thread's reusable parser configured for NFe documents
+    
+    Entities are never expanded and no DTD or network resource is loaded, which closes
+    the XXE and billion-laughs paths. libxml2's depth and size limits stay on
+    (huge_tree=False - NFe files are capped at 5MB anyway), ID attributes are not
+    indexed, and whitespace is kept as-is because signed content must keep its bytes.
+    The same parser is reused for every parse in the thread, so no parser state is
+    allocated per document.
+    """
+    parsers: Dict[Tuple[Optional[etree.XMLSchema], Optional[str]], etree.XMLParser] = getattr(_local, 'parsers', None)
+    if parsers is None:
+        parsers = _local.parsers = {}
+    
+    key = (schema, encoding)
+    parser = parsers.get(key)
+    if parser is None:
+        parser = parsers[key] = etree.XMLParser(
+            encoding=encoding,
+            schema=schema,
+            resolve_entities=False,
+            load_dtd=False,
+            dtd_validation=False,
+            no_network=True,
+            huge_tree=False,
+            collect_ids=False,
+            remove_blank_text=False
+        )
+    return parser
+
+
+def release_parser(schema: Optional[etree.XMLSchema] = None, encoding: Optional[str] = None):
+    """Drop this thread's parser for (schema, encoding), freeing the error log it holds
+    
+    A parser keeps the error log of its last parse until the next one, so after a document
+    with thousands of schema errors the next hardened_parser call builds a fresh parser.
+    """
+    parsers = getattr(_local, 'parsers', None)
+    if parsers is not None:
+        parsers.pop((schema, encoding), None)
+
+
+def parse_xml(xml_bytes: bytes, schema: Optional[etree.XMLSchema] = None,
+              encoding: Optional[str] = None) -> etree._Element:
+    """Parse XML bytes with this thread's hardened parser"""
+    return etree.fromstring(xml_bytes, hardened_parser(schema, encoding))
+
+
+def parse_xml_file(file_path: Path) -> etree._ElementTree:
+    """Parse an XML file (e.g. an XSD) with this thread's hardened parser"""
+    return etree.parse(str(file_path), hardened_parser())
+
+
+def load_schema(schema_path: Path) -> etree.XMLSchema:
+    """Compile an XSD file; its includes and imports are resolved from the local folder only"""
+    return etree.XMLSchema(parse_xml_file(schema_path))
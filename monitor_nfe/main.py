@@ -14,6 +14,7 @@ from PySide6.QtGui import QFont, QColor
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from lxml import etree
+from infrastructure.services.xml_parser_factory import parse_xml, parse_xml_file
 # from signxml import XMLVerifier  # Not needed since we simplified signature validation
 import zipfile
 import tempfile
@@ -487,8 +488,7 @@ class XMLValidator:
             
             if nfe_schema_path.exists():
                 try:
-                    with open(nfe_schema_path, 'r', encoding='utf-8') as f:
-                        schema_doc = etree.parse(f)
+                    schema_doc = parse_xml_file(nfe_schema_path)
                     self.schemas['nfe'] = etree.XMLSchema(schema_doc)
                     schema_count += 1
                     print("   ✅ Schema NFe carregado com sucesso!")
@@ -503,8 +503,7 @@ class XMLValidator:
             
             if proc_schema_path.exists():
                 try:
-                    with open(proc_schema_path, 'r', encoding='utf-8') as f:
-                        proc_doc = etree.parse(f)
+                    proc_doc = parse_xml_file(proc_schema_path)
                     self.schemas['procNFe'] = etree.XMLSchema(proc_doc)
                     schema_count += 1
                     print("   ✅ Schema procNFe carregado com sucesso!")
@@ -550,7 +549,7 @@ class XMLValidator:
                     content = f.read()
                 
                 # Parse XML
-                tree = etree.fromstring(content.encode('utf-8'))
+                tree = parse_xml(content.encode('utf-8'))
                 
                 # Get root tag without namespace
                 root_tag = tree.tag.split('}')[-1] if '}' in tree.tag else tree.tag
@@ -667,7 +666,7 @@ class XMLValidator:
                     print(f"   Tentando parsing com encoding: {encoding}")
                     with open(xml_path, 'r', encoding=encoding) as f:
                         content = f.read()
-                    xml_doc = etree.fromstring(content.encode('utf-8'))
+                    xml_doc = parse_xml(content.encode('utf-8'))
                     print(f"   ✅ Parsing com {encoding} bem-sucedido!")
                     break
                 except Exception as e:
@@ -709,7 +708,7 @@ class XMLValidator:
             
             # Try parsing with better error handling  
             try:
-                xml_doc = etree.parse(xml_path)
+                xml_doc = parse_xml_file(xml_path)
             except etree.XMLSyntaxError as e:
                 return f"XML mal formado ✗: {str(e)[:30]}..."
             except Exception as e:
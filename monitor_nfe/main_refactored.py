@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import sys
 import locale
+import multiprocessing
 from pathlib import Path
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, 
@@ -219,6 +220,14 @@ class MainWindow(QMainWindow):
         self.reprocess_card.mousePressEvent = self.on_reprocess_card_clicked
         stats_layout.addWidget(self.reprocess_card)
         
+        # Adaptive upload concurrency card
+        self.concurrency_card = self.create_stat_card("⚙️", "-", "Envios Simultâneos")
+        stats_layout.addWidget(self.concurrency_card)
+        
+        # Validation result cache card
+        self.cache_card = self.create_stat_card("♻️", "-", "Cache de Resultados")
+        stats_layout.addWidget(self.cache_card)
+        
         stats_layout.addStretch()
         
         main_layout.addLayout(stats_layout)
@@ -329,6 +338,7 @@ class MainWindow(QMainWindow):
         self.view_model.validation_result_added.connect(self.on_validation_result_added)
         self.view_model.configuration_changed.connect(self.on_configuration_changed)
         self.view_model.processing_progress.connect(self.on_processing_progress)
+        self.view_model.upload_concurrency_changed.connect(self.on_upload_concurrency_changed)
     
     def setup_timers(self):
         """Setup automatic update timers"""
@@ -608,6 +618,29 @@ class MainWindow(QMainWindow):
         # Update reprocess card count
         self.update_reprocess_count()
         
+        # Update adaptive upload concurrency card
+        concurrency = self.view_model.upload_concurrency
+        if concurrency:
+            self.on_upload_concurrency_changed(concurrency['limit'], concurrency['reason'])
+        
+        # Append upload compression metrics to the same card
+        compression = self.view_model.upload_compression
+        if compression and compression['documents']:
+            self.concurrency_card.setToolTip(
+                f"{self.concurrency_card.toolTip()}\n"
+                f"Compressão {compression['encoding']}: {compression['ratio']:.1f}x, "
+                f"{compression['avg_time_ms']:.1f}ms por documento"
+            )
+        
+        # Update validation result cache card
+        cache_stats = self.view_model.result_cache_stats
+        if cache_stats and (cache_stats['hits'] or cache_stats['misses']):
+            self.cache_card.value_label.setText(f"{cache_stats['hit_ratio'] * 100:.0f}%")
+            self.cache_card.setToolTip(
+                f"{cache_stats['hits']} acerto(s), {cache_stats['misses']} falta(s)\n"
+                f"{cache_stats['size']}/{cache_stats['max_entries']} resultado(s) em cache"
+            )
+        
         # Update status indicator
         if is_monitoring:
             self.status_indicator.setText("●")
@@ -828,6 +861,11 @@ class MainWindow(QMainWindow):
         # Also update statistics cards on progress updates
         self.update_statistics_realtime()
     
+    def on_upload_concurrency_changed(self, limit: int, reason: str):
+        """Handle adaptive upload concurrency changes"""
+        self.concurrency_card.value_label.setText(str(limit))
+        self.concurrency_card.setToolTip(f"Último ajuste: {reason}")
+    
     def add_log_entry(self, message: str):
         """Add entry to log area"""
         from datetime import datetime
@@ -1063,4 +1101,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Needed by the XSD validation worker processes in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     sys.exit(main())
\ No newline at end of file
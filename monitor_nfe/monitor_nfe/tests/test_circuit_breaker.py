@@ -0,0 +1,129 @@
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from application.interfaces.services import IAPIService
+from domain.entities.validation_result import APIResponse
+from infrastructure.external_services.circuit_breaker_api_service import CircuitBreakerAPIService
+from infrastructure.services.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+
+RESET_SECONDS = 0.1
+
+
+@pytest.fixture
+def breaker():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout_seconds=RESET_SECONDS,
+                             max_reset_timeout_seconds=RESET_SECONDS * 3)
+    breaker.changes = []
+    breaker.add_listener(lambda state, reason: breaker.changes.append(state))
+    return breaker
+
+
+def open_circuit(breaker):
+    for _ in range(3):
+        breaker.record_failure("HTTP 503")
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_opens_after_consecutive_failures_only(breaker):
+    breaker.record_failure("HTTP 503")
+    breaker.record_failure("HTTP 503")
+    breaker.record_success()
+    breaker.record_failure("HTTP 503")
+    breaker.record_failure("HTTP 503")
+    assert breaker.state == CircuitState.CLOSED
+    breaker.check()
+
+    breaker.record_failure("HTTP 503")
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.changes == [CircuitState.OPEN]
+    assert not breaker.allow_request()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_probe_waits_for_the_reset_timeout(breaker):
+    open_circuit(breaker)
+    assert not breaker.begin_probe()
+    assert 0 < breaker.seconds_until_probe() <= RESET_SECONDS
+
+    time.sleep(RESET_SECONDS * 1.5)
+    assert breaker.begin_probe()
+    assert breaker.state == CircuitState.HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.begin_probe()
+    assert not breaker.allow_request()
+
+
+def test_healthy_probe_closes_the_circuit(breaker):
+    open_circuit(breaker)
+    time.sleep(RESET_SECONDS * 1.5)
+    breaker.begin_probe()
+    breaker.end_probe(healthy=True)
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.consecutive_failures == 0
+    assert breaker.changes == [CircuitState.OPEN, CircuitState.HALF_OPEN, CircuitState.CLOSED]
+
+
+def test_failed_probe_reopens_with_a_longer_wait(breaker):
+    open_circuit(breaker)
+    time.sleep(RESET_SECONDS * 1.5)
+    breaker.begin_probe()
+    breaker.end_probe(healthy=False)
+
+    assert breaker.state == CircuitState.OPEN
+    assert RESET_SECONDS < breaker.seconds_until_probe() <= RESET_SECONDS * 2
+    time.sleep(RESET_SECONDS)
+    assert not breaker.begin_probe()
+
+
+class FakeAPIService(IAPIService):
+    """Answers every upload with ``response``, counting failures on the breaker like the real service"""
+
+    def __init__(self, breaker, response):
+        self.breaker = breaker
+        self.response = response
+        self.uploads = 0
+
+    def validate_nfe(self, document, token, idempotency_key=None):
+        self.uploads += 1
+        if self.response.status_code is None or self.response.status_code >= 500:
+            self.breaker.record_failure(self.response.message)
+        return self.response
+
+    def test_connection(self, token):
+        return False
+
+    def close(self):
+        pass
+
+
+def test_open_circuit_completes_uploads_as_pending_without_sending(breaker):
+    upstream = FakeAPIService(breaker, APIResponse(success=True, message="ok", status_code=200))
+    service = CircuitBreakerAPIService(upstream, breaker)
+    try:
+        open_circuit(breaker)
+        future = service.submit(document=None, token="token")
+
+        assert isinstance(future, Future) and future.done()
+        response = future.result()
+        assert response.data == {'pending': True}
+        assert not response.is_definitive
+        assert upstream.uploads == 0
+    finally:
+        service.close()
+
+
+def test_failure_that_opens_the_circuit_is_reported_as_pending(breaker):
+    upstream = FakeAPIService(breaker, APIResponse(success=False, message="HTTP 503", status_code=503))
+    service = CircuitBreakerAPIService(upstream, breaker)
+    try:
+        responses = [service.validate_nfe(document=None, token="token") for _ in range(3)]
+
+        assert [response.status_code for response in responses[:2]] == [503, 503]
+        assert responses[2].data == {'pending': True}
+        assert upstream.uploads == 3
+    finally:
+        service.close()
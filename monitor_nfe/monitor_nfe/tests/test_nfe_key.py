@@ -0,0 +1,64 @@
+import pytest
+
+from domain.value_objects.nfe_key import NFEKey, compute_check_digit, is_valid_nfe_key
+from infrastructure.services.nfe_key_batch_validator import NFEKeyBatchValidator
+import infrastructure.services.nfe_key_batch_validator as batch_module
+
+BASE = "3519060853052800018455001000000154" + "100077156"
+
+
+def reference_check_digit(digits: str) -> int:
+    """Modulo 11 as written in the NFe manual: weights 2..9 from the right"""
+    total = sum(int(digit) * (2 + index % 8) for index, digit in enumerate(reversed(digits)))
+    remainder = total % 11
+    return 0 if remainder < 2 else 11 - remainder
+
+
+def make_key(base: str = BASE) -> str:
+    return base + str(reference_check_digit(base))
+
+
+@pytest.mark.parametrize("base", [BASE, "0" * 43, "9" * 43, "1234567890" * 4 + "123"])
+def test_check_digit_matches_reference(base):
+    assert compute_check_digit(base) == reference_check_digit(base)
+    assert is_valid_nfe_key(make_key(base))
+
+
+def test_wrong_check_digit_is_rejected():
+    key = make_key()
+    wrong = key[:-1] + str((int(key[-1]) + 1) % 10)
+    assert not is_valid_nfe_key(wrong)
+    assert NFEKey.from_string(wrong) is None
+
+
+@pytest.mark.parametrize("value", ["", "123", make_key() + "0", make_key()[:-2] + "x" + make_key()[-1],
+                                   "٣" * 44])
+def test_malformed_keys_are_rejected(value):
+    assert not is_valid_nfe_key(value)
+
+
+def test_nfe_key_parses_formatted_value_and_fields():
+    key = make_key()
+    nfe_key = NFEKey(' '.join(key[i:i + 4] for i in range(0, 44, 4)))
+    assert nfe_key.clean == key
+    assert nfe_key == NFEKey(key)
+    assert nfe_key.uf_code == "35"
+    assert nfe_key.model == "55"
+    assert nfe_key.check_digit == int(key[-1])
+
+
+def test_batch_validator_flags_each_key_in_order():
+    valid = make_key()
+    wrong = valid[:-1] + str((int(valid[-1]) + 1) % 10)
+    keys = [valid, wrong, "", "abc", valid[:-2] + "x" + valid[-1], "ç" * 44, make_key("9" * 43)]
+
+    validator = NFEKeyBatchValidator(chunk_size=3)
+    assert validator.validate(keys) == [is_valid_nfe_key(key) for key in keys]
+    assert validator.invalid_keys(keys) == keys[1:6]
+
+
+def test_batch_validator_without_numpy(monkeypatch):
+    monkeypatch.setattr(batch_module, 'np', None)
+    validator = NFEKeyBatchValidator()
+    assert not validator.is_vectorized
+    assert validator.validate([make_key(), "123"]) == [True, False]
@@ -0,0 +1,69 @@
+import sqlite3
+import time
+
+import pytest
+
+from domain.value_objects.nfe_key import compute_check_digit
+from infrastructure.data_access.sqlite_nfe_key_ledger import SQLiteNFEKeyLedger
+
+
+def make_key(serial: int) -> str:
+    base = f"35190608530528000184550010{serial:017d}"
+    return base + str(compute_check_digit(base))
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    return tmp_path / 'nfe_keys.db'
+
+
+def stored_rows(database_path):
+    with sqlite3.connect(str(database_path)) as connection:
+        return connection.execute("SELECT nfe_key, status_code FROM accepted_keys").fetchall()
+
+
+def test_recorded_keys_are_found_and_persisted(database_path):
+    ledger = SQLiteNFEKeyLedger(database_path)
+    ledger.record(make_key(1), 200)
+    ledger.record(make_key(2), 409)
+    ledger.record(make_key(1), 409)
+    assert ledger.contains(make_key(1)) and ledger.contains(make_key(2))
+    assert not ledger.contains(make_key(3))
+    ledger.close()
+
+    reopened = SQLiteNFEKeyLedger(database_path)
+    try:
+        assert len(reopened) == 2
+        assert reopened.contains(make_key(2))
+    finally:
+        reopened.close()
+    # The first answer for a key is the one kept
+    assert sorted(stored_rows(database_path)) == [(make_key(1), 200), (make_key(2), 409)]
+
+
+@pytest.mark.parametrize("key", [None, "", "123", make_key(1)[:-1] + str((int(make_key(1)[-1]) + 1) % 10)])
+def test_invalid_keys_are_neither_stored_nor_found(database_path, key):
+    ledger = SQLiteNFEKeyLedger(database_path)
+    try:
+        ledger.record(key, 200)
+        assert not ledger.contains(key)
+        assert len(ledger) == 0
+    finally:
+        ledger.close()
+    assert stored_rows(database_path) == []
+
+
+def test_invalid_stored_rows_are_skipped_on_load(database_path):
+    SQLiteNFEKeyLedger(database_path).close()
+    with sqlite3.connect(str(database_path)) as connection:
+        connection.executemany(
+            "INSERT INTO accepted_keys (nfe_key, status_code, recorded_at) VALUES (?, 200, ?)",
+            [(make_key(1), time.time()), (make_key(2)[:-1] + "x", time.time()), ("not a key", time.time())]
+        )
+
+    ledger = SQLiteNFEKeyLedger(database_path)
+    try:
+        assert len(ledger) == 1
+        assert ledger.contains(make_key(1))
+    finally:
+        ledger.close()
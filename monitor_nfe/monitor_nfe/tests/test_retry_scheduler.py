@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from infrastructure.services.retry_scheduler import RetryBudget, RetryScheduler, backoff_delay
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = RetryScheduler(workers=2)
+    yield scheduler
+    scheduler.close()
+
+
+@pytest.mark.parametrize("attempt, ceiling", [(0, 1.0), (1, 2.0), (3, 8.0), (10, 30.0)])
+def test_backoff_delay_is_jittered_below_the_capped_ceiling(attempt, ceiling):
+    delays = [backoff_delay(attempt, base_seconds=1.0, max_seconds=30.0) for _ in range(200)]
+    assert all(ceiling / 2 <= delay <= ceiling for delay in delays)
+
+
+def test_budget_denies_retries_once_exhausted():
+    budget = RetryBudget(ratio=0.5, min_per_second=0, max_balance=2)
+
+    assert budget.try_spend() and budget.try_spend()
+    assert not budget.try_spend()
+
+    # Two first attempts earn one retry back
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+    stats = budget.stats()
+    assert (stats['granted'], stats['denied']) == (3, 2)
+
+
+def test_budget_balance_is_capped():
+    budget = RetryBudget(ratio=1.0, min_per_second=0, max_balance=1)
+    for _ in range(10):
+        budget.record_request()
+
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+
+def test_callbacks_run_in_due_order_off_the_scheduling_thread(scheduler):
+    ran = []
+    done = threading.Event()
+
+    def callback(name):
+        ran.append((name, threading.current_thread()))
+        if len(ran) == 3:
+            done.set()
+
+    started = time.monotonic()
+    scheduler.schedule(0.3, lambda: callback('late'))
+    scheduler.schedule(0.1, lambda: callback('early'))
+    scheduler.schedule(0.2, lambda: callback('middle'))
+    # Scheduling returns at once; nothing waits on the caller's thread
+    assert ran == []
+    assert len(scheduler) == 3
+
+    assert done.wait(2)
+    assert [name for name, _ in ran] == ['early', 'middle', 'late']
+    assert all(thread is not threading.current_thread() for _, thread in ran)
+    assert time.monotonic() - started >= 0.3
+
+
+def test_close_runs_waiting_callbacks_and_later_ones_inline():
+    scheduler = RetryScheduler(workers=1)
+    ran = []
+    scheduler.schedule(60, lambda: ran.append('waiting'))
+
+    scheduler.close()
+    assert ran == ['waiting']
+
+    scheduler.schedule(60, lambda: ran.append(threading.current_thread()))
+    assert ran[-1] is threading.current_thread()
+
+
+def test_failing_callback_does_not_stop_the_scheduler(scheduler):
+    done = threading.Event()
+    scheduler.schedule(0, lambda: 1 / 0)
+    scheduler.schedule(0.01, done.set)
+    assert done.wait(2)
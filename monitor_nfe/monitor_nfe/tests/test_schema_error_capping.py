@@ -0,0 +1,120 @@
+from pathlib import Path
+
+import pytest
+from lxml import etree
+
+from domain.entities.nfe_document import NFEDocument
+from domain.entities.validation_result import ValidationType
+from infrastructure.external_services.xml_schema_service import (
+    MAX_GROUPED_MESSAGES, XMLSchemaService, collect_schema_errors, validate_while_parsing
+)
+from infrastructure.services.xml_parser_factory import hardened_parser
+
+SCHEMAS_FOLDER = Path(__file__).resolve().parents[2] / 'schemas'
+
+ITEMS_SCHEMA = etree.XMLSchema(etree.fromstring(b'''
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="items">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="item" type="xs:int" maxOccurs="unbounded"/>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+'''))
+
+
+def items_document(values) -> bytes:
+    return ('<items>' + ''.join(f'<item>{value}</item>' for value in values) + '</items>').encode()
+
+
+def error_log_for(values):
+    ITEMS_SCHEMA.validate(etree.fromstring(items_document(values)))
+    return ITEMS_SCHEMA.error_log
+
+
+def test_errors_under_the_cap_are_all_detailed():
+    records = collect_schema_errors(error_log_for(['x'] * 5), max_errors=10)
+    assert len(records) == 5
+    assert not any(record.is_group for record in records)
+    assert all(record.line for record in records)
+
+
+def test_uncapped_reports_every_error():
+    assert len(collect_schema_errors(error_log_for(['x'] * 50), max_errors=0)) == 50
+
+
+def test_errors_past_the_cap_are_counted_by_message():
+    records = collect_schema_errors(error_log_for(['x'] * 30 + ['y'] * 10), max_errors=5)
+
+    detailed = [record for record in records if not record.is_group]
+    grouped = {record.message.split("'")[3]: record.count for record in records if record.is_group}
+    assert len(detailed) == 5
+    assert grouped == {'x': 25, 'y': 10}
+
+
+def test_grouped_messages_are_capped_too():
+    values = [f'v{index}' for index in range(50)]
+    records = collect_schema_errors(error_log_for(values), max_errors=5)
+
+    groups = [record for record in records if record.is_group]
+    assert len(groups) == MAX_GROUPED_MESSAGES + 1
+    assert groups[-1].message == ''
+    assert sum(record.count for record in groups) == 45
+
+
+def test_validate_while_parsing():
+    tree, errors = validate_while_parsing(items_document([1, 2]), ITEMS_SCHEMA)
+    assert tree is not None and errors == []
+
+    tree, errors = validate_while_parsing(items_document(['x'] * 10), ITEMS_SCHEMA, max_errors=1)
+    assert tree is None
+    assert not errors[0].is_group
+    assert sum(error.count or 1 for error in errors) == 10
+
+    # Not well-formed: left to the two-pass path for the parse error
+    assert validate_while_parsing(b'<items><item>1</items>', ITEMS_SCHEMA) == (None, None)
+
+
+@pytest.fixture(scope='module')
+def invalid_nfe(tmp_path_factory):
+    path = tmp_path_factory.mktemp('schema') / 'invalid.xml'
+    path.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe" versao="4.00"><NFe>'
+        '<infNFe versao="4.00" Id="NFe35190608530528000184550010000001541000771561">'
+        '<ide><cUF>XX</cUF></ide></infNFe></NFe></nfeProc>'
+    )
+    return path
+
+
+def schema_errors(invalid_nfe, **options):
+    service = XMLSchemaService(SCHEMAS_FOLDER, **options)
+    assert service.load_schemas()
+    result = service.validate_against_schema(NFEDocument(file_path=invalid_nfe))
+    assert result.schema_valid is False
+    return [error for error in result.errors if error.error_type == ValidationType.SCHEMA]
+
+
+def test_service_caps_detailed_errors(invalid_nfe):
+    every_error = schema_errors(invalid_nfe)
+    capped = schema_errors(invalid_nfe, max_errors=1)
+
+    assert len(every_error) > 1
+    assert not capped[0].details.startswith('Mais')
+    assert all(error.details.startswith('Mais') for error in capped[1:])
+
+
+def test_fail_fast_details_only_the_first_error(invalid_nfe):
+    errors = schema_errors(invalid_nfe, fail_fast=True)
+
+    assert not errors[0].details.startswith('Mais')
+    assert all(error.details.startswith('Mais') for error in errors[1:])
+
+
+def test_capped_validation_releases_the_parser_error_log():
+    _, errors = validate_while_parsing(items_document(['x'] * 1000), ITEMS_SCHEMA, max_errors=1)
+
+    assert sum(error.count or 1 for error in errors) == 1000
+    assert len(hardened_parser(ITEMS_SCHEMA).error_log) == 0
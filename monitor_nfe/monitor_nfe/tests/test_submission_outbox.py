@@ -0,0 +1,227 @@
+import hashlib
+from concurrent.futures import Future
+
+import pytest
+
+from application.use_cases.drain_outbox_use_case import DrainOutboxUseCase
+from application.use_cases.process_file_use_case import ProcessFileUseCase, ProcessFileUseCaseRequest
+from application.use_cases.validate_nfe_use_case import ValidateNFeUseCase
+from domain.entities.configuration import Configuration
+from domain.entities.nfe_document import NFEType
+from domain.entities.validation_result import APIResponse, ValidationResult, ValidationStatus
+from infrastructure.data_access.sqlite_submission_outbox import SQLiteSubmissionOutbox
+from infrastructure.external_services.circuit_breaker_api_service import CircuitBreakerAPIService
+from infrastructure.file_system.file_organizer_service import FileOrganizerService
+
+TOKEN = "a" * 32
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = SQLiteSubmissionOutbox(tmp_path / 'outbox.db')
+    yield outbox
+    outbox.close()
+
+
+def accepted() -> APIResponse:
+    return APIResponse(success=True, message="ok", status_code=200)
+
+
+def test_enqueue_reuses_the_pending_entry_for_the_same_content(outbox):
+    first = outbox.enqueue("hash-1", "/monitor/a.xml")
+    again = outbox.enqueue("hash-1", "/monitor/a.xml")
+    other = outbox.enqueue("hash-2", "/monitor/b.xml")
+
+    assert again.idempotency_key == first.idempotency_key
+    assert other.idempotency_key != first.idempotency_key
+    assert [entry.idempotency_key for entry in outbox.pending()] == [first.idempotency_key, other.idempotency_key]
+
+
+def test_acknowledge_is_idempotent(outbox):
+    entry = outbox.enqueue("hash-1", "/monitor/a.xml")
+    outbox.acknowledge(entry.idempotency_key, accepted())
+    outbox.acknowledge(entry.idempotency_key, accepted())
+
+    assert outbox.pending() == []
+    # Once acknowledged, the same content is a new submission
+    assert outbox.enqueue("hash-1", "/monitor/a.xml").idempotency_key != entry.idempotency_key
+
+
+def test_pending_entries_survive_reopening(tmp_path):
+    outbox = SQLiteSubmissionOutbox(tmp_path / 'outbox.db')
+    entry = outbox.enqueue("hash-1", "/monitor/a.xml", "1" * 44)
+    outbox.close()
+
+    reopened = SQLiteSubmissionOutbox(tmp_path / 'outbox.db')
+    try:
+        [pending] = reopened.pending()
+        assert (pending.idempotency_key, pending.nfe_key) == (entry.idempotency_key, "1" * 44)
+    finally:
+        reopened.close()
+
+
+def test_relocate_moves_only_pending_entries(outbox):
+    pending = outbox.enqueue("hash-1", "/monitor/a.xml")
+    done = outbox.enqueue("hash-2", "/monitor/a.xml")
+    outbox.acknowledge(done.idempotency_key, accepted())
+
+    assert outbox.relocate("/monitor/a.xml", "/output/a.xml") == 1
+    assert [(entry.idempotency_key, entry.file_path) for entry in outbox.pending()] == [
+        (pending.idempotency_key, "/output/a.xml")
+    ]
+
+
+class FakeAPIService:
+    def __init__(self, response: APIResponse):
+        self.response = response
+        self.keys = []
+
+    def submit(self, document, token, idempotency_key=None) -> Future:
+        self.keys.append(idempotency_key)
+        future = Future()
+        future.set_result(self.response)
+        return future
+
+
+class FakeConfigRepository:
+    def __init__(self, output_folder=None):
+        self.output_folder = output_folder
+
+    def load_configuration(self):
+        return Configuration(token=TOKEN, max_workers=2, output_folder=self.output_folder)
+
+
+class FakeLogRepository:
+    def __init__(self):
+        self.warnings = []
+
+    def log_info(self, message):
+        pass
+
+    def log_debug(self, message):
+        pass
+
+    def log_warning(self, message):
+        self.warnings.append(message)
+
+    def log_error(self, message, exception=None):
+        raise AssertionError(message)
+
+
+def enqueue_file(outbox, path, content: bytes):
+    path.write_bytes(content)
+    return outbox.enqueue(hashlib.sha256(content).hexdigest(), str(path))
+
+
+def drain(outbox, response):
+    api_service = FakeAPIService(response)
+    log_repository = FakeLogRepository()
+    use_case = DrainOutboxUseCase(outbox, api_service, FakeConfigRepository(), log_repository)
+    return use_case.execute(), api_service, log_repository
+
+
+def test_drain_resends_with_the_original_key_and_acknowledges(outbox, tmp_path):
+    entry = enqueue_file(outbox, tmp_path / 'a.xml', b'<a/>')
+
+    response, api_service, _ = drain(outbox, accepted())
+
+    assert api_service.keys == [entry.idempotency_key]
+    assert (response.acknowledged, response.still_pending) == (1, 0)
+    assert outbox.pending() == []
+
+
+def test_drain_keeps_entries_without_a_definitive_answer(outbox, tmp_path):
+    enqueue_file(outbox, tmp_path / 'a.xml', b'<a/>')
+
+    response, _, _ = drain(outbox, APIResponse(success=False, message="HTTP 503", status_code=503))
+
+    assert (response.acknowledged, response.still_pending) == (0, 1)
+    assert len(outbox.pending()) == 1
+
+
+def test_drain_keeps_and_reports_entries_whose_file_is_missing_or_changed(outbox, tmp_path):
+    enqueue_file(outbox, tmp_path / 'gone.xml', b'<a/>')
+    enqueue_file(outbox, tmp_path / 'changed.xml', b'<b/>')
+    (tmp_path / 'gone.xml').unlink()
+    (tmp_path / 'changed.xml').write_bytes(b'<c/>')
+
+    response, api_service, log_repository = drain(outbox, accepted())
+
+    assert api_service.keys == []
+    assert (response.missing, response.still_pending) == (2, 2)
+    assert len(outbox.pending()) == 2
+    assert any('gone.xml' in warning for warning in log_repository.warnings)
+
+
+class FakeValidationService:
+    def validate_structure(self, document):
+        return ValidationResult(document_path=str(document.file_path), status=ValidationStatus.SUCCESS)
+
+    def detect_document_type(self, document):
+        return NFEType.PROC_NFE
+
+
+class FakeSchemaService:
+    def parse_document(self, context):
+        return None
+
+    def has_schemas_loaded(self):
+        return True
+
+    def validate_against_schema(self, document):
+        return ValidationResult(document_path=str(document.file_path), status=ValidationStatus.SUCCESS)
+
+
+def test_document_held_while_the_api_is_down_is_finished_by_the_drain(outbox, tmp_path):
+    output = tmp_path / 'output'
+    held = output / 'pending' / 'a.xml'
+    xml_file = tmp_path / 'a.xml'
+    xml_file.write_bytes(b'<?xml version="1.0"?><nfeProc/>')
+
+    api_service = FakeAPIService(CircuitBreakerAPIService.pending_response())
+    config_repository = FakeConfigRepository(str(output))
+    log_repository = FakeLogRepository()
+    process_use_case = ProcessFileUseCase(
+        validate_nfe_use_case=ValidateNFeUseCase(
+            FakeValidationService(), FakeSchemaService(), api_service, config_repository, log_repository, outbox=outbox
+        ),
+        archive_service=None,
+        file_organizer_service=FileOrganizerService(),
+        config_repository=config_repository,
+        log_repository=log_repository,
+        outbox=outbox
+    )
+
+    [pending_result] = process_use_case.execute(ProcessFileUseCaseRequest(file_path=xml_file)).results
+
+    # Held, not routed to reprocess/ with a failure log
+    assert pending_result.is_pending and not pending_result.has_errors
+    assert held.exists() and not (output / 'reprocess').exists() and not (output / 'logs').exists()
+    assert [entry.file_path for entry in outbox.pending()] == [str(held)]
+
+    api_service.response = accepted()
+    drain_use_case = DrainOutboxUseCase(
+        outbox, api_service, config_repository, log_repository, process_file_use_case=process_use_case
+    )
+    results = []
+    drain_use_case.set_result_callback(results.append)
+    response = drain_use_case.execute()
+
+    assert (response.acknowledged, response.completed) == (1, 1)
+    assert [(result.is_valid, result.api_response.status_code) for result in results] == [(True, 200)]
+    assert (output / 'processed' / 'a.xml').exists() and not held.exists()
+    assert 'Status HTTP: 200' in (output / 'logs' / 'a_processing.log').read_text(encoding='utf-8')
+    assert outbox.pending() == []
+
+
+def test_drain_does_not_finish_documents_that_were_not_held(outbox, tmp_path):
+    enqueue_file(outbox, tmp_path / 'a.xml', b'<a/>')
+    process_use_case = ProcessFileUseCase(None, None, FileOrganizerService(),
+                                          FakeConfigRepository(str(tmp_path / 'output')), FakeLogRepository())
+    drain_use_case = DrainOutboxUseCase(outbox, FakeAPIService(accepted()), FakeConfigRepository(),
+                                        FakeLogRepository(), process_file_use_case=process_use_case)
+
+    response = drain_use_case.execute()
+
+    assert (response.acknowledged, response.completed) == (1, 0)
+    assert (tmp_path / 'a.xml').exists()
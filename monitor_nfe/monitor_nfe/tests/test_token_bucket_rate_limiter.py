@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+from infrastructure.services.token_bucket_rate_limiter import TokenBucketRateLimiter, parse_retry_after
+
+
+def test_zero_rate_never_waits():
+    limiter = TokenBucketRateLimiter(rate_per_second=0)
+    assert all(limiter.acquire(timeout=0) for _ in range(100))
+
+
+def test_burst_then_spaced_at_the_rate():
+    limiter = TokenBucketRateLimiter(rate_per_second=10, burst=2)
+    assert limiter.acquire(timeout=0) and limiter.acquire(timeout=0)
+
+    started = time.monotonic()
+    assert limiter.acquire(timeout=1)
+    assert 0.05 <= time.monotonic() - started <= 0.5
+
+
+def test_acquire_gives_up_at_the_timeout_without_taking_a_token():
+    limiter = TokenBucketRateLimiter(rate_per_second=2, burst=1)
+    assert limiter.acquire()
+
+    started = time.monotonic()
+    assert not limiter.acquire(timeout=0.1)
+    assert time.monotonic() - started < 0.1
+    # The refused caller left no debt: the next token is still 0.5s after the first
+    assert limiter.acquire(timeout=0.6)
+
+
+def test_pause_is_bounded_by_the_timeout():
+    limiter = TokenBucketRateLimiter(rate_per_second=0)
+    limiter.pause(5)
+
+    assert not limiter.acquire(timeout=0.1)
+    assert not asyncio.run(limiter.acquire_async(timeout=0.1))
+    assert 4 < limiter.pause_remaining() <= 5
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("9999", max_seconds=60) == 60
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
@@ -0,0 +1,94 @@
+import copy
+import pickle
+
+from domain.entities.validation_result import (
+    APIResponse, ValidationError, ValidationResult, ValidationStatus, ValidationType
+)
+
+
+def make_result() -> ValidationResult:
+    return ValidationResult(document_path="a.xml", status=ValidationStatus.SUCCESS)
+
+
+def schema_error(message="Erro de schema") -> ValidationError:
+    return ValidationError(ValidationType.SCHEMA, message)
+
+
+def counts(result):
+    return {error_type: result.count_errors(error_type) for error_type in ValidationType
+            if result.count_errors(error_type)}
+
+
+def test_clean_result_has_no_errors():
+    result = make_result()
+    assert result.is_valid
+    assert (result.error_count, result.schema_errors, counts(result)) == (0, [], {})
+    assert result.errors == []
+
+
+def test_errors_is_a_mutable_list_that_keeps_counts():
+    result = make_result()
+    result.errors.append(schema_error())
+    result.errors.extend([schema_error(), ValidationError(ValidationType.API, "HTTP 500")])
+    result.errors += [ValidationError(ValidationType.STRUCTURE, "Chave NFe inválida")]
+
+    assert isinstance(result.errors, list)
+    assert result.error_count == 4 and result.has_errors and not result.is_valid
+    assert counts(result) == {ValidationType.SCHEMA: 2, ValidationType.API: 1, ValidationType.STRUCTURE: 1}
+    assert [error.message for error in result.api_errors] == ["HTTP 500"]
+
+    del result.errors[0]
+    result.errors[0] = ValidationError(ValidationType.SIGNATURE, "Assinatura inválida")
+    assert counts(result) == {ValidationType.SIGNATURE: 1, ValidationType.API: 1, ValidationType.STRUCTURE: 1}
+
+    result.errors.pop()
+    result.errors.remove(result.api_errors[0])
+    assert counts(result) == {ValidationType.SIGNATURE: 1}
+
+    result.errors.clear()
+    assert counts(result) == {} and result.schema_errors == []
+
+
+def test_assigning_errors_recounts():
+    result = make_result()
+    result.errors = [schema_error(), schema_error()]
+    assert result.count_errors(ValidationType.SCHEMA) == 2
+    result.errors.extend(result.errors)
+    assert result.count_errors(ValidationType.SCHEMA) == 4
+
+
+def test_add_error_and_api_response_update_status_and_counts():
+    result = make_result()
+    result.add_api_response(success=False, message="HTTP 400", status_code=400)
+    result.add_error(ValidationType.SCHEMA, "Erro de schema")
+
+    assert result.status == ValidationStatus.FAILED
+    assert counts(result) == {ValidationType.API: 1, ValidationType.SCHEMA: 1}
+    assert "Schema: 1" in result.get_summary() and "API: 1" in result.get_summary()
+
+
+def test_copies_and_pickles_keep_errors_and_counts():
+    result = make_result()
+    result.add_error(ValidationType.SCHEMA, "Erro de schema")
+    result.api_response = APIResponse(success=True, message="ok", status_code=200)
+
+    for clone in (copy.deepcopy(result), copy.copy(result), pickle.loads(pickle.dumps(result))):
+        assert [error.message for error in clone.errors] == ["Erro de schema"]
+        assert counts(clone) == {ValidationType.SCHEMA: 1}
+        assert clone.api_response.status_code == 200
+
+    clone = copy.deepcopy(result)
+    clone.errors.append(schema_error())
+    assert result.count_errors(ValidationType.SCHEMA) == 1
+
+
+def test_pending_api_response_is_neither_valid_nor_an_api_error():
+    result = make_result()
+    result.add_api_response(success=False, message="API indisponível - envio pendente", data={'pending': True})
+
+    assert result.is_pending and not result.is_valid
+    assert result.status == ValidationStatus.SUCCESS and not result.has_errors
+    assert result.get_summary().startswith("⏸️")
+
+    result.add_api_response(success=True, message="ok", status_code=200)
+    assert result.is_valid and not result.is_pending
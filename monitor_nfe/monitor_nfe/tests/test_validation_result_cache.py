@@ -0,0 +1,160 @@
+from concurrent.futures import Future
+
+import pytest
+
+from application.use_cases.validate_nfe_use_case import ValidateNFeUseCase, ValidateNFeUseCaseRequest
+from domain.entities.configuration import Configuration
+from domain.entities.nfe_document import NFEDocument, NFEType
+from domain.entities.validation_result import APIResponse, ValidationResult, ValidationStatus
+from infrastructure.services.validation_result_cache import LRUValidationResultCache
+
+TOKEN = "a" * 32
+
+
+def make_result(path="a.xml") -> ValidationResult:
+    return ValidationResult(document_path=path, status=ValidationStatus.SUCCESS)
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = LRUValidationResultCache(max_entries=2)
+    cache.put('a', make_result('a'))
+    cache.put('b', make_result('b'))
+    cache.get('a')
+    cache.put('c', make_result('c'))
+
+    assert cache.get('b') is None
+    assert cache.get('a').document_path == 'a'
+    assert cache.stats()['size'] == 2
+
+
+def test_cached_results_are_copies():
+    cache = LRUValidationResultCache()
+    result = make_result()
+    cache.put('a', result)
+    result.document_path = 'changed on the way in'
+    cache.get('a').document_path = 'changed on the way out'
+
+    assert cache.get('a').document_path == 'a.xml'
+
+
+class FakeValidationService:
+    def validate_structure(self, document):
+        return make_result(str(document.file_path))
+
+    def detect_document_type(self, document):
+        return NFEType.PROC_NFE
+
+
+class FakeSchemaService:
+    def __init__(self):
+        self.fingerprint = 'schemas-v1'
+        self.validations = 0
+
+    def parse_document(self, context):
+        return None
+
+    def has_schemas_loaded(self):
+        return True
+
+    def schema_fingerprint(self):
+        return self.fingerprint
+
+    def validate_against_schema(self, document):
+        self.validations += 1
+        return make_result(str(document.file_path))
+
+
+class FakeAPIService:
+    def __init__(self):
+        self.response = APIResponse(success=True, message="ok", status_code=200)
+        self.uploads = 0
+
+    def submit(self, document, token, idempotency_key=None):
+        self.uploads += 1
+        future = Future()
+        future.set_result(self.response)
+        return future
+
+
+class FakeConfigRepository:
+    def load_configuration(self):
+        return Configuration(token=TOKEN)
+
+
+class FakeLogRepository:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    schema_service = FakeSchemaService()
+    api_service = FakeAPIService()
+    use_case = ValidateNFeUseCase(
+        validation_service=FakeValidationService(),
+        schema_service=schema_service,
+        api_service=api_service,
+        config_repository=FakeConfigRepository(),
+        log_repository=FakeLogRepository(),
+        result_cache=LRUValidationResultCache()
+    )
+
+    def validate(name='a.xml', content=b'<nfeProc/>', **options):
+        path = tmp_path / name
+        path.write_bytes(content)
+        request = ValidateNFeUseCaseRequest(document=NFEDocument(file_path=path), **options)
+        return use_case.execute(request).validation_result
+
+    return validate, schema_service, api_service
+
+
+def test_identical_content_reuses_the_result_under_its_own_path(pipeline):
+    validate, schema_service, api_service = pipeline
+    validate('a.xml')
+    copy = validate('copy.xml')
+
+    assert (schema_service.validations, api_service.uploads) == (1, 1)
+    assert copy.document_path.endswith('copy.xml')
+    assert copy.api_response.status_code == 200
+
+
+def test_different_content_is_not_reused(pipeline):
+    validate, schema_service, _ = pipeline
+    validate(content=b'<nfeProc/>')
+    validate(content=b'<nfeProc> </nfeProc>')
+
+    assert schema_service.validations == 2
+
+
+def test_new_schema_set_invalidates_cached_results(pipeline):
+    validate, schema_service, _ = pipeline
+    validate()
+    schema_service.fingerprint = 'schemas-v2'
+    validate()
+
+    assert schema_service.validations == 2
+
+
+@pytest.mark.parametrize("options", [
+    {'validate_schema': False},
+    {'send_to_api': False},
+])
+def test_requested_steps_are_part_of_the_key(pipeline, options):
+    validate, _, api_service = pipeline
+    validate()
+    result = validate(**options)
+
+    expected_uploads = 1 if options.get('send_to_api') is False else 2
+    assert api_service.uploads == expected_uploads
+    assert (result.api_response is None) == (options.get('send_to_api') is False)
+
+
+def test_transient_api_failures_are_not_cached(pipeline):
+    validate, _, api_service = pipeline
+    api_service.response = APIResponse(success=False, message="HTTP 503", status_code=503)
+    validate()
+    api_service.response = APIResponse(success=True, message="ok", status_code=200)
+    result = validate()
+
+    assert api_service.uploads == 2
+    assert result.api_response.status_code == 200
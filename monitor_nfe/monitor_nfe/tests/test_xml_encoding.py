@@ -0,0 +1,56 @@
+import codecs
+
+import pytest
+
+from domain.value_objects.xml_encoding import XMLEncoding
+
+DOCUMENT = '<?xml version="1.0" encoding="{}"?><nfeProc><xNome>Açúcar São João</xNome></nfeProc>'
+
+
+@pytest.mark.parametrize("bom, name", [
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+])
+def test_bom_wins_over_declaration(bom, name):
+    raw = bom + DOCUMENT.format('ISO-8859-1').encode(name)
+    encoding = XMLEncoding.sniff(raw)
+    assert (encoding.name, encoding.bom_length, encoding.source) == (name, len(bom), 'bom')
+    assert encoding.verify(raw)
+
+
+def test_bomless_utf16_is_recognised_from_the_declaration_layout():
+    assert XMLEncoding.sniff(DOCUMENT.format('UTF-16').encode('utf-16-le')).name == 'utf-16-le'
+    assert XMLEncoding.sniff(DOCUMENT.format('UTF-16').encode('utf-16-be')).name == 'utf-16-be'
+
+
+@pytest.mark.parametrize("declared, name", [
+    ('ISO-8859-1', 'iso8859-1'),
+    ('windows-1252', 'cp1252'),
+    ('UTF-8', 'utf-8'),
+])
+def test_declared_encoding_is_normalized(declared, name):
+    raw = DOCUMENT.format(declared).encode(name)
+    encoding = XMLEncoding.sniff(raw)
+    assert (encoding.name, encoding.source) == (name, 'declaration')
+    assert encoding.verify(raw)
+
+
+@pytest.mark.parametrize("raw", [
+    b'<nfeProc/>',
+    DOCUMENT.format('no-such-codec').encode('utf-8'),
+    # An ASCII-readable declaration can't be UTF-16, whatever it says
+    DOCUMENT.format('UTF-16').encode('utf-8'),
+])
+def test_defaults_to_utf8(raw):
+    encoding = XMLEncoding.sniff(raw)
+    assert (encoding.name, encoding.source) == ('utf-8', 'default')
+
+
+def test_verify_rejects_bytes_invalid_in_the_declared_encoding():
+    raw = DOCUMENT.format('UTF-8').encode('iso-8859-1')
+    assert not XMLEncoding.sniff(raw).verify(raw)
+    # Split across chunks, a multi-byte sequence is still decoded correctly
+    assert XMLEncoding('utf-8').verify('ção'.encode('utf-8') * 10, chunk_size=3)
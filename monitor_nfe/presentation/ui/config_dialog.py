@@ -1,6 +1,7 @@
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
                                QLabel, QFileDialog, QLineEdit, QMessageBox, 
-                               QFormLayout, QGroupBox, QCheckBox)
+                               QFormLayout, QGroupBox, QCheckBox, QSpinBox,
+                               QDoubleSpinBox, QComboBox)
 from PySide6.QtCore import Qt
 from pathlib import Path
 
@@ -57,6 +58,130 @@ class ConfigDialog(QDialog):
         self.auto_organize_check.setToolTip("Move arquivos processados para pastas 'processed' ou 'errors'")
         options_layout.addRow("", self.auto_organize_check)
         
+        self.max_workers_input = QSpinBox()
+        self.max_workers_input.setRange(1, 64)
+        self.max_workers_input.setToolTip(
+            "Threads de processamento e conexões mantidas com a API (aplicado ao reiniciar)"
+        )
+        options_layout.addRow("Threads de Processamento:", self.max_workers_input)
+        
+        self.async_uploads_check = QCheckBox("Envio assíncrono para a API")
+        self.async_uploads_check.setToolTip(
+            "Mantém vários envios simultâneos em uma única thread (requer aiohttp, aplicado ao reiniciar)"
+        )
+        options_layout.addRow("", self.async_uploads_check)
+        
+        self.max_in_flight_input = QSpinBox()
+        self.max_in_flight_input.setRange(1, 1000)
+        self.max_in_flight_input.setToolTip(
+            "Número máximo de envios simultâneos no modo assíncrono, onde o limite cresce enquanto a API "
+            "responde bem. No modo síncrono o limite é o número de threads e só diminui sob sobrecarga"
+        )
+        options_layout.addRow("Envios Simultâneos:", self.max_in_flight_input)
+        
+        self.api_rate_limit_input = QDoubleSpinBox()
+        self.api_rate_limit_input.setRange(0, 1000)
+        self.api_rate_limit_input.setDecimals(1)
+        self.api_rate_limit_input.setSuffix(" req/s")
+        self.api_rate_limit_input.setSpecialValueText("Sem limite")
+        self.api_rate_limit_input.setToolTip(
+            "Taxa máxima de envios para a API, compartilhada por todas as threads (aplicado ao reiniciar)"
+        )
+        options_layout.addRow("Taxa de Envio:", self.api_rate_limit_input)
+        
+        self.api_burst_input = QSpinBox()
+        self.api_burst_input.setRange(1, 1000)
+        self.api_burst_input.setToolTip("Número de envios permitidos em sequência antes de aplicar a taxa")
+        options_layout.addRow("Rajada Máxima:", self.api_burst_input)
+        
+        self.circuit_failure_threshold_input = QSpinBox()
+        self.circuit_failure_threshold_input.setRange(1, 100)
+        self.circuit_failure_threshold_input.setToolTip(
+            "Falhas consecutivas de conexão ou do servidor antes de pausar os envios (aplicado ao reiniciar)"
+        )
+        options_layout.addRow("Falhas para Modo Offline:", self.circuit_failure_threshold_input)
+        
+        self.circuit_reset_seconds_input = QSpinBox()
+        self.circuit_reset_seconds_input.setRange(1, 3600)
+        self.circuit_reset_seconds_input.setSuffix(" s")
+        self.circuit_reset_seconds_input.setToolTip("Intervalo entre testes de conexão enquanto a API está indisponível")
+        options_layout.addRow("Teste de Reconexão:", self.circuit_reset_seconds_input)
+        
+        self.upload_compression_input = QComboBox()
+        self.upload_compression_input.addItem("Desativada", "none")
+        self.upload_compression_input.addItem("gzip", "gzip")
+        self.upload_compression_input.addItem("deflate", "deflate")
+        self.upload_compression_input.setToolTip(
+            "Comprime o corpo dos envios - use apenas se o servidor aceitar Content-Encoding (aplicado ao reiniciar)"
+        )
+        options_layout.addRow("Compressão do Envio:", self.upload_compression_input)
+        
+        self.upload_batch_size_input = QSpinBox()
+        self.upload_batch_size_input.setRange(1, 500)
+        self.upload_batch_size_input.setSpecialValueText("Desativado")
+        self.upload_batch_size_input.setToolTip(
+            "Agrupa vários XMLs em uma única requisição - sem suporte no servidor, envia individualmente (aplicado ao reiniciar)"
+        )
+        options_layout.addRow("Documentos por Lote:", self.upload_batch_size_input)
+        
+        self.upload_batch_window_input = QSpinBox()
+        self.upload_batch_window_input.setRange(1, 5000)
+        self.upload_batch_window_input.setSuffix(" ms")
+        self.upload_batch_window_input.setToolTip("Tempo máximo de espera para completar um lote antes de enviá-lo")
+        options_layout.addRow("Janela do Lote:", self.upload_batch_window_input)
+        
+        self.upload_deadline_input = QSpinBox()
+        self.upload_deadline_input.setRange(5, 600)
+        self.upload_deadline_input.setSuffix(" s")
+        self.upload_deadline_input.setToolTip(
+            "Tempo máximo de envio de cada documento, somando todas as tentativas (aplicado ao reiniciar)"
+        )
+        options_layout.addRow("Prazo por Documento:", self.upload_deadline_input)
+        
+        self.hedge_uploads_check = QCheckBox("Reenviar envios lentos em paralelo")
+        self.hedge_uploads_check.setToolTip(
+            "Envia uma segunda cópia quando a resposta demora mais que 99% dos envios recentes (aplicado ao reiniciar)"
+        )
+        options_layout.addRow("", self.hedge_uploads_check)
+        
+        self.schema_processes_input = QSpinBox()
+        self.schema_processes_input.setRange(0, 64)
+        self.schema_processes_input.setSpecialValueText("Desativado")
+        self.schema_processes_input.setToolTip(
+            "Valida os schemas XSD em processos separados, aproveitando todos os núcleos - "
+            "desativado valida nas threads de processamento (aplicado ao reiniciar)"
+        )
+        options_layout.addRow("Processos de Validação XSD:", self.schema_processes_input)
+        
+        self.single_pass_schema_check = QCheckBox("Validar XSD durante a leitura do XML")
+        self.single_pass_schema_check.setToolTip(
+            "Valida enquanto lê o documento, em uma única passada - erros não informam a linha (aplicado ao reiniciar)"
+        )
+        options_layout.addRow("", self.single_pass_schema_check)
+        
+        self.schema_max_errors_input = QSpinBox()
+        self.schema_max_errors_input.setRange(0, 10000)
+        self.schema_max_errors_input.setSpecialValueText("Todos")
+        self.schema_max_errors_input.setToolTip(
+            "Quantos erros de schema detalhar por documento - os demais são contados e agrupados "
+            "por mensagem (aplicado ao reiniciar)"
+        )
+        options_layout.addRow("Máximo de Erros de Schema:", self.schema_max_errors_input)
+        
+        self.schema_fail_fast_check = QCheckBox("Detalhar só o primeiro erro de schema")
+        self.schema_fail_fast_check.setToolTip(
+            "Detalha apenas o primeiro erro e valida durante a leitura. O documento ainda é "
+            "validado por inteiro - só o resultado fica menor; erros não informam a linha (aplicado ao reiniciar)"
+        )
+        options_layout.addRow("", self.schema_fail_fast_check)
+        
+        self.verify_signatures_check = QCheckBox("Verificar assinatura digital (XML-DSig)")
+        self.verify_signatures_check.setToolTip(
+            "Confere o digest e a assinatura RSA de cada XML com o certificado do emitente; XML sem assinatura "
+            "vai para a pasta de erros. Só é feita junto com a validação de schema (aplicado ao reiniciar)"
+        )
+        options_layout.addRow("", self.verify_signatures_check)
+        
         layout.addWidget(options_group)
         
         # API Configuration Group
@@ -108,6 +233,25 @@ class ConfigDialog(QDialog):
         self.output_folder_input.setText(self.current_config.output_folder or '')
         self.token_input.setText(self.current_config.token or '')
         self.auto_organize_check.setChecked(self.current_config.auto_organize)
+        self.max_workers_input.setValue(self.current_config.max_workers)
+        self.async_uploads_check.setChecked(self.current_config.async_uploads)
+        self.max_in_flight_input.setValue(self.current_config.max_in_flight)
+        self.api_rate_limit_input.setValue(self.current_config.api_rate_limit)
+        self.api_burst_input.setValue(self.current_config.api_burst)
+        self.circuit_failure_threshold_input.setValue(self.current_config.circuit_failure_threshold)
+        self.circuit_reset_seconds_input.setValue(self.current_config.circuit_reset_seconds)
+        self.upload_compression_input.setCurrentIndex(
+            max(0, self.upload_compression_input.findData(self.current_config.upload_compression))
+        )
+        self.upload_batch_size_input.setValue(self.current_config.upload_batch_size)
+        self.upload_batch_window_input.setValue(self.current_config.upload_batch_window_ms)
+        self.upload_deadline_input.setValue(self.current_config.upload_deadline_seconds)
+        self.hedge_uploads_check.setChecked(self.current_config.hedge_uploads)
+        self.schema_processes_input.setValue(self.current_config.schema_validation_processes)
+        self.single_pass_schema_check.setChecked(self.current_config.single_pass_schema_validation)
+        self.schema_max_errors_input.setValue(self.current_config.schema_max_errors)
+        self.schema_fail_fast_check.setChecked(self.current_config.schema_fail_fast)
+        self.verify_signatures_check.setChecked(self.current_config.verify_signatures)
     
     def browse_monitor_folder(self):
         """Browse for monitor folder"""
@@ -223,6 +367,23 @@ class ConfigDialog(QDialog):
         self.current_config.output_folder = output_folder
         self.current_config.token = token
         self.current_config.auto_organize = self.auto_organize_check.isChecked()
+        self.current_config.max_workers = self.max_workers_input.value()
+        self.current_config.async_uploads = self.async_uploads_check.isChecked()
+        self.current_config.max_in_flight = self.max_in_flight_input.value()
+        self.current_config.api_rate_limit = self.api_rate_limit_input.value()
+        self.current_config.api_burst = self.api_burst_input.value()
+        self.current_config.circuit_failure_threshold = self.circuit_failure_threshold_input.value()
+        self.current_config.circuit_reset_seconds = self.circuit_reset_seconds_input.value()
+        self.current_config.upload_compression = self.upload_compression_input.currentData()
+        self.current_config.upload_batch_size = self.upload_batch_size_input.value()
+        self.current_config.upload_batch_window_ms = self.upload_batch_window_input.value()
+        self.current_config.upload_deadline_seconds = self.upload_deadline_input.value()
+        self.current_config.hedge_uploads = self.hedge_uploads_check.isChecked()
+        self.current_config.schema_validation_processes = self.schema_processes_input.value()
+        self.current_config.single_pass_schema_validation = self.single_pass_schema_check.isChecked()
+        self.current_config.schema_max_errors = self.schema_max_errors_input.value()
+        self.current_config.schema_fail_fast = self.schema_fail_fast_check.isChecked()
+        self.current_config.verify_signatures = self.verify_signatures_check.isChecked()
         
         self.accept()
     
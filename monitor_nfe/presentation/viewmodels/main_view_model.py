@@ -1,3 +1,4 @@
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional, Callable
@@ -6,10 +7,12 @@ from PySide6.QtWidgets import QApplication
 
 from application.dtos.file_processing_dto import MonitoringStatus
 from application.use_cases.process_file_use_case import ProcessFileUseCase, ProcessFileUseCaseRequest
+from application.use_cases.drain_outbox_use_case import DrainOutboxUseCase
 from application.interfaces.repositories import IConfigurationRepository
-from application.interfaces.services import IFileMonitorService
+from application.interfaces.services import IFileMonitorService, IAPIService, IValidationResultCache
 from domain.entities.configuration import Configuration
 from domain.entities.validation_result import ValidationResult
+from infrastructure.services.circuit_breaker import CircuitState
 from infrastructure.services.parallel_processing_service import ParallelProcessingService
 
 
@@ -24,31 +27,63 @@ class MainViewModel(QObject):
     configuration_changed = Signal()
     validation_result_added = Signal(object)  # ValidationResult
     processing_progress = Signal(str, int, int)  # session_id, processed, total
+    upload_concurrency_changed = Signal(int, str)  # limit, reason
     
     def __init__(
         self,
         config_repository: IConfigurationRepository,
         file_monitor_service: IFileMonitorService,
         process_file_use_case: ProcessFileUseCase,
-        log_repository = None
+        log_repository = None,
+        api_service: Optional[IAPIService] = None,
+        drain_outbox_use_case: Optional[DrainOutboxUseCase] = None,
+        result_cache: Optional[IValidationResultCache] = None
     ):
         super().__init__()
         
         self._config_repository = config_repository
         self._file_monitor_service = file_monitor_service
         self._process_file_use_case = process_file_use_case
+        self._api_service = api_service
+        self._drain_outbox_use_case = drain_outbox_use_case
+        self._result_cache = result_cache
+        self._outbox_resumed = False
+        self._outbox_draining = threading.Lock()
+        
+        # Documents held while the API was down are counted once the drain finishes them
+        if drain_outbox_use_case:
+            drain_outbox_use_case.set_result_callback(self._on_held_result)
         
         # Create parallel processing service
         if log_repository:
+            max_workers = config_repository.load_configuration().max_workers
+            # Async API services overlap uploads, so each worker takes a share of the in-flight limit
+            max_in_flight = getattr(api_service, 'max_in_flight', 0)
             self._parallel_service = ParallelProcessingService(
                 process_file_use_case=process_file_use_case,
                 log_repository=log_repository,
-                max_threads=10
+                max_threads=max_workers,
+                batch_size=-(-max_in_flight // max_workers) if max_in_flight else 1
             )
             self._setup_parallel_callbacks()
         else:
             self._parallel_service = None
         
+        # Report adaptive upload concurrency changes to UI and logs
+        limiter = getattr(api_service, 'concurrency_limiter', None)
+        if limiter:
+            limiter.add_listener(self._on_upload_concurrency_changed)
+        
+        # Report global Retry-After pauses
+        rate_limiter = getattr(api_service, 'rate_limiter', None)
+        if rate_limiter:
+            rate_limiter.add_pause_listener(self._on_api_paused)
+        
+        # Report API outages (circuit open) and recovery
+        circuit_breaker = getattr(api_service, 'circuit_breaker', None)
+        if circuit_breaker:
+            circuit_breaker.add_listener(self._on_circuit_state_changed)
+        
         # State
         self._configuration: Configuration = Configuration()
         self._monitoring_status = MonitoringStatus(is_active=False)
@@ -71,6 +106,11 @@ class MainViewModel(QObject):
         
         # Result callback - direct signal emission
         def on_result(result: ValidationResult, thread_id: str):
+            # Held uploads are counted when the outbox drain finishes them
+            if result.is_pending:
+                self.status_updated.emit(f"⏸️  [{thread_id}] Envio retido até a API voltar: {Path(result.document_path).name}")
+                return
+            
             # Add result to list in thread-safe way
             self._validation_results.append(result)
             
@@ -109,6 +149,24 @@ class MainViewModel(QObject):
         """Get validation results"""
         return self._validation_results.copy()
     
+    @property
+    def upload_concurrency(self) -> Optional[dict]:
+        """Get adaptive upload concurrency state (limit, in_flight, reason)"""
+        limiter = getattr(self._api_service, 'concurrency_limiter', None)
+        return limiter.snapshot() if limiter else None
+    
+    @property
+    def upload_compression(self) -> Optional[dict]:
+        """Get upload compression metrics (encoding, ratio, avg_time_ms) when enabled"""
+        if not getattr(self._api_service, 'upload_compression', None):
+            return None
+        return self._api_service.compression_stats()
+    
+    @property
+    def result_cache_stats(self) -> Optional[dict]:
+        """Get validation result cache metrics (hits, misses, size, hit_ratio)"""
+        return self._result_cache.stats() if self._result_cache else None
+    
     @property
     def is_monitoring_active(self) -> bool:
         """Check if monitoring is active"""
@@ -159,6 +217,12 @@ class MainViewModel(QObject):
                 self.status_updated.emit("Pasta de monitoramento não existe")
                 return False
             
+            # Pre-open API connections in background so the initial scan skips handshakes
+            self._warm_up_api_connections()
+            
+            # Resend uploads left pending by the previous run
+            self._resume_pending_submissions()
+            
             # Start monitoring
             self._file_monitor_service.start_monitoring(
                 monitor_path,
@@ -219,6 +283,11 @@ class MainViewModel(QObject):
             # Set up real-time callback for individual results
             def on_result_ready(result: ValidationResult):
                 """Callback called when each individual result is ready"""
+                # Held uploads are counted when the outbox drain finishes them
+                if result.is_pending:
+                    self.status_updated.emit(f"⏸️  Envio retido até a API voltar: {Path(result.document_path).name}")
+                    return
+                
                 self._validation_results.append(result)
                 self.validation_result_added.emit(result)
                 
@@ -294,11 +363,87 @@ class MainViewModel(QObject):
         except Exception as e:
             self.status_updated.emit(f"Erro ao processar arquivo detectado: {e}")
     
+    def _on_upload_concurrency_changed(self, limit: int, reason: str):
+        """Handle adaptive upload limit changes (called from worker threads)"""
+        self.upload_concurrency_changed.emit(limit, reason)
+        self.status_updated.emit(f"⚙️  Envios simultâneos: {limit} ({reason})")
+    
+    def _on_api_paused(self, seconds: float, reason: str):
+        """Handle a global pause requested by the API (called from worker threads)"""
+        self.status_updated.emit(f"⏸️  API pediu pausa de {seconds:.0f}s nos envios ({reason})")
+    
+    def _on_circuit_state_changed(self, state: CircuitState, reason: str):
+        """Handle API outage and recovery (called from worker threads)"""
+        if state == CircuitState.OPEN:
+            self.status_updated.emit(f"🔴 API indisponível - envios retidos até a reconexão ({reason})")
+        elif state == CircuitState.CLOSED:
+            self.status_updated.emit("🟢 API restabelecida - enviando documentos retidos")
+            self._drain_pending_submissions()
+    
+    def _warm_up_api_connections(self):
+        """Open pooled API connections without blocking the UI thread"""
+        if not self._api_service or not self._configuration.token:
+            return
+        
+        def warm_up():
+            try:
+                self._api_service.warm_up(self._configuration.max_workers)
+            except Exception as e:
+                self.status_updated.emit(f"⚠️  Falha ao pré-aquecer conexões da API: {e}")
+        
+        threading.Thread(target=warm_up, name="API-Warmup", daemon=True).start()
+    
+    def _resume_pending_submissions(self):
+        """Drain the submission outbox once per run without blocking the UI thread"""
+        if self._outbox_resumed:
+            return
+        self._outbox_resumed = True
+        self._drain_pending_submissions()
+    
+    def _drain_pending_submissions(self):
+        """Resend outbox submissions on a background thread (at startup and when the API recovers)"""
+        if not self._drain_outbox_use_case:
+            return
+        
+        def drain():
+            # A drain already running picks up everything pending - don't start a second one
+            if not self._outbox_draining.acquire(blocking=False):
+                return
+            try:
+                response = self._drain_outbox_use_case.execute()
+                if response.pending:
+                    self.status_updated.emit(
+                        f"📤 Outbox: {response.acknowledged} envio(s) pendente(s) concluído(s) "
+                        f"({response.completed} arquivo(s) retido(s) organizado(s)), "
+                        f"{response.still_pending} ainda pendente(s)"
+                    )
+            except Exception as e:
+                self.status_updated.emit(f"⚠️  Erro ao reenviar envios pendentes: {e}")
+            finally:
+                self._outbox_draining.release()
+        
+        threading.Thread(target=drain, name="NFE-OutboxDrain", daemon=True).start()
+    
+    def _on_held_result(self, result: ValidationResult):
+        """Count a held document once the outbox drain got its answer (called from the drain thread)"""
+        self._validation_results.append(result)
+        self.validation_result_added.emit(result)
+        
+        self._monitoring_status.files_processed += 1
+        filename = Path(result.document_path).name
+        if result.is_valid:
+            self._monitoring_status.files_successful += 1
+            self.status_updated.emit(f"✅ Envio retido concluído: {filename}")
+        else:
+            self._monitoring_status.files_failed += 1
+            error_msg = result.errors[0].message if result.errors else "Erro desconhecido"
+            self.status_updated.emit(f"❌ Envio retido falhou: {filename} - {error_msg}")
+    
     def _update_processing_statistics(self, results: List[ValidationResult]):
         """Update processing statistics (only used when callback is not supported)"""
         for result in results:
-            # Only update if not already updated via callback
-            if not hasattr(self._process_file_use_case, 'set_result_callback'):
+            # Only update if not already updated via callback (held uploads count once finished)
+            if not hasattr(self._process_file_use_case, 'set_result_callback') and not result.is_pending:
                 self._monitoring_status.files_processed += 1
                 
                 if result.is_valid:
@@ -358,7 +503,7 @@ class MainViewModel(QObject):
     def _start_parallel_processing(self, files_found: List[Path]):
         """Start parallel processing of found files"""
         try:
-            self.status_updated.emit(f"🚀 Iniciando processamento paralelo de {len(files_found)} arquivo(s) (máximo 10 threads)")
+            self.status_updated.emit(f"🚀 Iniciando processamento paralelo de {len(files_found)} arquivo(s) (máximo {self._configuration.max_workers} threads)")
             
             session_id = self._parallel_service.start_parallel_processing(
                 file_paths=files_found,
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Emulador local da API ValidaGuarda (/GuardaNFe/EnviarXml) para testes sem rede
+
+Simula latência com distribuições configuráveis e injeta respostas 409/429/5xx,
+timeouts e conexões derrubadas. Chaves já armazenadas recebem 409 como na API real,
+e reenvios com o mesmo Idempotency-Key recebem a resposta original.
+
+Uso:
+    python validaguarda_emulator.py --port 8080 --latency lognormal:80,0.5 --error 503:0.05 --error 429:0.02
+    (na aplicação, aponte base_url do ValidaNFeAPIService para http://127.0.0.1:8080)
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+GUARDA_ENDPOINT = "/GuardaNFe/EnviarXml"
+BATCH_ENDPOINT = "/GuardaNFe/EnviarXmlLote"
+STATS_ENDPOINT = "/__stats"
+
+NFE_KEY_PATTERN = re.compile(rb'<chNFe>(\d{44})</chNFe>|Id="NFe(\d{44})"')
+FILENAME_PATTERN = re.compile(rb'filename="([^"]*)"')
+IDEMPOTENCY_PATTERN = re.compile(rb'^Idempotency-Key:\s*(\S+)', re.IGNORECASE | re.MULTILINE)
+
+
+class LatencyDistribution:
+    """Latência por requisição a partir de uma especificação 'tipo:parâmetros' em ms
+    
+    fixed:MS | uniform:MIN,MAX | normal:MEDIA,DESVIO | lognormal:MEDIANA,SIGMA | exponential:MEDIA
+    """
+    
+    def __init__(self, spec: str = "fixed:0"):
+        kind, _, params = spec.partition(':')
+        self.spec = spec
+        self._kind = kind.strip().lower()
+        self._params = [float(value) for value in params.split(',') if value.strip()]
+        
+        expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2, 'exponential': 1}
+        if self._kind not in expected or len(self._params) != expected[self._kind]:
+            raise ValueError(f"Distribuição de latência inválida: {spec}")
+    
+    def sample(self, rng: random.Random) -> float:
+        """Latência sorteada, em segundos"""
+        if self._kind == 'fixed':
+            ms = self._params[0]
+        elif self._kind == 'uniform':
+            ms = rng.uniform(*self._params)
+        elif self._kind == 'normal':
+            ms = rng.gauss(*self._params)
+        elif self._kind == 'lognormal':
+            median, sigma = self._params
+            ms = rng.lognormvariate(math.log(max(median, 0.001)), sigma)
+        else:
+            ms = rng.expovariate(1 / max(self._params[0], 0.001))
+        return max(0.0, ms) / 1000
+
+
+@dataclass
+class EmulatorSettings:
+    """Comportamento do emulador"""
+    latency: str = "fixed:20"
+    # Probabilidade por requisição de cada status injetado (409, 429, 500, 502, 503, 504)
+    error_rates: Dict[int, float] = field(default_factory=dict)
+    timeout_rate: float = 0.0
+    timeout_seconds: float = 35.0
+    drop_rate: float = 0.0
+    retry_after_seconds: Optional[int] = 1
+    batch_enabled: bool = True
+    seed: Optional[int] = None
+
+
+class ValidaGuardaEmulator:
+    """Servidor HTTP local que imita a API ValidaGuarda"""
+    
+    def __init__(self, settings: Optional[EmulatorSettings] = None, host: str = '127.0.0.1', port: int = 0):
+        self.settings = settings or EmulatorSettings()
+        self._latency = LatencyDistribution(self.settings.latency)
+        self._rng = random.Random(self.settings.seed)
+        self._lock = threading.Lock()
+        
+        self._stored_keys: Dict[str, float] = {}
+        self._idempotent_responses: Dict[str, Tuple[int, dict]] = {}
+        self._status_counts: Counter = Counter()
+        self._injected_counts: Counter = Counter()
+        self._requests = 0
+        self._documents = 0
+        self._in_flight = 0
+        self._max_in_flight = 0
+        
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> 'ValidaGuardaEmulator':
+        """Atender requisições em uma thread de fundo"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ValidaGuarda-Emulator", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Parar o servidor"""
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def serve_forever(self):
+        self._server.serve_forever()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+    
+    def stats(self) -> Dict:
+        """Contadores do emulador desde o início"""
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'documents': self._documents,
+                'stored_keys': len(self._stored_keys),
+                'max_in_flight': self._max_in_flight,
+                'status_counts': dict(self._status_counts),
+                'injected': dict(self._injected_counts)
+            }
+    
+    def _make_handler(self):
+        emulator = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def do_HEAD(self):
+                self._reply(200, None)
+            
+            def do_GET(self):
+                if self.path == STATS_ENDPOINT:
+                    self._reply(200, emulator.stats())
+                else:
+                    self._reply(404, {'message': 'Endpoint não encontrado'})
+            
+            def do_POST(self):
+                emulator._enter()
+                try:
+                    body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                    status, payload, extra_headers = emulator._handle_post(self.path, self.headers, body)
+                    if status is None:
+                        # Conexão derrubada sem resposta
+                        self.close_connection = True
+                        self.connection.shutdown(2)
+                        return
+                    self._reply(status, payload, extra_headers)
+                finally:
+                    emulator._leave()
+            
+            def _reply(self, status: int, payload, extra_headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(payload).encode('utf-8') if payload is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (extra_headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(data)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+    
+    def _enter(self):
+        with self._lock:
+            self._requests += 1
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+    
+    def _leave(self):
+        with self._lock:
+            self._in_flight -= 1
+    
+    def _handle_post(self, path: str, headers, body: bytes):
+        """Resposta (status, payload, headers) para um envio; status None derruba a conexão"""
+        time.sleep(self._latency.sample(self._rng))
+        
+        if path not in (GUARDA_ENDPOINT, BATCH_ENDPOINT) or (path == BATCH_ENDPOINT and not self.settings.batch_enabled):
+            return self._count(404), {'message': 'Endpoint não encontrado'}, {}
+        
+        # Falhas injetadas valem para a requisição inteira
+        injected = self._roll_injection()
+        if injected == 'drop':
+            return None, None, {}
+        if injected == 'timeout':
+            time.sleep(self.settings.timeout_seconds)
+            return self._count(504), {'message': 'Gateway Timeout'}, {}
+        if injected is not None:
+            extra = {}
+            if injected in (429, 503) and self.settings.retry_after_seconds:
+                extra['Retry-After'] = str(self.settings.retry_after_seconds)
+            return self._count(injected), {'message': f'Falha injetada HTTP {injected}'}, extra
+        
+        if not headers.get('X-API-KEY'):
+            return self._count(401), {'message': 'Token inválido/expirado'}, {}
+        
+        try:
+            if headers.get('Content-Encoding') in ('gzip', 'deflate'):
+                body = zlib.decompress(body, 47)
+            parts = self._parse_multipart(headers.get('Content-Type', ''), body)
+        except (ValueError, zlib.error):
+            return self._count(400), {'message': 'Corpo da requisição inválido'}, {}
+        
+        if path == GUARDA_ENDPOINT:
+            if len(parts) != 1:
+                return self._count(400), {'message': 'Envie um arquivo no campo xmlFile'}, {}
+            filename, content, part_key = parts[0]
+            status, payload = self._store_document(filename, content, part_key or headers.get('Idempotency-Key'))
+            return self._count(status), payload, {}
+        
+        results = []
+        for filename, content, part_key in parts:
+            status, payload = self._store_document(filename, content, part_key)
+            results.append({'fileName': filename, 'status': status, **payload})
+        return self._count(200), {'results': results}, {}
+    
+    def _store_document(self, filename: str, content: bytes, idempotency_key: Optional[str]) -> Tuple[int, dict]:
+        """Guardar um XML, respondendo 409 para chaves já armazenadas"""
+        with self._lock:
+            self._documents += 1
+            if idempotency_key and idempotency_key in self._idempotent_responses:
+                return self._idempotent_responses[idempotency_key]
+        
+        match = NFE_KEY_PATTERN.search(content)
+        if not match:
+            return 400, {'message': f'XML sem chave de NFe: {filename}'}
+        nfe_key = (match.group(1) or match.group(2)).decode('ascii')
+        
+        with self._lock:
+            if self.settings.error_rates.get(409, 0) and self._rng.random() < self.settings.error_rates[409]:
+                self._injected_counts[409] += 1
+                response = (409, {'message': 'NFe já existe (falha injetada)', 'chave': nfe_key})
+            elif nfe_key in self._stored_keys:
+                response = (409, {'message': 'NFe já existe', 'chave': nfe_key})
+            else:
+                self._stored_keys[nfe_key] = time.time()
+                response = (200, {'sucesso': True, 'chave': nfe_key, 'arquivo': filename})
+            
+            if idempotency_key:
+                self._idempotent_responses[idempotency_key] = response
+        return response
+    
+    def _roll_injection(self):
+        """Sortear uma falha injetada: 'drop', 'timeout', um status HTTP ou None"""
+        settings = self.settings
+        with self._lock:
+            roll = self._rng.random()
+            for outcome, rate in [('drop', settings.drop_rate), ('timeout', settings.timeout_rate)] + [
+                (status, rate) for status, rate in sorted(settings.error_rates.items()) if status != 409
+            ]:
+                if roll < rate:
+                    self._injected_counts[outcome] += 1
+                    return outcome
+                roll -= rate
+        return None
+    
+    def _count(self, status: int) -> int:
+        with self._lock:
+            self._status_counts[status] += 1
+        return status
+    
+    def _parse_multipart(self, content_type: str, body: bytes) -> List[Tuple[str, bytes, Optional[str]]]:
+        """Partes (nome do arquivo, conteúdo, Idempotency-Key) de um corpo multipart/form-data"""
+        match = re.search(r'boundary=("?)([^";]+)\1', content_type)
+        if not match:
+            raise ValueError("multipart sem boundary")
+        delimiter = b'--' + match.group(2).encode('ascii')
+        
+        parts = []
+        for chunk in body.split(delimiter)[1:]:
+            if chunk.startswith(b'--'):
+                break
+            head, _, content = chunk.partition(b'\r\n\r\n')
+            filename = FILENAME_PATTERN.search(head)
+            key = IDEMPOTENCY_PATTERN.search(head)
+            parts.append((
+                filename.group(1).decode('utf-8', errors='replace') if filename else '',
+                content[:-2] if content.endswith(b'\r\n') else content,
+                key.group(1).decode('ascii') if key else None
+            ))
+        return parts
+
+
+def parse_error_rates(values: List[str]) -> Dict[int, float]:
+    """Converter argumentos STATUS:PROBABILIDADE (ex.: 503:0.05)"""
+    rates = {}
+    for value in values or []:
+        status, _, rate = value.partition(':')
+        rates[int(status)] = float(rate)
+    return rates
+
+
+def add_emulator_arguments(parser: argparse.ArgumentParser):
+    """Opções de comportamento do emulador, compartilhadas com o teste de carga"""
+    parser.add_argument('--latency', default='fixed:20',
+                        help="Distribuição de latência em ms (fixed:MS, uniform:MIN,MAX, normal:MEDIA,DESVIO, "
+                             "lognormal:MEDIANA,SIGMA, exponential:MEDIA)")
+    parser.add_argument('--error', action='append', metavar='STATUS:PROB',
+                        help="Injetar um status HTTP com a probabilidade dada (repetível: --error 503:0.05)")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="Probabilidade de não responder a tempo")
+    parser.add_argument('--timeout-seconds', type=float, default=35.0, help="Espera das respostas atrasadas")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="Probabilidade de derrubar a conexão")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After enviado com 429/503 (0 = sem header)")
+    parser.add_argument('--no-batch', action='store_true', help="Responder 404 no endpoint de lote")
+    parser.add_argument('--seed', type=int, default=None, help="Semente para resultados reproduzíveis")
+
+
+def settings_from_arguments(args) -> EmulatorSettings:
+    return EmulatorSettings(
+        latency=args.latency,
+        error_rates=parse_error_rates(args.error),
+        timeout_rate=args.timeout_rate,
+        timeout_seconds=args.timeout_seconds,
+        drop_rate=args.drop_rate,
+        retry_after_seconds=args.retry_after or None,
+        batch_enabled=not args.no_batch,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulador local da API ValidaGuarda")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    add_emulator_arguments(parser)
+    args = parser.parse_args()
+    
+    emulator = ValidaGuardaEmulator(settings_from_arguments(args), host=args.host, port=args.port)
+    print(f"🧪 Emulador ValidaGuarda em {emulator.url}")
+    print(f"   Envio: {GUARDA_ENDPOINT}  Lote: {BATCH_ENDPOINT}  Estatísticas: {STATS_ENDPOINT}")
+    print(f"   Latência: {args.latency}  Falhas: {emulator.settings.error_rates or 'nenhuma'}")
+    try:
+        emulator.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 {json.dumps(emulator.stats(), ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()